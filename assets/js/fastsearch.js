@@ -1,55 +1,169 @@
 import * as params from '@params';
 
-let fuse; // holds our search engine
+let fuse; // fallback engine when no sharded index is available
+let shardIndex = null; // manifest + docs of the sharded index built after `hugo`
+let shardCache = {}; // shard number -> Promise of the parsed shard
+let searchSeq = 0; // ignore results of queries superseded by newer keystrokes
 let resList = document.getElementById('searchResults');
 let sInput = document.getElementById('searchInput');
 let first, last, current_elem = null
 let resultsAvailable = false;
 
-// load our search index
+const CJK = /[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]/;
+const TOKEN_RE = /([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+)|([0-9a-z\u00c0-\u024f]+)/g;
+const TITLE_WEIGHT = 3;
+const BM25_K1 = 1.2, BM25_B = 0.75;
+
+function getJSON(url) {
+    return fetch(url).then(function (res) {
+        if (!res.ok) throw new Error(url + ': ' + res.status);
+        return res.json();
+    });
+}
+
+// load our search index: sharded index first, full index.json + fuse.js as fallback
 window.onload = function () {
-    let xhr = new XMLHttpRequest();
-    xhr.onreadystatechange = function () {
-        if (xhr.readyState === 4) {
-            if (xhr.status === 200) {
-                let data = JSON.parse(xhr.responseText);
-                if (data) {
-                    // fuse.js options; check fuse.js website for details
-                    let options = {
-                        distance: 100,
-                        threshold: 0.4,
-                        ignoreLocation: true,
-                        keys: [
-                            'title',
-                            'permalink',
-                            'summary',
-                            'content'
-                        ]
-                    };
-                    if (params.fuseOpts) {
-                        options = {
-                            isCaseSensitive: params.fuseOpts.iscasesensitive ?? false,
-                            includeScore: params.fuseOpts.includescore ?? false,
-                            includeMatches: params.fuseOpts.includematches ?? false,
-                            minMatchCharLength: params.fuseOpts.minmatchcharlength ?? 1,
-                            shouldSort: params.fuseOpts.shouldsort ?? true,
-                            findAllMatches: params.fuseOpts.findallmatches ?? false,
-                            keys: params.fuseOpts.keys ?? ['title', 'permalink', 'summary', 'content'],
-                            location: params.fuseOpts.location ?? 0,
-                            threshold: params.fuseOpts.threshold ?? 0.4,
-                            distance: params.fuseOpts.distance ?? 100,
-                            ignoreLocation: params.fuseOpts.ignorelocation ?? true
-                        }
-                    }
-                    fuse = new Fuse(data, options); // build the index from the json file
+    getJSON('../search-index/manifest.json').then(function (manifest) {
+        return getJSON('../search-index/docs.json?v=' + manifest.version).then(function (docs) {
+            shardIndex = {manifest: manifest, docs: docs};
+        });
+    }).catch(function () {
+        loadFuseIndex();
+    });
+}
+
+function loadFuseIndex() {
+    getJSON('../index.json').then(function (data) {
+        if (data) {
+            // fuse.js options; check fuse.js website for details
+            let options = {
+                distance: 100,
+                threshold: 0.4,
+                ignoreLocation: true,
+                keys: [
+                    'title',
+                    'permalink',
+                    'summary',
+                    'content'
+                ]
+            };
+            if (params.fuseOpts) {
+                options = {
+                    isCaseSensitive: params.fuseOpts.iscasesensitive ?? false,
+                    includeScore: params.fuseOpts.includescore ?? false,
+                    includeMatches: params.fuseOpts.includematches ?? false,
+                    minMatchCharLength: params.fuseOpts.minmatchcharlength ?? 1,
+                    shouldSort: params.fuseOpts.shouldsort ?? true,
+                    findAllMatches: params.fuseOpts.findallmatches ?? false,
+                    keys: params.fuseOpts.keys ?? ['title', 'permalink', 'summary', 'content'],
+                    location: params.fuseOpts.location ?? 0,
+                    threshold: params.fuseOpts.threshold ?? 0.4,
+                    distance: params.fuseOpts.distance ?? 100,
+                    ignoreLocation: params.fuseOpts.ignorelocation ?? true
                 }
-            } else {
-                console.log(xhr.responseText);
             }
+            fuse = new Fuse(data, options); // build the index from the json file
+        }
+    }).catch(function (err) {
+        console.log(err);
+    });
+}
+
+// same tokenization as scripts/search_index.py: CJK bigrams, latin words
+function tokenize(text) {
+    let tokens = [];
+    let match;
+    text = text.toLowerCase();
+    TOKEN_RE.lastIndex = 0;
+    while ((match = TOKEN_RE.exec(text)) !== null) {
+        let seg = match[0];
+        if (match[1] && seg.length > 1) {
+            for (let i = 0; i < seg.length - 1; i++) tokens.push(seg.slice(i, i + 2));
+        } else {
+            tokens.push(seg);
         }
-    };
-    xhr.open('GET', "../index.json");
-    xhr.send();
+    }
+    return tokens;
+}
+
+// same shard assignment as scripts/search_shards.py
+function shardOf(token, shards) {
+    let key = CJK.test(token[0]) ? token[0] : token.slice(0, 2);
+    let h = 0;
+    for (let i = 0; i < key.length; i++) h = (Math.imul(h, 31) + key.charCodeAt(i)) >>> 0;
+    return h % shards;
+}
+
+function loadShard(n) {
+    if (!shardCache[n]) {
+        shardCache[n] = getJSON('../search-index/s' + n + '.json?v=' + shardIndex.manifest.version)
+            .catch(function (err) {
+                delete shardCache[n];
+                throw err;
+            });
+    }
+    return shardCache[n];
+}
+
+// postings are [docDelta, tf, docDelta, tf, ...]
+function decodePostings(encoded, into) {
+    let doc = 0;
+    for (let i = 0; i < encoded.length; i += 2) {
+        doc += encoded[i];
+        into.set(doc, (into.get(doc) || 0) + encoded[i + 1]);
+    }
+}
+
+// the word being typed and single CJK characters match as prefixes, other tokens exactly
+function shardSearch(query, limit) {
+    let tokens = Array.from(new Set(tokenize(query)));
+    let lastWord = tokens.length ? tokens[tokens.length - 1] : '';
+    tokens = tokens.filter(function (t) {
+        return t.length > 1 || CJK.test(t);
+    });
+    if (!tokens.length) return Promise.resolve([]);
+
+    let manifest = shardIndex.manifest;
+    let shards = Array.from(new Set(tokens.map(function (t) {
+        return shardOf(t, manifest.shards);
+    })));
+
+    return Promise.all(shards.map(loadShard)).then(function (loaded) {
+        let byNumber = {};
+        shards.forEach(function (n, i) { byNumber[n] = loaded[i]; });
+
+        let docs = shardIndex.docs;
+        let scores = new Map();
+        let hits = new Map();
+        tokens.forEach(function (token) {
+            let shard = byNumber[shardOf(token, manifest.shards)];
+            let prefix = token === lastWord || token.length === 1;
+            let matched = new Map();
+            if (prefix) {
+                for (let key in shard) {
+                    if (key.startsWith(token)) decodePostings(shard[key], matched);
+                }
+            } else if (shard[token]) {
+                decodePostings(shard[token], matched);
+            }
+
+            let idf = Math.log(1 + (docs.length - matched.size + 0.5) / (matched.size + 0.5));
+            matched.forEach(function (tf, doc) {
+                let norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * docs[doc][2] / manifest.avg_length);
+                scores.set(doc, (scores.get(doc) || 0) + idf * tf * (BM25_K1 + 1) / norm);
+                hits.set(doc, (hits.get(doc) || 0) + 1);
+            });
+        });
+
+        // prefer documents matching every token, fall back to any token
+        let ranked = Array.from(scores.keys());
+        let all = ranked.filter(function (doc) { return hits.get(doc) === tokens.length; });
+        if (all.length) ranked = all;
+        ranked.sort(function (a, b) { return scores.get(b) - scores.get(a); });
+        return ranked.slice(0, limit || ranked.length).map(function (doc) {
+            return {item: {title: docs[doc][0], permalink: docs[doc][1]}};
+        });
+    });
 }
 
 function activeToggle(ae) {
@@ -72,34 +186,46 @@ function reset() {
     sInput.focus(); // shift focus to input box
 }
 
+function renderResults(results) {
+    if (results.length !== 0) {
+        // build our html if result exists
+        let resultSet = ''; // our results bucket
+
+        for (let item in results) {
+            resultSet += `<li class="post-entry"><header class="entry-header">${results[item].item.title}&nbsp;»</header>` +
+                `<a href="${results[item].item.permalink}" aria-label="${results[item].item.title}"></a></li>`
+        }
+
+        resList.innerHTML = resultSet;
+        resultsAvailable = true;
+        first = resList.firstChild;
+        last = resList.lastChild;
+    } else {
+        resultsAvailable = false;
+        resList.innerHTML = '';
+    }
+}
+
 // execute search as each character is typed
 sInput.onkeyup = function (e) {
     // run a search query (for "term") every time a letter is typed
     // in the search box
-    if (fuse) {
+    let limit = params.fuseOpts ? params.fuseOpts.limit : undefined;
+    if (shardIndex) {
+        let seq = ++searchSeq;
+        shardSearch(this.value.trim(), limit).then(function (results) {
+            if (seq === searchSeq) renderResults(results);
+        }).catch(function (err) {
+            console.log(err);
+        });
+    } else if (fuse) {
         let results;
-        if (params.fuseOpts) {
-            results = fuse.search(this.value.trim(), {limit: params.fuseOpts.limit}); // the actual query being run using fuse.js along with options
+        if (limit) {
+            results = fuse.search(this.value.trim(), {limit: limit}); // the actual query being run using fuse.js along with options
         } else {
             results = fuse.search(this.value.trim()); // the actual query being run using fuse.js
         }
-        if (results.length !== 0) {
-            // build our html if result exists
-            let resultSet = ''; // our results bucket
-
-            for (let item in results) {
-                resultSet += `<li class="post-entry"><header class="entry-header">${results[item].item.title}&nbsp;»</header>` +
-                    `<a href="${results[item].item.permalink}" aria-label="${results[item].item.title}"></a></li>`
-            }
-
-            resList.innerHTML = resultSet;
-            resultsAvailable = true;
-            first = resList.firstChild;
-            last = resList.lastChild;
-        } else {
-            resultsAvailable = false;
-            resList.innerHTML = '';
-        }
+        renderResults(results);
     }
 }
 
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hugo 静态资源代理 - 管理后台的 /assets/、/css/ 请求经由这里转发到 Hugo
+复用到 Hugo 的 HTTP/1.1 持久连接，资源内容保存在按总字节数限制的 LRU 缓存中，
+过期后用 ETag/Last-Modified 条件请求重新验证，404 在短时间内直接返回
+Hugo 连续失败时由熔断器快速失败，有缓存时返回过期的缓存内容
+"""
+
+import time
+import queue
+import threading
+import http.client
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from compression import choose_encoding, compress, is_compressible
+from config import COMPRESS_MIN_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class AssetProxyError(Exception):
+    """Hugo 返回了 404 以外的错误状态"""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"Hugo server error: {status} {reason}")
+        self.status = status
+        self.reason = reason
+
+
+class CachedAsset:
+    """缓存的资源"""
+
+    __slots__ = ("body", "content_type", "etag", "last_modified", "checked_at", "variants")
+
+    def __init__(self, body: bytes, content_type: str, etag: Optional[str],
+                 last_modified: Optional[str]):
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = time.monotonic()
+        # 编码 -> 压缩后的字节，首次按该编码发送时生成
+        self.variants: Dict[str, bytes] = {}
+
+    def compressed(self, encoding: str) -> bytes:
+        body = self.variants.get(encoding)
+        if body is None:
+            body = self.variants[encoding] = compress(self.body, encoding)
+        return body
+
+
+class AssetProxy:
+    """带连接池和缓存的 Hugo 资源代理
+
+    port_lookup 返回 Hugo 当前端口；端口变化时连接池、缓存和熔断器一并重置。
+    缓存条目在 fresh_for 秒内直接返回，之后向 Hugo 发送条件请求重新验证。
+    连续 failure_threshold 次连接失败或5xx后熔断 cooldown 秒。
+    """
+
+    def __init__(self, port_lookup: Callable[[], int], max_bytes: int = 32 * 1024 * 1024,
+                 fresh_for: float = 5.0, negative_ttl: float = 5.0,
+                 pool_size: int = 4, timeout: float = 5.0, host: str = 'localhost',
+                 failure_threshold: int = 3, cooldown: float = 10.0):
+        self.port_lookup = port_lookup
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        self.negative_ttl = negative_ttl
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.host = host
+
+        self._lock = threading.Lock()
+        self._port: Optional[int] = None
+        self._pool: queue.LifoQueue = queue.LifoQueue()
+        self._assets: "OrderedDict[str, CachedAsset]" = OrderedDict()
+        self._not_found: Dict[str, float] = {}
+        self._bytes = 0
+        self.breaker = CircuitBreaker("hugo-assets", failure_threshold, cooldown)
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.upstream_requests = 0
+        self.stale_served = 0
+
+    def get(self, path: str) -> Optional[CachedAsset]:
+        """获取资源，Hugo 返回404时为None
+
+        Hugo 返回其他错误状态时抛出 AssetProxyError，无法连接时抛出 OSError，
+        熔断期间抛出 CircuitOpenError；这三种情况下如有缓存则返回过期的缓存内容。
+        """
+        self._check_port()
+        now = time.monotonic()
+
+        with self._lock:
+            expires = self._not_found.get(path)
+            if expires is not None:
+                if expires > now:
+                    self.hits += 1
+                    return None
+                del self._not_found[path]
+
+            cached = self._assets.get(path)
+            if cached:
+                self._assets.move_to_end(path)
+                if now - cached.checked_at < self.fresh_for:
+                    self.hits += 1
+                    return cached
+
+        if not self.breaker.allow():
+            if cached:
+                return self._serve_stale(cached)
+            raise CircuitOpenError("Hugo 服务器不可用，资源代理已熔断")
+
+        # 缓存未命中或需要重新验证
+        headers = {}
+        if cached:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        try:
+            status, reason, response_headers, body = self._request(path, headers)
+        except (http.client.HTTPException, OSError) as e:
+            self.breaker.record_failure(e)
+            if cached:
+                return self._serve_stale(cached)
+            raise
+        except BaseException:
+            # 其他异常（如路径无法编码）与上游状态无关，但必须释放探测名额，否则熔断器永远不会关闭
+            self.breaker.release()
+            raise
+
+        if status >= 500:
+            self.breaker.record_failure(AssetProxyError(status, reason))
+            if cached:
+                return self._serve_stale(cached)
+        else:
+            self.breaker.record_success()
+
+        with self._lock:
+            if status == 304 and cached:
+                cached.checked_at = time.monotonic()
+                self.revalidated += 1
+                return cached
+
+            self.misses += 1
+            if status == 404:
+                self._evict(path)
+                self._not_found[path] = time.monotonic() + self.negative_ttl
+                return None
+            if status != 200:
+                raise AssetProxyError(status, reason)
+
+            asset = CachedAsset(
+                body,
+                response_headers.get('Content-Type', 'application/octet-stream'),
+                response_headers.get('ETag'),
+                response_headers.get('Last-Modified')
+            )
+            self._store(path, asset)
+            return asset
+
+    def _serve_stale(self, cached: CachedAsset) -> CachedAsset:
+        with self._lock:
+            self.stale_served += 1
+        return cached
+
+    def _check_port(self):
+        port = self.port_lookup()
+        with self._lock:
+            if port == self._port:
+                return
+            self._port = port
+            self._assets.clear()
+            self._not_found.clear()
+            self._bytes = 0
+            old_pool, self._pool = self._pool, queue.LifoQueue()
+        self.breaker.reset()
+        self._close_pool(old_pool)
+
+    def _request(self, path: str, headers: Dict[str, str]):
+        """通过连接池发送 GET；复用的连接已被对端关闭时换新连接重试一次"""
+        with self._lock:
+            self.upstream_requests += 1
+        for attempt in range(2):
+            conn, reused = self._acquire()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                # 连接状态未知，不放回连接池
+                conn.close()
+                raise
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return response.status, response.reason, response.headers, body
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host, self._port, timeout=self.timeout), False
+
+    def _release(self, conn):
+        if self._pool.qsize() < self.pool_size:
+            self._pool.put(conn)
+        else:
+            conn.close()
+
+    @staticmethod
+    def _close_pool(pool: queue.LifoQueue):
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _store(self, path: str, asset: CachedAsset):
+        self._evict(path)
+        size = len(asset.body)
+        if size > self.max_bytes:
+            return
+        self._assets[path] = asset
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, oldest = self._assets.popitem(last=False)
+            self._bytes -= len(oldest.body)
+
+    def _evict(self, path: str):
+        old = self._assets.pop(path, None)
+        if old:
+            self._bytes -= len(old.body)
+
+    def clear(self):
+        with self._lock:
+            self._assets.clear()
+            self._not_found.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._assets),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "negative_entries": len(self._not_found),
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "upstream_requests": self.upstream_requests,
+                "stale_served": self.stale_served,
+                "pooled_connections": self._pool.qsize(),
+                "breaker": self.breaker.stats()
+            }
+
+
+def send_asset(handler, asset: CachedAsset, cache_control: Optional[str] = None):
+    """发送缓存的资源，文本类资源按 Accept-Encoding 压缩；浏览器带有匹配的 If-None-Match 时返回304"""
+    encoding = None
+    if len(asset.body) >= COMPRESS_MIN_SIZE and is_compressible(asset.content_type):
+        encoding = choose_encoding(handler.headers.get('Accept-Encoding'))
+    body = asset.compressed(encoding) if encoding else asset.body
+    etag = asset.etag
+    if etag and encoding:
+        # 不同编码的表示使用不同的 ETag
+        etag = f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f'{etag}-{encoding}'
+
+    if etag and handler.headers.get('If-None-Match') == etag:
+        handler.send_response(304)
+        handler.send_header('ETag', etag)
+        handler.send_header('Vary', 'Accept-Encoding')
+        handler.end_headers()
+        return
+
+    handler.send_response(200)
+    handler.send_header('Content-Type', asset.content_type)
+    handler.send_header('Content-Length', str(len(body)))
+    handler.send_header('Vary', 'Accept-Encoding')
+    if encoding:
+        handler.send_header('Content-Encoding', encoding)
+    if etag:
+        handler.send_header('ETag', etag)
+    if asset.last_modified:
+        handler.send_header('Last-Modified', asset.last_modified)
+    if cache_control:
+        handler.send_header('Cache-Control', cache_control)
+    handler.end_headers()
+    handler.wfile.write(body)
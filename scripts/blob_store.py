@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容寻址存储 - 文档正文按 SHA-256 保存为 blobs/<前两位>/<哈希>
+相同的正文只保存一份；内容未变时再次保存不会产生写入
+"""
+
+import os
+import time
+import hashlib
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """正文的SHA-256十六进制摘要"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class BlobStore:
+    """按内容哈希寻址的正文存储，所有方法都是线程安全的"""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.writes = 0
+        self.deduplicated = 0
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def put(self, text: str) -> str:
+        """保存正文，返回其哈希；已存在相同内容时跳过写入"""
+        digest = content_hash(text)
+        path = self._path(digest)
+        with self._lock:
+            # 复用已有正文时更新修改时间，使垃圾回收的宽限期同样保护它；与 gc 的删除互斥
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            else:
+                self.deduplicated += 1
+                return digest
+
+        path.parent.mkdir(exist_ok=True)
+        temp_path = path.with_name(f"{digest}.{threading.get_ident()}.tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(text.encode('utf-8'))
+        os.replace(temp_path, path)
+        with self._lock:
+            self.writes += 1
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """读取正文，不存在时返回None"""
+        try:
+            with open(self._path(digest), 'rb') as f:
+                return f.read().decode('utf-8')
+        except FileNotFoundError:
+            logger.warning(f"正文不存在: {digest}")
+            return None
+
+    def exists(self, digest: str) -> bool:
+        return self._path(digest).exists()
+
+    def __iter__(self) -> Iterator[Path]:
+        for shard in sorted(self.root.iterdir()):
+            if not shard.is_dir():
+                continue
+            for path in shard.iterdir():
+                if not path.name.endswith('.tmp'):
+                    yield path
+
+    def gc(self, referenced: Iterable[str], grace: float = 0.0) -> Dict:
+        """删除未被引用的正文
+
+        grace 秒内写入（或被复用）的正文即使未被引用也保留：保存文档时先写正文再写元数据，
+        两次写入之间正文暂时没有引用。返回值中的 next_expiry 为最早一个因宽限期保留的
+        未引用正文还需多少秒才能回收，没有这样的正文时为None。
+        """
+        referenced = set(referenced)
+        now = time.time()
+        cutoff = now - grace
+        kept = removed = freed = 0
+        oldest_deferred = None
+
+        for path in list(self):
+            if path.name in referenced:
+                kept += 1
+                continue
+            with self._lock:
+                try:
+                    stat = path.stat()
+                    if stat.st_mtime > cutoff:
+                        kept += 1
+                        if oldest_deferred is None or stat.st_mtime < oldest_deferred:
+                            oldest_deferred = stat.st_mtime
+                        continue
+                    path.unlink()
+                except OSError:
+                    continue
+            removed += 1
+            freed += stat.st_size
+
+        for shard in self.root.iterdir():
+            if shard.is_dir():
+                try:
+                    shard.rmdir()
+                except OSError:
+                    pass
+
+        logger.info(f"正文垃圾回收: 保留 {kept} 个，删除 {removed} 个，释放 {freed} 字节")
+        next_expiry = None if oldest_deferred is None else max(0.0, oldest_deferred - cutoff)
+        return {"kept": kept, "removed": removed, "freed_bytes": freed, "next_expiry": next_expiry}
+
+    def stats(self) -> Dict:
+        count = size = 0
+        for path in self:
+            try:
+                size += path.stat().st_size
+            except OSError:
+                continue
+            count += 1
+        return {
+            "blobs": count,
+            "bytes": size,
+            "writes": self.writes,
+            "deduplicated": self.deduplicated
+        }
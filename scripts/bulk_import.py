@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量导入来源 - 逐个读取目录、.zip 或 .tar.gz 中的文档条目
+条目以流的方式产生，不会把整个归档解压到磁盘或一次性读入内存
+"""
+
+import os
+import tarfile
+import zipfile
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+from config import BULK_IMPORT_SPOOL_SIZE, STREAM_CHUNK_SIZE
+
+# 支持导入的文档扩展名
+SUPPORTED_EXTENSIONS = ('.md', '.markdown', '.txt')
+
+# 单个条目的大小上限
+MAX_ENTRY_SIZE = 10 * 1024 * 1024
+
+# 归档格式
+ZIP = "zip"
+TAR = "tar"
+
+
+class EntryError(Exception):
+    """单个条目无法读取，记入失败列表后继续导入其他条目"""
+
+
+def is_supported(name: str) -> bool:
+    """是否为需要导入的文档（跳过隐藏文件和 macOS 归档残留）"""
+    base = name.replace('\\', '/').rsplit('/', 1)[-1]
+    if not base or base.startswith('.') or '__MACOSX/' in name:
+        return False
+    return base.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def detect_format(name: str) -> Optional[str]:
+    """根据文件名判断归档格式"""
+    lower = name.lower()
+    if lower.endswith('.zip'):
+        return ZIP
+    if lower.endswith(('.tar.gz', '.tgz', '.tar', '.tar.bz2', '.tar.xz')):
+        return TAR
+    return None
+
+
+def spool(fileobj: BinaryIO, length: Optional[int] = None) -> BinaryIO:
+    """按固定大小的块把流复制到临时文件（较小时留在内存中），返回已定位到开头的可定位文件
+
+    length 为 None 时读到流结束；提前结束时抛出 EOFError。
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=BULK_IMPORT_SPOOL_SIZE)
+    try:
+        remaining = length
+        while remaining is None or remaining > 0:
+            chunk = fileobj.read(STREAM_CHUNK_SIZE if remaining is None else min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                if remaining:
+                    raise EOFError(f"请求体不完整，还差 {remaining} 字节")
+                break
+            spooled.write(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+
+def count_entries(source: Union[str, Path, BinaryIO], archive_format: Optional[str] = None) -> Optional[int]:
+    """预先统计条目数，用于进度报告；tar 和不可定位的流无法预知时返回None
+
+    source 为已打开的 zip 文件对象时只读取中央目录，读取后定位回开头。
+    """
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        if path.is_dir():
+            return sum(1 for _ in _walk(path))
+        if (archive_format or detect_format(path.name)) == ZIP:
+            with zipfile.ZipFile(path) as archive:
+                return _count_zip(archive)
+        return None
+
+    if archive_format == ZIP and source.seekable():
+        try:
+            with zipfile.ZipFile(source) as archive:
+                return _count_zip(archive)
+        except zipfile.BadZipFile:
+            return None
+        finally:
+            source.seek(0)
+    return None
+
+
+def _count_zip(archive: zipfile.ZipFile) -> int:
+    return sum(1 for info in archive.infolist() if not info.is_dir() and is_supported(info.filename))
+
+
+def iter_entries(source: Union[str, Path, BinaryIO],
+                 archive_format: Optional[str] = None) -> Iterator[Tuple[str, Union[bytes, EntryError]]]:
+    """逐个产生 (条目名, 原始字节)；读取失败的条目产生 (条目名, EntryError)
+
+    source 可以是目录、归档文件路径，或已打开的归档文件对象（需指定 archive_format）。
+    """
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        if path.is_dir():
+            yield from _iter_directory(path)
+            return
+        if not path.exists():
+            raise FileNotFoundError(f"导入来源不存在: {path}")
+        archive_format = archive_format or detect_format(path.name)
+        if archive_format is None:
+            raise ValueError(f"不支持的导入来源: {path.name}（支持目录、.zip、.tar.gz）")
+        with open(path, 'rb') as f:
+            yield from iter_entries(f, archive_format)
+        return
+
+    if archive_format == ZIP:
+        yield from _iter_zip(source)
+    elif archive_format == TAR:
+        yield from _iter_tar(source)
+    else:
+        raise ValueError(f"不支持的归档格式: {archive_format}")
+
+
+def _walk(directory: Path) -> Iterator[Path]:
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            if is_supported(name):
+                yield Path(root) / name
+
+
+def _iter_directory(directory: Path):
+    for path in _walk(directory):
+        name = str(path.relative_to(directory))
+        try:
+            if path.stat().st_size > MAX_ENTRY_SIZE:
+                yield name, EntryError(f"文件过大（超过 {MAX_ENTRY_SIZE // 1024 // 1024}MB）")
+                continue
+            yield name, path.read_bytes()
+        except OSError as e:
+            yield name, EntryError(str(e))
+
+
+def _iter_zip(fileobj: BinaryIO):
+    # zip 需要随机访问，不可定位的流先分块写入临时文件
+    if not fileobj.seekable():
+        with spool(fileobj) as spooled:
+            yield from _iter_zip(spooled)
+        return
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not is_supported(info.filename):
+                continue
+            if info.file_size > MAX_ENTRY_SIZE:
+                yield info.filename, EntryError(f"文件过大（超过 {MAX_ENTRY_SIZE // 1024 // 1024}MB）")
+                continue
+            try:
+                with archive.open(info) as f:
+                    yield info.filename, f.read(MAX_ENTRY_SIZE + 1)
+            except (zipfile.BadZipFile, OSError, RuntimeError) as e:
+                yield info.filename, EntryError(str(e))
+
+
+def _iter_tar(fileobj: BinaryIO):
+    # 流模式顺序读取，不需要定位
+    with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+        for member in archive:
+            if not member.isfile() or not is_supported(member.name):
+                continue
+            if member.size > MAX_ENTRY_SIZE:
+                yield member.name, EntryError(f"文件过大（超过 {MAX_ENTRY_SIZE // 1024 // 1024}MB）")
+                continue
+            try:
+                f = archive.extractfile(member)
+                yield member.name, f.read() if f else EntryError("无法读取条目")
+            except (tarfile.TarError, OSError) as e:
+                yield member.name, EntryError(str(e))
+
+
+def decode_entry(raw: bytes) -> str:
+    """解码条目内容，兼容带BOM的UTF-8"""
+    try:
+        return raw.decode('utf-8-sig')
+    except UnicodeDecodeError as e:
+        raise EntryError(f"不是有效的UTF-8文本: {e}")
@@ -2,7 +2,8 @@
 # -*- coding: utf-8 -*-
 """
 Hugo-Self 服务架构完整性检查与自动修复脚本
-检查API中间站(8081)、主站(8000)、admin(8080)之间的交互完整性
+检查API中间站、主站、admin之间的交互完整性
+服务端口从启动器写入的端口注册表读取，未登记时使用默认端口(8081/8000/8080)
 并提供自动修复功能
 """
 
@@ -15,6 +16,20 @@ import threading
 from pathlib import Path
 import sys
 
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+import port_registry
+from config import DEFAULT_HUGO_PORT, DEFAULT_ADMIN_PORT, DEFAULT_API_PORT
+
+def get_service_ports():
+    """从端口注册表获取各服务端口"""
+    return {
+        'hugo': port_registry.lookup('hugo', DEFAULT_HUGO_PORT),
+        'admin': port_registry.lookup('admin', DEFAULT_ADMIN_PORT),
+        'api': port_registry.lookup('api', DEFAULT_API_PORT)
+    }
+
 def check_port_status(host='localhost', port=None):
     """检查端口是否可访问"""
     if port is None:
@@ -137,11 +152,21 @@ def check_cross_service_integration():
     print("=" * 60)
     
     # 定义服务配置
+    ports = get_service_ports()
+    registered = port_registry.services()
     services = {
-        'hugo_blog': {'name': 'Hugo博客主站', 'port': 8000, 'url': 'http://localhost:8000'},
-        'admin_backend': {'name': '管理后台', 'port': 8080, 'url': 'http://localhost:8080'},
-        'api_server': {'name': 'API服务器', 'port': 8081, 'url': 'http://localhost:8081'}
+        'hugo_blog': {'name': 'Hugo博客主站', 'port': ports['hugo']},
+        'admin_backend': {'name': '管理后台', 'port': ports['admin']},
+        'api_server': {'name': 'API服务器', 'port': ports['api']}
     }
+    for config in services.values():
+        config['url'] = f"http://localhost:{config['port']}"
+    
+    if registered:
+        registered_ports = ', '.join(f"{name}={entry['port']}" for name, entry in registered.items())
+        print(f"📒 已从端口注册表读取: {registered_ports}")
+    else:
+        print("📒 端口注册表为空，使用默认端口")
     
     # 1. 端口可用性检查
     print("\n📡 1. 端口可用性检查")
@@ -223,7 +248,7 @@ def check_cross_service_integration():
         print("✅ 所有核心服务正常运行")
         print("✅ Hugo博客主站 ←→ 管理后台：静态资源代理正常")
         print("✅ 管理后台 ←→ API服务器：文档管理API可用")
-        print("✅ 完整的服务链路：用户 → 管理后台(8080) → API服务器(8081) → Hugo主站(8000)")
+        print(f"✅ 完整的服务链路：用户 → 管理后台({ports['admin']}) → API服务器({ports['api']}) → Hugo主站({ports['hugo']})")
     else:
         missing_services = [
             services[key]['name'] for key, status in service_status.items() 
@@ -242,7 +267,7 @@ def check_cross_service_integration():
         print("⚠️  系统状态：异常")
         print("🔧 建议：请启动所有必需的服务")
         print("   - Hugo博客主站：python scripts/start_separated.py")
-        print("   - 或单独启动：hugo server --port 8000")
+        print(f"   - 或单独启动：hugo server --port {ports['hugo']}")
     
     return all_services_up
 
@@ -251,18 +276,18 @@ def auto_fix_services():
     print("\n🪟 开始自动修复...")
     print("-" * 30)
     
-    # 获取脚本目录
-    script_dir = Path(__file__).parent
+    # 获取项目目录
     project_root = script_dir.parent
+    ports = get_service_ports()
     
     fixed_services = []
     
     # 检查并启动Hugo服务
-    if not check_port_status(port=8000):
+    if not check_port_status(port=ports['hugo']):
         print("🚀 尝试启动Hugo服务...")
         try:
             process = subprocess.Popen(
-                ["hugo", "server", "-D", "--port", "8000", "--bind", "0.0.0.0"],
+                ["hugo", "server", "-D", "--port", str(ports['hugo']), "--bind", "0.0.0.0"],
                 cwd=project_root,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
@@ -272,8 +297,9 @@ def auto_fix_services():
             
             time.sleep(3)
             
-            if process.poll() is None and check_port_status(port=8000):
+            if process.poll() is None and check_port_status(port=ports['hugo']):
                 print("✅ Hugo服务启动成功")
+                port_registry.register('hugo', ports['hugo'], process.pid)
                 fixed_services.append('Hugo')
             else:
                 print("❌ Hugo服务启动失败")
@@ -282,14 +308,13 @@ def auto_fix_services():
             print(f"❌ 启动Hugo时异常: {e}")
     
     # 检查并启动API服务
-    if not check_port_status(port=8081):
+    if not check_port_status(port=ports['api']):
         print("🚀 尝试启动API服务...")
         try:
-            sys.path.insert(0, str(script_dir))
             from document_manager import DocumentManager, WebAPI
             
             dm = DocumentManager(str(project_root))
-            api = WebAPI(dm, port=8081)
+            api = WebAPI(dm, port=ports['api'])
             
             def run_api():
                 try:
@@ -302,7 +327,7 @@ def auto_fix_services():
             
             time.sleep(3)
             
-            if check_port_status(port=8081):
+            if check_port_status(port=ports['api']):
                 print("✅ API服务启动成功")
                 fixed_services.append('API')
             else:
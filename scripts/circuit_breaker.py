@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+熔断器 - 上游连续失败后在冷却期内直接拒绝调用，冷却期结束后放行一次探测
+"""
+
+import time
+import threading
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 熔断器状态
+CLOSED = "closed"        # 正常放行
+OPEN = "open"            # 熔断中，直接拒绝
+HALF_OPEN = "half_open"  # 冷却结束，正在探测
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，调用被拒绝"""
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器
+
+    连续失败 failure_threshold 次后打开，cooldown 秒内 allow() 返回False；
+    冷却结束后只放行一次探测调用，成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 10.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+        self.rejected = 0
+        self.trips = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            return HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """是否放行本次调用"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"熔断器 {self.name} 已恢复")
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if error is not None:
+                self.last_error = str(error)
+            if self._state != CLOSED or self._failures >= self.failure_threshold:
+                if self._state == CLOSED:
+                    self.trips += 1
+                    logger.warning(f"熔断器 {self.name} 已打开: 连续失败 {self._failures} 次")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """放弃本次调用（请求未到达上游，例如本地参数错误）：不计成功或失败，只释放探测名额"""
+        with self._lock:
+            self._probing = False
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == OPEN:
+                retry_in = round(self.cooldown - (time.monotonic() - self._opened_at), 2)
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown": self.cooldown,
+                "retry_in": retry_in,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "last_error": self.last_error
+            }
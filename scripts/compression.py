@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 响应压缩 - 按请求的 Accept-Encoding 协商 gzip，安装了 brotli 模块时优先使用 br
+小于阈值的响应体不压缩
+"""
+
+import gzip
+import zlib
+from typing import Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from config import COMPRESS_MIN_SIZE
+
+# 服务器支持的编码，按优先顺序排列
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+# 值得压缩的内容类型
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript",
+                      "application/xml", "image/svg+xml")
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """根据 Accept-Encoding 选择编码，客户端不接受任何支持的编码时返回None"""
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    raise ValueError(f"不支持的编码: {encoding}")
+
+
+class StreamCompressor:
+    """增量压缩器，用于分块发送的流式响应"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor()
+        elif encoding == "gzip":
+            # wbits=31 生成带 gzip 头的流
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        else:
+            raise ValueError(f"不支持的编码: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def negotiate(accept_encoding: Optional[str], body: bytes,
+              min_size: int = COMPRESS_MIN_SIZE) -> Tuple[bytes, Optional[str]]:
+    """按需压缩响应体，返回 (响应体, Content-Encoding)"""
+    if len(body) < min_size:
+        return body, None
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return body, None
+    return compress(body, encoding), encoding
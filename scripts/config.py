@@ -12,6 +12,67 @@ ADMIN_PASSWORD = "CHENpengfei186"  # 注意：实际应用中应使用环境变
 DEFAULT_HUGO_PORT = 8000
 DEFAULT_ADMIN_PORT = 8080
 DEFAULT_API_PORT = 8081
+PORT_REGISTRY_FILE = ".ports.lock"  # 项目根目录下记录各服务实际端口和PID的注册表
+
+# API服务器并发配置
+API_MAX_WORKERS = 8   # 工作线程数
+API_MAX_QUEUE = 32    # 线程全忙时最多排队的请求数，超过后返回503
+ADMIN_MAX_WORKERS = 8  # 管理后台服务器工作线程数，并发的资源代理请求可同时使用多个到Hugo的连接
+ADMIN_MAX_QUEUE = 32
+
+# 后台任务线程池配置（每种操作类型的工作线程数）
+JOB_POOL_SIZES = {
+    "import": 2,
+    "process": 2,
+    "publish": 1
+}
+JOB_MAX_QUEUE = 16  # 每种操作最多排队的任务数，超过后返回503
+
+# 网站重建配置
+REBUILD_QUIET_WINDOW = 2.0  # 秒；静默期内的多次重建请求合并为一次构建
+
+# Hugo 输出日志配置
+HUGO_LOG_LINES = 1000   # 内存中保留的最近输出行数
+HUGO_LOG_FILE = None    # 滚动日志文件（相对项目根目录），例如 "logs/hugo.log"；None 表示不写文件
+
+# 管理后台资源代理配置
+ASSET_CACHE_MAX_BYTES = 32 * 1024 * 1024  # 缓存的资源总字节数上限
+ASSET_CACHE_FRESH = 5.0      # 秒；缓存的资源在此时间内不向Hugo重新验证
+ASSET_NEGATIVE_TTL = 5.0     # 秒；Hugo 返回404的路径在此时间内直接返回404
+ASSET_POOL_SIZE = 4          # 到Hugo的持久连接数
+ASSET_BREAKER_FAILURES = 3   # 连续失败多少次后熔断，熔断期间不再连接Hugo
+ASSET_BREAKER_COOLDOWN = 10.0  # 秒；熔断后等待多久再探测Hugo
+
+# 响应压缩配置
+COMPRESS_MIN_SIZE = 1024  # 字节；小于此大小的响应不压缩
+STREAM_CHUNK_SIZE = 16 * 1024  # 字节；流式JSON响应每个分块的大小
+
+# 条件请求配置
+ETAG_REFRESH_INTERVAL = 2.0  # 秒；计算ETag时最多每隔此时间扫描一次外部修改，本进程的写入立即生效
+
+# 批量导入配置
+BULK_IMPORT_WORKERS = 4       # 解析文档（标题、字数）的工作线程数
+BULK_IMPORT_BATCH_SIZE = 100  # 每批写入的文档数
+BULK_IMPORT_MAX_UPLOAD = 512 * 1024 * 1024  # 字节；上传归档的大小上限，超过时返回413
+BULK_IMPORT_SPOOL_SIZE = 8 * 1024 * 1024    # 字节；上传的归档超过此大小时暂存到磁盘临时文件
+BULK_IMPORT_ROOT = "imports"  # 相对项目根目录；HTTP 接口按路径导入时只允许此目录下的目录或归档
+
+# 全文检索配置
+SEARCH_INDEX_FILE = "search_index.json"  # admin/ 下的持久化检索索引
+SEARCH_SAVE_DELAY = 5.0       # 秒；合并此时间内的索引修改后再写入磁盘
+SEARCH_DEFAULT_LIMIT = 20     # 默认返回的结果数
+SEARCH_SNIPPET_LENGTH = 120   # 摘要长度（字符）
+SEARCH_SHARD_DIR = "search-index"  # public/ 下的公开站点分片索引目录
+SEARCH_SHARD_TOKENS = 2000    # 每个分片的目标词数，分片数随词表大小增长
+
+# 文档分析配置
+ANALYZER_CACHE_SIZE = 256       # 按内容哈希缓存的分析结果数量
+READING_WORDS_PER_MINUTE = 300  # 估算阅读时间的每分钟字数
+EXCERPT_LENGTH = 100            # 文档摘要（列表预览）的最大字符数
+FRONT_MATTER_CACHE_SIZE = 1024  # 按 (路径, 修改时间) 缓存的文件头部解析结果数量
+
+# 服务启动配置
+STARTUP_TIMEOUT = 30.0  # 秒；等待各服务就绪的最长时间
 
 # 路径配置
 CONTENT_DIR = "content"
@@ -22,4 +83,10 @@ IMAGES_DIR = "images"
 # 文件配置
 DEFAULT_AUTHOR = "Hugo-Self"
 DEFAULT_CATEGORIES = ["未分类"]
-DEFAULT_TAGS = ["默认"]
\ No newline at end of file
+DEFAULT_TAGS = ["默认"]
+
+# 文档存储配置
+DOCUMENT_STORE = "file"  # "file": admin/ 下的 JSON+MD 文件; "sqlite": admin/documents.db
+BLOB_DIR = "blobs"       # admin/ 下按SHA-256寻址的正文存储目录（文件后端）
+BLOB_GC_GRACE = 3600.0   # 秒；垃圾回收不删除比此更新的正文，避免与正在进行的写入竞争
+BLOB_GC_DELAY = 300.0    # 秒；有正文失去引用后延迟此时间自动回收一次，期间的多次写入合并；None 表示只手动回收
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档元数据索引 - 常驻内存，避免每次列出文档都重新解析所有JSON文件
+"""
+
+import os
+import json
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentIndex:
+    """文档元数据索引
+
+    以 (目录位置, 文档ID) 为键缓存JSON元数据文件的内容，并记录文件的
+    mtime/size。写入路径通过 update/remove 保持索引最新，refresh 只对
+    目录做一次 stat 扫描，仅重新解析被外部修改过的文件。所有方法都是线程安全的。
+    """
+
+    def __init__(self, directories: Dict[str, Path]):
+        # 位置名称 -> 目录，例如 {"pending": admin/pending, "processed": admin/processed}
+        self.directories = {name: Path(path) for name, path in directories.items()}
+        self._entries: Dict[Tuple[str, str], Dict] = {}
+        # 存在但无法解析的元数据文件，不在 _entries 中
+        self._unreadable: Dict[Tuple[str, str], Path] = {}
+        self._lock = threading.RLock()
+
+    def load(self):
+        """全量加载所有目录中的文档元数据"""
+        with self._lock:
+            self._entries.clear()
+            self._unreadable.clear()
+            self.refresh()
+        logger.info(f"文档索引已加载: {len(self._entries)} 个文档")
+
+    def refresh(self) -> int:
+        """检查文件的mtime/size，重新加载被外部修改的文档，返回变更数量"""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        changed = 0
+        seen = set()
+
+        for location, directory in self.directories.items():
+            if not directory.exists():
+                continue
+
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if not entry.name.endswith('.json') or not entry.is_file():
+                        continue
+
+                    key = (location, entry.name[:-len('.json')])
+                    seen.add(key)
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+
+                    cached = self._entries.get(key)
+                    if cached and cached["mtime"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                        continue
+
+                    document = self._read(Path(entry.path))
+                    if document is None:
+                        self._entries.pop(key, None)
+                        self._unreadable[key] = Path(entry.path)
+                        continue
+                    self._unreadable.pop(key, None)
+
+                    self._entries[key] = {
+                        "document": document,
+                        "mtime": stat.st_mtime_ns,
+                        "size": stat.st_size
+                    }
+                    changed += 1
+
+        # 移除已被外部删除的文档
+        for key in list(self._entries):
+            if key not in seen:
+                del self._entries[key]
+                changed += 1
+        for key in list(self._unreadable):
+            if key not in seen:
+                del self._unreadable[key]
+
+        return changed
+
+    def unreadable(self) -> List[Path]:
+        """上次刷新时无法解析的元数据文件"""
+        with self._lock:
+            return list(self._unreadable.values())
+
+    def update(self, location: str, doc_id: str, document: Dict):
+        """写入路径调用：记录最新的文档元数据"""
+        json_file = self.directories[location] / f"{doc_id}.json"
+        try:
+            stat = json_file.stat()
+        except OSError:
+            self.remove(location, doc_id)
+            return
+
+        with self._lock:
+            self._entries[(location, doc_id)] = {
+                "document": dict(document),
+                "mtime": stat.st_mtime_ns,
+                "size": stat.st_size
+            }
+
+    def remove(self, location: str, doc_id: str):
+        """写入路径调用：移除文档"""
+        with self._lock:
+            self._entries.pop((location, doc_id), None)
+
+    def get(self, location: str, doc_id: str) -> Optional[Dict]:
+        """获取单个文档元数据的副本"""
+        with self._lock:
+            entry = self._entries.get((location, doc_id))
+        return dict(entry["document"]) if entry else None
+
+    def documents(self, location: str) -> List[Dict]:
+        """获取指定位置所有文档元数据的副本"""
+        with self._lock:
+            return [
+                dict(entry["document"])
+                for (entry_location, _), entry in self._entries.items()
+                if entry_location == location
+            ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @staticmethod
+    def _read(json_file: Path) -> Optional[Dict]:
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"加载文件失败 {json_file}: {e}")
+            return None
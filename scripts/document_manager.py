@@ -15,13 +15,61 @@ from pathlib import Path
 import argparse
 import hashlib
 import base64
-from typing import Dict, List, Optional, Union
+import functools
+import itertools
+import threading
+from contextlib import contextmanager
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
 import logging
 
+from document_store import create_document_store, migrate_to_sqlite, DocumentLoadError
+from rebuild_scheduler import RebuildScheduler
+from job_queue import JobManager, JobQueueFull
+from log_pump import get_pump
+from compression import negotiate, choose_encoding, StreamCompressor
+from config import (STREAM_CHUNK_SIZE, ETAG_REFRESH_INTERVAL, BULK_IMPORT_WORKERS, BULK_IMPORT_BATCH_SIZE, BULK_IMPORT_MAX_UPLOAD,
+                    BULK_IMPORT_ROOT, BLOB_GC_GRACE,
+                    SEARCH_INDEX_FILE, SEARCH_SAVE_DELAY, SEARCH_DEFAULT_LIMIT, SEARCH_SNIPPET_LENGTH)
+from search_index import SearchIndex, highlight
+from search_shards import build_shards
+from markdown_analyzer import analyze_cached
+from blob_store import content_hash
+import front_matter
+from bulk_import import iter_entries, count_entries, decode_entry, spool, EntryError
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 文档列表默认只返回的元数据字段，正文只能通过 GET /api/documents/{id} 获取，列表预览使用 excerpt
+LIST_FIELDS = ("id", "title", "status", "created_at", "updated_at",
+               "processed_at", "published_at", "word_count", "size", "excerpt")
+BODY_FIELDS = ("content", "processed_content")
+
+# 未指定 limit 时的单页文档数量，以及单页文档数量上限
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# 判断处理结果是否变化时忽略的时间戳字段
+TIMESTAMP_FIELDS = ("updated_at", "processed_at")
+
+# 文档锁的分段数：文档ID按哈希映射到固定数量的锁，锁的数量不随文档ID增长
+DOCUMENT_LOCK_STRIPES = 64
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """文件内容相同时跳过写入，避免触发 Hugo 文件监控；返回是否写入"""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
 def generate_doc_id() -> str:
     """生成文档ID"""
     import uuid
@@ -43,8 +91,17 @@ def batch_load_json_files(directory: Path) -> List[Dict]:
     
     return documents
 
+def with_document_lock(method):
+    """同一文档的读-改-写操作串行执行，不同文档之间可以并发"""
+    @functools.wraps(method)
+    def wrapper(self, doc_id, *args, **kwargs):
+        with self._document_lock(doc_id):
+            return method(self, doc_id, *args, **kwargs)
+    return wrapper
+
 class DocumentManager:
-    def __init__(self, project_root: Union[str, Path] = "."):
+    def __init__(self, project_root: Union[str, Path] = ".", store=None,
+                 rebuild_quiet_window: float = 2.0):
         self.project_root = Path(project_root)
         self.admin_dir = self.project_root / "admin"
         self.content_dir = self.project_root / "content"
@@ -72,6 +129,41 @@ class DocumentManager:
         (self.static_dir / "images" / "gallery" / "misc").mkdir(exist_ok=True)
         (self.static_dir / "images" / "temp").mkdir(exist_ok=True)
 
+        # 文档存储后端，默认使用 admin/pending 与 admin/processed 下的文件
+        if store is None or isinstance(store, str):
+            store = create_document_store(store or "file", self.admin_dir)
+        self.store = store
+
+        # 文档级锁，保证并发请求下的读-改-写不会互相覆盖；哈希到同一分段的不同文档也会串行
+        self._doc_locks = [threading.RLock() for _ in range(DOCUMENT_LOCK_STRIPES)]
+
+        # 网站重建调度器：合并静默期内的多次重建请求，同一时间只运行一次构建
+        self.rebuild_scheduler = RebuildScheduler(self._build_site, rebuild_quiet_window)
+
+        # 条件请求：列表ETag包含进程标识，避免重启后版本号重复导致误判未修改
+        self._etag_epoch = f"{time.time_ns():x}"
+        # 只保存当前集合版本下计算过的文档ETag，版本变化时清空
+        self._document_etags: Dict[str, str] = {}
+        self._etag_version = None
+        self._etag_lock = threading.Lock()
+        self._last_refresh = float("-inf")
+
+        # 全文检索索引：首次搜索时从磁盘加载并与文档集合对齐，之后由写入路径增量更新
+        self.search_index = SearchIndex(self.admin_dir / SEARCH_INDEX_FILE, SEARCH_SAVE_DELAY)
+        self._search_guard = threading.Lock()
+        self._search_loaded = False
+        self._search_version = None
+
+        # 内容未变化而跳过的写入次数，按操作类型统计；工作线程、任务线程都会更新
+        self.skipped_writes = Counter()
+        self._stats_lock = threading.Lock()
+
+    @contextmanager
+    def _document_lock(self, doc_id: str):
+        """获取指定文档的锁"""
+        with self._doc_locks[hash(doc_id) % DOCUMENT_LOCK_STRIPES]:
+            yield
+
     def upload_image(self, image_data: bytes, filename: str, category: str = "gallery",
                     subcategory: str = "misc", tags: List[str] = None, description: str = "") -> Dict:
         """上传图片到指定分类"""
@@ -141,117 +233,226 @@ class DocumentManager:
         if not content.strip():
             raise ValueError(f"文件内容为空: {file_path_obj}")
         
+        return self.import_content(content, file_path_obj.name, source)
+
+    def import_content(self, content: str, filename: str, source: str = "manual") -> Dict:
+        """直接从内存中的内容导入文档到待处理池，不经过临时文件"""
+        document = self._build_document(content, filename, source)
+        
+        # 保存文档
+        self.store.save("pending", document["id"], document, content)
+        self._index_document("pending", document, content)
+        
+        logger.info(f"文档已导入: {document['id']}")
+        return document
+
+    def _build_document(self, content: str, filename: str, source: str) -> Dict:
+        """解析内容（标题、字数）并生成待处理文档的元数据"""
+        if not content.strip():
+            raise ValueError(f"文档内容为空: {filename}")
+        
         # 生成文档ID
         doc_id = generate_doc_id()
         
         # 创建文档元数据
+        analysis = analyze_cached(content)
         document = {
             "id": doc_id,
-            "filename": file_path_obj.name,
-            "title": self._extract_title(content) or file_path_obj.stem,
+            "filename": filename,
+            "title": analysis.title or Path(filename).stem,
             "content": content,
             "status": "pending",
             "source": source,
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat(),
             "size": len(content.encode('utf-8')),
-            "word_count": self._count_words(content),
+            "content_hash": content_hash(content),
             "images": [],
-            "front_matter": {}
+            "front_matter": dict(analysis.front_matter)
         }
-        
-        # 保存文档
-        pending_file = self.admin_dir / "pending" / f"{doc_id}.json"
-        content_file = self.admin_dir / "pending" / f"{doc_id}.md"
-        
-        with open(pending_file, 'w', encoding='utf-8') as f:
-            json.dump(document, f, ensure_ascii=False, indent=2)
-        
-        with open(content_file, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        logger.info(f"文档已导入: {doc_id}")
+        self._apply_analysis(document, analysis)
         return document
 
+    def import_bulk(self, source, source_label: str = "bulk", archive_format: Optional[str] = None,
+                    workers: int = BULK_IMPORT_WORKERS, batch_size: int = BULK_IMPORT_BATCH_SIZE,
+                    progress=None) -> Dict:
+        """批量导入目录、.zip 或 .tar.gz 中的文档
+
+        条目按顺序流式读取，由工作线程池解析标题和字数，每 batch_size 个文档批量写入一次。
+        单个文件失败不会中断导入，返回的报告中列出每个失败的文件和原因。
+        progress(fraction, message) 用于报告进度；tar 流无法预知总数，fraction 为None。
+        """
+        started = time.time()
+        total = count_entries(source, archive_format)
+        report = {
+            "source": str(source) if isinstance(source, (str, Path)) else "upload",
+            "total": 0,
+            "imported": 0,
+            "failed": 0,
+            "failures": [],
+            "documents": []
+        }
+        batch = []
+
+        def analyze(name, raw):
+            if isinstance(raw, EntryError):
+                raise raw
+            content = decode_entry(raw)
+            return self._build_document(content, Path(name).name, source_label), content
+
+        def flush():
+            self.store.save_many("pending", [(doc["id"], doc, content) for doc, content in batch])
+            for doc, content in batch:
+                self._index_document("pending", doc, content)
+            report["documents"].extend(doc["id"] for doc, _ in batch)
+            batch.clear()
+
+        def collect(name, future):
+            try:
+                document, content = future.result()
+            except Exception as e:
+                report["failed"] += 1
+                report["failures"].append({"file": name, "error": str(e)})
+            else:
+                report["imported"] += 1
+                batch.append((document, content))
+                if len(batch) >= batch_size:
+                    flush()
+
+            if progress:
+                done = report["imported"] + report["failed"]
+                if total:
+                    progress(min(1.0, done / total), f"已处理 {done}/{total} 个文件")
+                else:
+                    progress(None, f"已处理 {done} 个文件")
+
+        workers = max(1, workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-import") as pool:
+            in_flight = deque()
+            for name, raw in iter_entries(source, archive_format):
+                report["total"] += 1
+                in_flight.append((name, pool.submit(analyze, name, raw)))
+                # 限制在途条目数，流式读取时内存占用保持有界
+                if len(in_flight) >= workers * 4:
+                    collect(*in_flight.popleft())
+            while in_flight:
+                collect(*in_flight.popleft())
+        flush()
+
+        report["elapsed"] = round(time.time() - started, 3)
+        logger.info(f"批量导入完成: 成功 {report['imported']} 个，失败 {report['failed']} 个，"
+                    f"耗时 {report['elapsed']}s")
+        return report
+
+    def resolve_import_path(self, path: Union[str, Path]) -> Path:
+        """把 HTTP 请求中的导入路径解析到导入根目录下，越出根目录时抛出PermissionError
+
+        相对路径相对于导入根目录；符号链接解析后再检查。
+        """
+        root = (self.project_root / BULK_IMPORT_ROOT).resolve()
+        resolved = (root / path).resolve()
+        if not resolved.is_relative_to(root):
+            raise PermissionError(f"只能导入 {BULK_IMPORT_ROOT}/ 目录下的文件: {path}")
+        return resolved
+
+    @with_document_lock
     def process_document(self, doc_id: str, metadata: Dict) -> Dict:
-        """处理文档，添加Front Matter和格式化"""
-        pending_file = self.admin_dir / "pending" / f"{doc_id}.json"
-        content_file = self.admin_dir / "pending" / f"{doc_id}.md"
-        
-        if not pending_file.exists():
-            raise FileNotFoundError(f"文档不存在: {doc_id}")
-        
+        """处理文档，添加Front Matter和格式化
+
+        没有待处理副本时重新处理已处理的文档（源文本为其 content 字段），
+        处理结果与已处理版本相同时不写入。
+        """
         # 加载文档
-        with open(pending_file, 'r', encoding='utf-8') as f:
-            document = json.load(f)
-        
-        with open(content_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        loaded = self.store.load("pending", doc_id)
+        existing = self.store.load("processed", doc_id)
+        from_pending = loaded is not None
+        if from_pending:
+            document, content = loaded
+        elif existing is not None:
+            document = dict(existing[0])
+            content = document.get("content") or existing[1]
+        else:
+            raise FileNotFoundError(f"文档不存在: {doc_id}")
         
-        # 更新元数据
+        # 更新元数据；重新处理时沿用已处理版本的发布日期，使相同输入得到相同输出
         document.update(metadata)
         document["status"] = "processed"
-        document["processed_at"] = datetime.now().isoformat()
-        document["updated_at"] = datetime.now().isoformat()
+        if not document.get("date"):
+            document["date"] = (existing and existing[0].get("date")) or datetime.now().isoformat()
         
         # 生成Front Matter
-        front_matter = self._generate_front_matter(document)
+        header = self._generate_front_matter(document)
         
         # 处理内容
         processed_content = self._process_content(content, document)
         
         # 组合最终内容
-        final_content = front_matter + "\n\n" + processed_content
+        final_content = header + "\n\n" + processed_content
         document["processed_content"] = final_content
+        document["content_hash"] = content_hash(final_content)
         
-        # 保存到已处理目录
-        processed_file = self.admin_dir / "processed" / f"{doc_id}.json"
-        with open(processed_file, 'w', encoding='utf-8') as f:
-            json.dump(document, f, ensure_ascii=False, indent=2)
-        
-        processed_content_file = self.admin_dir / "processed" / f"{doc_id}.md"
-        with open(processed_content_file, 'w', encoding='utf-8') as f:
-            f.write(final_content)
+        if existing and self._same_result(existing[0], document):
+            # 处理结果与已处理版本相同：不写入、不更新时间戳
+            document = existing[0]
+            self._count_skipped("process")
+            logger.info(f"处理结果未变化，跳过写入: {doc_id}")
+        else:
+            document["processed_at"] = datetime.now().isoformat()
+            document["updated_at"] = datetime.now().isoformat()
+            # 保存到已处理目录
+            self.store.save("processed", doc_id, document, final_content)
         
         # 删除待处理目录中的原文件，避免重复
-        try:
-            pending_file.unlink()  # 删除JSON文件
-            if content_file.exists():
-                content_file.unlink()  # 删除MD文件
-        except Exception as e:
-            logger.warning(f"删除待处理文件时出错: {e}")
+        if from_pending:
+            try:
+                self.store.remove("pending", doc_id)
+            except Exception as e:
+                logger.warning(f"删除待处理文件时出错: {e}")
+        self._index_document("processed", document, final_content)
         
         print(f"文档已处理: {doc_id}")
         return document
 
-    def publish_document(self, doc_id: str) -> Dict:
-        """发布文档到content/posts目录"""
-        processed_file = self.admin_dir / "processed" / f"{doc_id}.json"
-        content_file = self.admin_dir / "processed" / f"{doc_id}.md"
-        
-        if not processed_file.exists():
-            raise FileNotFoundError(f"已处理文档不存在: {doc_id}")
-        
+    def publish_document(self, doc_id: str, rebuild: bool = True) -> Dict:
+        """发布文档到content/posts目录，默认通过调度器安排一次网站重建（文件未变化时不重建）"""
+        document, changed = self._publish_document(doc_id)
+        if rebuild and changed:
+            self.rebuild_scheduler.request()
+        return document
+
+    @with_document_lock
+    def _publish_document(self, doc_id: str) -> Tuple[Dict, bool]:
+        """写出文章和图片，返回 (文档, 是否有文件发生变化)"""
         # 加载文档
-        with open(processed_file, 'r', encoding='utf-8') as f:
-            document = json.load(f)
-        
-        with open(content_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        loaded = self.store.load("processed", doc_id)
+        if loaded is None:
+            raise FileNotFoundError(f"已处理文档不存在: {doc_id}")
+        document, content = loaded
         
-        # 生成发布文件名
-        date_str = datetime.now().strftime('%Y-%m-%d')
-        safe_title = re.sub(r'[^\w\s-]', '', document['title']).strip()
-        safe_title = re.sub(r'[-\s]+', '-', safe_title)
-        filename = f"{date_str}-{safe_title}.md"
+        # 已发布过的文档原地更新，不按新日期生成重复的文章
+        previous = document.get("published_file")
+        if previous and (self.project_root / previous).exists():
+            publish_file = self.project_root / previous
+            filename = publish_file.name
+            date_str = filename[:10]
+        else:
+            # 生成发布文件名
+            date_str = datetime.now().strftime('%Y-%m-%d')
+            safe_title = re.sub(r'[^\w\s-]', '', document['title']).strip()
+            safe_title = re.sub(r'[-\s]+', '-', safe_title)
+            filename = f"{date_str}-{safe_title}.md"
+            publish_file = self.content_dir / "posts" / filename
         
         # 发布到posts目录
-        publish_file = self.content_dir / "posts" / filename
-        with open(publish_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        changed = write_if_changed(publish_file, content.encode('utf-8'))
         
         # 处理图片
-        self._publish_images(document, date_str)
+        changed = self._publish_images(document, date_str) or changed
+        
+        if not changed and document.get("status") == "published":
+            self._count_skipped("publish")
+            print(f"文档未变化，跳过发布: {filename}")
+            return document, False
         
         # 更新文档状态
         document["status"] = "published"
@@ -259,35 +460,73 @@ class DocumentManager:
         document["published_file"] = str(publish_file.relative_to(self.project_root))
         
         # 保存更新后的元数据
-        with open(processed_file, 'w', encoding='utf-8') as f:
-            json.dump(document, f, ensure_ascii=False, indent=2)
+        self.store.save_metadata("processed", doc_id, document)
+        self._index_document("processed", document, content)
         
         print(f"文档已发布: {filename}")
-        return document
+        return document, changed
+
+    def publish_batch(self, doc_ids: Optional[List[str]] = None, all_processed: bool = False,
+                      progress=None) -> Dict:
+        """批量发布文档，全部写入后只重建一次网站
+
+        doc_ids 为要发布的文档ID列表；all_processed 为True时发布所有尚未发布的已处理文档。
+        单个文档失败不影响其他文档，返回的报告中包含每个文档的结果。
+        """
+        started = time.time()
+        if all_processed:
+            self.store.refresh()
+            doc_ids = [doc["id"] for doc in self.store.list_documents("processed", "processed", with_content=False)]
+        doc_ids = list(dict.fromkeys(doc_ids or []))
+
+        results = []
+        published = 0
+        changed_files = False
+        for index, doc_id in enumerate(doc_ids):
+            try:
+                document, changed = self._publish_document(doc_id)
+            except Exception as e:
+                logger.warning(f"发布文档失败 {doc_id}: {e}")
+                results.append({"id": doc_id, "success": False, "error": str(e)})
+            else:
+                published += 1
+                changed_files = changed_files or changed
+                results.append({"id": doc_id, "success": True, "changed": changed,
+                                "published_file": document["published_file"]})
+            if progress:
+                progress((index + 1) / len(doc_ids), f"已发布 {index + 1}/{len(doc_ids)}")
 
+        # 所有文档写入完成后只构建一次；没有文件变化时不构建
+        rebuilt = self.rebuild_site() if changed_files else False
+
+        report = {
+            "total": len(doc_ids),
+            "published": published,
+            "failed": len(doc_ids) - published,
+            "rebuilt": rebuilt,
+            "results": results,
+            "elapsed": round(time.time() - started, 3)
+        }
+        logger.info(f"批量发布完成: 成功 {published} 个，失败 {report['failed']} 个")
+        return report
+
+    @with_document_lock
     def save_document(self, doc_id: str, title: str, content: str) -> Dict:
         """保存文档内容和元数据"""
         # 先在processed目录中查找
-        processed_file = self.admin_dir / "processed" / f"{doc_id}.json"
-        processed_content_file = self.admin_dir / "processed" / f"{doc_id}.md"
+        loaded = self.store.load("processed", doc_id)
         
         # 如果在processed目录中不存在，在pending目录中查找
-        if not processed_file.exists():
-            pending_file = self.admin_dir / "pending" / f"{doc_id}.json"
-            pending_content_file = self.admin_dir / "pending" / f"{doc_id}.md"
+        if loaded is None:
+            loaded = self.store.load("pending", doc_id)
             
-            if pending_file.exists():
+            if loaded is not None:
                 # 从 pending 移动到 processed
-                with open(pending_file, 'r', encoding='utf-8') as f:
-                    document = json.load(f)
-                processed_file = self.admin_dir / "processed" / f"{doc_id}.json"
-                processed_content_file = self.admin_dir / "processed" / f"{doc_id}.md"
+                document, _ = loaded
                 
                 # 删除pending文件
                 try:
-                    pending_file.unlink()
-                    if pending_content_file.exists():
-                        pending_content_file.unlink()
+                    self.store.remove("pending", doc_id)
                 except Exception as e:
                     logger.warning(f"删除pending文件时出错: {e}")
             else:
@@ -302,134 +541,312 @@ class DocumentManager:
                     "created_at": datetime.now().isoformat(),
                     "updated_at": datetime.now().isoformat(),
                     "size": len(content.encode('utf-8')),
-                    "word_count": self._count_words(content),
                     "images": [],
                     "front_matter": {}
                 }
         else:
             # 加载现有文档
-            with open(processed_file, 'r', encoding='utf-8') as f:
-                document = json.load(f)
+            document, body = loaded
+            stored_hash = document.get("content_hash") or content_hash(body)
+            if (document.get("title") == title and document.get("status") == "processed"
+                    and stored_hash == content_hash(content)):
+                # 编辑器自动保存了相同的内容：不写入、不更新时间戳
+                self._count_skipped("save")
+                document["content"] = body
+                return document
         
         # 更新文档信息
         document["title"] = title
         document["content"] = content
         document["updated_at"] = datetime.now().isoformat()
         document["size"] = len(content.encode('utf-8'))
-        document["word_count"] = self._count_words(content)
+        document["content_hash"] = content_hash(content)
+        self._apply_analysis(document, analyze_cached(content))
         document["status"] = "processed"
         
-        # 保存文档元数据
-        with open(processed_file, 'w', encoding='utf-8') as f:
-            json.dump(document, f, ensure_ascii=False, indent=2)
-        
-        # 保存文档内容
-        with open(processed_content_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # 保存文档元数据和内容
+        self.store.save("processed", doc_id, document, content)
+        self._index_document("processed", document, content)
         
         logger.info(f"文档已保存: {doc_id}")
         return document
 
-    def list_documents(self, status: Optional[str] = None) -> List[Dict]:
-        """列出文档 - 优化版本"""
+    def list_documents(self, status: Optional[str] = None, with_content: bool = True) -> List[Dict]:
+        """列出文档 - 基于内存索引过滤和排序"""
         documents = []
         
-        # 扫描待处理文档
+        # 文件后端通过mtime/size检查发现外部修改的文件
+        self.store.refresh()
+        
+        # 待处理文档
         if not status or status == "pending":
-            pending_dir = self.admin_dir / "pending"
-            pending_docs = batch_load_json_files(pending_dir)
-            documents.extend(pending_docs)
+            documents.extend(self.store.list_documents("pending", with_content=with_content))
         
-        # 扫描已处理文档
+        # 已处理文档（按状态过滤）
         if not status or status in ["processed", "published"]:
-            processed_dir = self.admin_dir / "processed"
-            processed_docs = batch_load_json_files(processed_dir)
-            
-            # 按状态过滤
-            if status:
-                processed_docs = [doc for doc in processed_docs if doc.get("status") == status]
-            
-            documents.extend(processed_docs)
+            documents.extend(self.store.list_documents("processed", status, with_content=with_content))
         
-        # 按创建时间排序
-        documents.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+        # 按创建时间排序，时间相同按ID排序
+        documents.sort(key=self._sort_key, reverse=True)
         
         logger.info(f"找到 {len(documents)} 个文档 (状态: {status or '全部'})")
         return documents
 
+    def list_documents_page(self, status: Optional[str] = None, fields: Optional[List[str]] = None,
+                            limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict:
+        """分页列出文档元数据
+
+        按 (created_at, id) 倒序排列；cursor 为上一页返回的不透明游标。
+        fields 为空时只返回 LIST_FIELDS，正文字段始终不会返回；limit 为空时每页 DEFAULT_PAGE_SIZE 个。
+        返回的 documents 是生成器，在迭代时才逐个投影文档，调用方应边迭代边输出。
+        """
+        fields = [f for f in (fields or LIST_FIELDS) if f not in BODY_FIELDS]
+        limit = max(1, min(int(DEFAULT_PAGE_SIZE if limit is None else limit), MAX_PAGE_SIZE))
+        after = self._decode_cursor(cursor) if cursor else None
+
+        documents = self.list_documents(status, with_content=False)
+
+        # 列表已排序：跳过游标之前（含游标）的文档，再截取一页，都不复制列表
+        start = 0
+        if after is not None:
+            start = next((i for i, doc in enumerate(documents) if self._sort_key(doc) < after),
+                         len(documents))
+        end = min(start + limit, len(documents))
+
+        next_cursor = None
+        if end < len(documents):
+            next_cursor = self._encode_cursor(*self._sort_key(documents[end - 1]))
+
+        return {
+            "documents": ({f: doc[f] for f in fields if f in doc}
+                          for doc in itertools.islice(documents, start, end)),
+            "count": end - start,
+            "next_cursor": next_cursor
+        }
+
+    @staticmethod
+    def _sort_key(document: Dict) -> tuple:
+        return document.get("created_at", ""), document.get("id", "")
+
+    @staticmethod
+    def _encode_cursor(created_at: str, doc_id: str) -> str:
+        """编码分页游标"""
+        raw = json.dumps([created_at, doc_id], ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple:
+        """解码分页游标，格式错误时抛出ValueError"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, doc_id = json.loads(base64.urlsafe_b64decode(padded).decode('utf-8'))
+            return str(created_at), str(doc_id)
+        except Exception:
+            raise ValueError(f"无效的分页游标: {cursor}")
+
+    def collection_version(self) -> int:
+        """文档集合版本号，任何文档变化后都会增加
+
+        本进程经由存储的写入立即增加版本号；其他进程或外部编辑造成的修改需要扫描才能发现，
+        扫描（文件后端为每个元数据文件一次 stat）最多每 ETAG_REFRESH_INTERVAL 秒执行一次，
+        条件请求命中时因此不需要访问文件系统。
+        """
+        now = time.monotonic()
+        with self._etag_lock:
+            due = now - self._last_refresh >= ETAG_REFRESH_INTERVAL
+            if due:
+                self._last_refresh = now
+        if due:
+            self.store.refresh()
+
+        version = self.store.version
+        with self._etag_lock:
+            if version != self._etag_version:
+                self._document_etags.clear()
+                self._etag_version = version
+        return version
+
+    def list_etag(self, *params) -> str:
+        """文档列表的ETag，由集合版本号和查询参数决定"""
+        version = self.collection_version()
+        key = hashlib.md5(json.dumps(params, ensure_ascii=False).encode('utf-8')).hexdigest()[:8]
+        return f'"{self._etag_epoch}-{version}-{key}"'
+
+    def cached_document_etag(self, doc_id: str) -> Optional[str]:
+        """集合版本号未变时返回上次计算的文档ETag，不读取文档"""
+        self.collection_version()
+        with self._etag_lock:
+            return self._document_etags.get(doc_id)
+
+    def get_document_with_etag(self, doc_id: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """获取文档及其ETag，ETag 由 updated_at 和文档内容的哈希生成"""
+        version = self.collection_version()
+        document = self.get_document(doc_id)
+        if document is None:
+            with self._etag_lock:
+                self._document_etags.pop(doc_id, None)
+            return None, None
+
+        digest = hashlib.sha1(
+            json.dumps(document, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+        etag = f'"{document.get("updated_at", "")}-{digest}"'
+        with self._etag_lock:
+            # 读取期间版本已变化时不缓存，避免把旧版本的ETag记到新版本下
+            if version == self._etag_version:
+                self._document_etags[doc_id] = etag
+        return document, etag
+
+    def get_document(self, doc_id: str) -> Optional[Dict]:
+        """获取单个文档，content 字段为文档的当前正文"""
+        # 先在processed目录中查找，再在pending目录中查找
+        for location in ("processed", "pending"):
+            loaded = self.store.load(location, doc_id)
+            if loaded is not None:
+                document, body = loaded
+                document["content"] = body
+                return document
+        return None
+
+    @with_document_lock
     def delete_document(self, doc_id: str) -> bool:
         """删除文档"""
         deleted = False
         
-        # 删除待处理文档
-        pending_json = self.admin_dir / "pending" / f"{doc_id}.json"
-        pending_md = self.admin_dir / "pending" / f"{doc_id}.md"
-        
-        if pending_json.exists():
-            pending_json.unlink()
-            deleted = True
-        if pending_md.exists():
-            pending_md.unlink()
-        
-        # 删除已处理文档
-        processed_json = self.admin_dir / "processed" / f"{doc_id}.json"
-        processed_md = self.admin_dir / "processed" / f"{doc_id}.md"
-        
-        if processed_json.exists():
-            processed_json.unlink()
-            deleted = True
-        if processed_md.exists():
-            processed_md.unlink()
+        # 删除待处理文档和已处理文档
+        for location in ("pending", "processed"):
+            if self.store.remove(location, doc_id):
+                deleted = True
+        if self._search_loaded:
+            self.search_index.remove(doc_id)
         
         return deleted
 
+    def list_posts(self) -> List[Dict]:
+        """列出 content/posts 中已发布的文章，只读取文件头部，未修改的文件直接使用缓存的解析结果"""
+        posts = []
+        for path in sorted((self.content_dir / "posts").glob("*.md"), reverse=True):
+            try:
+                meta = front_matter.read_header(path)
+            except (OSError, front_matter.FrontMatterError) as e:
+                logger.warning(f"读取文章头部失败 {path}: {e}")
+                continue
+            posts.append({
+                "file": str(path.relative_to(self.project_root)),
+                "title": meta.get("title") or path.stem,
+                "date": meta.get("date"),
+                "draft": meta.get("draft", False),
+                "tags": meta.get("tags", []),
+                "categories": meta.get("categories", [])
+            })
+        return posts
+
+    @staticmethod
+    def _search_signature(location: str, document: Dict) -> str:
+        """根据元数据判断文档是否需要重新索引，正文变化时 updated_at 或字数随之变化"""
+        return "|".join(str(document.get(field) or "") for field in (
+            "title", "status", "created_at", "updated_at", "processed_at", "published_at", "word_count"
+        )) + f"|{location}"
+
+    def _index_document(self, location: str, document: Dict, body: str):
+        """写入路径调用：更新单个文档的检索索引（索引尚未加载时由首次搜索统一对齐）"""
+        if not self._search_loaded:
+            return
+        self.search_index.update(document["id"], document.get("title", ""), body,
+                                 document.get("status"), self._search_signature(location, document))
+
+    def _sync_search_index(self):
+        """加载持久化的索引，并重新索引在其他进程中或外部修改过的文档"""
+        with self._search_guard:
+            if not self._search_loaded:
+                self.search_index.load()
+                self._search_loaded = True
+
+            self.store.refresh()
+            version = self.store.version
+            if version == self._search_version:
+                return
+
+            signatures = {}
+            for location in ("pending", "processed"):
+                for document in self.store.list_documents(location, with_content=False):
+                    signatures[document["id"]] = self._search_signature(location, document)
+            self.search_index.sync(signatures, self.get_document)
+            self._search_version = version
+
+    def search(self, query: str, limit: int = SEARCH_DEFAULT_LIMIT, status: Optional[str] = None) -> Dict:
+        """全文检索，返回按相关度排序并带有高亮摘要的结果"""
+        self._sync_search_index()
+
+        results = self.search_index.search(query, limit, status)
+        for result in results:
+            document = self.get_document(result["id"])
+            result["snippet"] = highlight(document.get("content") or "", query, SEARCH_SNIPPET_LENGTH) if document else ""
+            if document:
+                result["updated_at"] = document.get("updated_at") or document.get("created_at")
+
+        return {"query": query, "total": len(results), "results": results}
+
+    @staticmethod
+    def _same_result(existing: Dict, document: Dict) -> bool:
+        """比较两次处理的结果，忽略时间戳和状态（结果不变时已发布的文档保持已发布）"""
+        def strip(doc):
+            return {k: v for k, v in doc.items() if k not in TIMESTAMP_FIELDS and k != "status"}
+        return strip(existing) == strip(document)
+
+    def _count_skipped(self, operation: str):
+        with self._stats_lock:
+            self.skipped_writes[operation] += 1
+
+    def write_stats(self) -> Dict:
+        """跳过的写入统计：按操作类型，以及存储层跳过的元数据/正文写入"""
+        with self._stats_lock:
+            skipped = dict(self.skipped_writes)
+        return {
+            "skipped": skipped,
+            "skipped_total": sum(skipped.values()),
+            "store_skipped": getattr(self.store, "skipped_writes", 0)
+        }
+
+    @staticmethod
+    def _apply_analysis(document: Dict, analysis):
+        """把分析结果中的统计信息写入文档元数据"""
+        document["word_count"] = analysis.word_count
+        document["reading_time"] = analysis.reading_time
+        document["outline"] = analysis.outline
+        document["excerpt"] = analysis.excerpt
+        document["image_refs"] = analysis.images
+        document["links"] = analysis.links
+
     def _extract_title(self, content: str) -> Optional[str]:
-        """从内容中提取标题"""
-        # 尝试从Front Matter提取
-        front_matter_match = re.search(r'^---\s*\n(.*?)\n---', content, re.DOTALL)
-        if front_matter_match:
-            title_match = re.search(r'title:\s*["\']?([^"\'\n]+)["\']?', front_matter_match.group(1))
-            if title_match:
-                return title_match.group(1).strip()
-        
-        # 尝试从第一个标题提取
-        title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-        if title_match:
-            return title_match.group(1).strip()
-        
-        return None
+        """从内容中提取标题：Front Matter 中的 title，其次为第一个一级标题"""
+        return analyze_cached(content).title
 
     def _count_words(self, content: str) -> int:
-        """统计字数"""
-        # 移除Front Matter
-        content = re.sub(r'^---\s*\n.*?\n---\s*\n', '', content, flags=re.DOTALL)
-        # 移除Markdown语法
-        content = re.sub(r'[#*`_\[\]()]', '', content)
-        # 统计中英文字符
-        chinese = re.findall(r'[\u4e00-\u9fa5]', content)
-        english = re.findall(r'[a-zA-Z]+', content)
-        return len(chinese) + len(' '.join(english).split())
+        """统计字数：汉字数加英文单词数，不含 Front Matter"""
+        return analyze_cached(content).word_count
 
     def _generate_front_matter(self, document: Dict) -> str:
-        """生成Front Matter"""
-        front_matter = [
-            "---",
-            f'title: "{document.get("title", "")}"',
-            f'date: {document.get("date", datetime.now().isoformat())}',
-            f'draft: {str(document.get("draft", False)).lower()}',
-            f'tags: {json.dumps(document.get("tags", []), ensure_ascii=False)}',
-            f'categories: {json.dumps(document.get("categories", []), ensure_ascii=False)}',
-            f'description: "{document.get("description", "")}"',
-            "ShowToc: true",
-            "TocOpen: false",
-            "---"
-        ]
-        return "\n".join(front_matter)
+        """生成Front Matter，保留原文 Front Matter 中的其他字段"""
+        original = document.get("front_matter") or {}
+        meta = {
+            "title": document.get("title", ""),
+            "date": document.get("date") or original.get("date") or datetime.now().isoformat(),
+            "draft": document.get("draft", False),
+            "tags": document.get("tags", []),
+            "categories": document.get("categories", []),
+            "description": document.get("description", ""),
+            "ShowToc": original.get("ShowToc", True),
+            "TocOpen": original.get("TocOpen", False)
+        }
+        for key, value in original.items():
+            meta.setdefault(key, value)
+        return front_matter.dump(meta)
 
     def _process_content(self, content: str, document: Dict) -> str:
         """处理内容格式"""
         # 移除原有的Front Matter
-        content = re.sub(r'^---\s*\n.*?\n---\s*\n', '', content, flags=re.DOTALL)
+        content = analyze_cached(content).body(content)
         
         # 处理图片链接
         content = self._process_images(content, document)
@@ -446,10 +863,11 @@ class DocumentManager:
         # 比如将base64图片保存为文件，更新图片链接等
         return content
 
-    def _publish_images(self, document: Dict, date_str: str):
-        """发布图片到static目录"""
+    def _publish_images(self, document: Dict, date_str: str) -> bool:
+        """发布图片到static目录，返回是否写入了新的或修改过的图片"""
         if not document.get("images"):
-            return
+            return False
+        changed = False
         
         date_dir = self.static_dir / "images" / "posts" / date_str.replace('-', '/')
         date_dir.mkdir(parents=True, exist_ok=True)
@@ -468,16 +886,34 @@ class DocumentManager:
                     
                     # 保存图片
                     image_file = date_dir / filename
-                    with open(image_file, 'wb') as f:
-                        f.write(image_data)
-                    
-                    print(f"图片已保存: {image_file}")
+                    if write_if_changed(image_file, image_data):
+                        changed = True
+                        print(f"图片已保存: {image_file}")
+                    else:
+                        self._count_skipped("images")
                     
                 except Exception as e:
                     print(f"保存图片失败 {image['id']}: {e}")
+        return changed
 
-    def rebuild_site(self):
-        """重新构建Hugo网站"""
+    def rebuild_site(self, wait: bool = True) -> bool:
+        """通过调度器重新构建Hugo网站，wait为False时只登记请求"""
+        if not wait:
+            self.rebuild_scheduler.request()
+            return True
+        return self.rebuild_scheduler.run_now()
+
+    def _build_search_shards(self):
+        """构建后步骤：为公开站点搜索页生成分片索引，失败不影响本次构建结果"""
+        try:
+            build_shards(self.project_root / "public")
+        except FileNotFoundError:
+            logger.warning("未找到 public/index.json，跳过搜索分片生成")
+        except Exception as e:
+            logger.warning(f"生成搜索分片失败: {e}")
+
+    def _build_site(self) -> bool:
+        """执行一次 hugo --minify 构建"""
         try:
             import subprocess
             result = subprocess.run(["hugo", "--minify"], 
@@ -486,6 +922,7 @@ class DocumentManager:
                                   text=True)
             if result.returncode == 0:
                 print("网站重建成功")
+                self._build_search_shards()
                 return True
             else:
                 print(f"网站重建失败: {result.stderr}")
@@ -498,6 +935,7 @@ class DocumentManager:
 def main():
     parser = argparse.ArgumentParser(description="Hugo-Self 文档管理工具")
     parser.add_argument("--project-root", default=".", help="项目根目录")
+    parser.add_argument("--store", choices=["file", "sqlite"], default="file", help="文档存储后端")
     
     subparsers = parser.add_subparsers(dest="command", help="可用命令")
     
@@ -506,13 +944,23 @@ def main():
     import_parser.add_argument("file", help="要导入的文件路径")
     import_parser.add_argument("--source", default="manual", help="文档来源")
     
+    # 批量导入命令
+    bulk_parser = subparsers.add_parser("import-bulk", help="批量导入目录、.zip 或 .tar.gz 中的文档")
+    bulk_parser.add_argument("source", help="目录或归档文件路径")
+    bulk_parser.add_argument("--source-label", default="bulk", help="文档来源")
+    bulk_parser.add_argument("--workers", type=int, default=BULK_IMPORT_WORKERS, help="解析文档的工作线程数")
+    bulk_parser.add_argument("--batch-size", type=int, default=BULK_IMPORT_BATCH_SIZE, help="每批写入的文档数")
+    bulk_parser.add_argument("--report", help="将导入报告保存为JSON文件")
+    
     # 列表命令
     list_parser = subparsers.add_parser("list", help="列出文档")
     list_parser.add_argument("--status", choices=["pending", "processed", "published"], help="过滤状态")
     
     # 发布命令
     publish_parser = subparsers.add_parser("publish", help="发布文档")
-    publish_parser.add_argument("doc_id", help="文档ID")
+    publish_parser.add_argument("doc_id", nargs="?", help="文档ID")
+    publish_parser.add_argument("--ids", nargs="+", help="批量发布多个文档，完成后只重建一次网站")
+    publish_parser.add_argument("--all-processed", action="store_true", help="发布所有尚未发布的已处理文档")
     
     # 删除命令
     delete_parser = subparsers.add_parser("delete", help="删除文档")
@@ -521,19 +969,62 @@ def main():
     # 重建命令
     rebuild_parser = subparsers.add_parser("rebuild", help="重建网站")
     
+    # 迁移命令
+    migrate_parser = subparsers.add_parser("migrate", help="将 admin/ 目录中的文档导入SQLite数据库")
+    migrate_parser.add_argument("--db", help="数据库文件路径（默认 admin/documents.db）")
+    
+    # 正文存储回收命令
+    gc_parser = subparsers.add_parser("gc", help="转换旧格式文档并回收未引用的正文（文件后端）")
+    gc_parser.add_argument("--grace", type=float, default=BLOB_GC_GRACE,
+                           help="保留最近多少秒内写入的正文")
+    
     args = parser.parse_args()
     
     if not args.command:
         parser.print_help()
         return
     
-    dm = DocumentManager(args.project_root)
+    if args.command == "migrate":
+        admin_dir = Path(args.project_root) / "admin"
+        count = migrate_to_sqlite(admin_dir, args.db)
+        print(f"迁移完成: {count} 个文档")
+        return 0
+    
+    if args.command == "gc":
+        store = create_document_store("file", Path(args.project_root) / "admin")
+        converted = store.convert_legacy()
+        try:
+            result = store.gc_blobs(args.grace)
+        except DocumentLoadError as e:
+            print(f"❌ {e}")
+            return 1
+        stats = store.blobs.stats()
+        print(f"已转换 {converted} 个旧格式文档")
+        print(f"回收完成: 删除 {result['removed']} 个正文，释放 {result['freed_bytes']} 字节；"
+              f"当前 {stats['blobs']} 个正文，共 {stats['bytes']} 字节")
+        return 0
+    
+    dm = DocumentManager(args.project_root, store=args.store)
     
     try:
         if args.command == "import":
             doc = dm.import_document(args.file, args.source)
             print(f"导入成功: {doc['id']}")
             
+        elif args.command == "import-bulk":
+            report = dm.import_bulk(args.source, args.source_label,
+                                    workers=args.workers, batch_size=args.batch_size)
+            print(f"批量导入完成: 共 {report['total']} 个文件，成功 {report['imported']} 个，"
+                  f"失败 {report['failed']} 个，耗时 {report['elapsed']}s")
+            for failure in report["failures"]:
+                print(f"  ❌ {failure['file']}: {failure['error']}")
+            if args.report:
+                with open(args.report, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+                print(f"报告已保存: {args.report}")
+            if report["failed"]:
+                return 1
+            
         elif args.command == "list":
             docs = dm.list_documents(args.status)
             print(f"找到 {len(docs)} 个文档:")
@@ -541,8 +1032,24 @@ def main():
                 print(f"  {doc['id']}: {doc['title']} ({doc['status']})")
                 
         elif args.command == "publish":
-            doc = dm.publish_document(args.doc_id)
-            print(f"发布成功: {doc['published_file']}")
+            if args.ids or args.all_processed:
+                report = dm.publish_batch(args.ids, all_processed=args.all_processed)
+                for result in report["results"]:
+                    if result["success"]:
+                        print(f"  ✅ {result['id']}: {result['published_file']}")
+                    else:
+                        print(f"  ❌ {result['id']}: {result['error']}")
+                print(f"批量发布完成: 共 {report['total']} 个，成功 {report['published']} 个，"
+                      f"失败 {report['failed']} 个，网站重建: {'成功' if report['rebuilt'] else '未执行或失败'}")
+                if report["failed"]:
+                    return 1
+            elif args.doc_id:
+                doc = dm.publish_document(args.doc_id)
+                print(f"发布成功: {doc['published_file']}")
+            else:
+                publish_parser.error("需要指定 doc_id、--ids 或 --all-processed")
+            # 等待调度器完成发布触发的重建后再退出
+            dm.rebuild_scheduler.wait()
             
         elif args.command == "delete":
             if dm.delete_document(args.doc_id):
@@ -563,19 +1070,32 @@ def main():
 class WebAPI:
     """简单的Web API服务器，用于处理前端请求"""
 
-    def __init__(self, document_manager: DocumentManager, port: int = 8081):
+    def __init__(self, document_manager: DocumentManager, port: int = 8081,
+                 max_workers: int = 8, max_queue: int = 32,
+                 job_pool_sizes: Optional[Dict[str, int]] = None,
+                 job_max_queue: int = 16,
+                 health_sections: Optional[Dict[str, Callable[[], object]]] = None):
         self.dm = document_manager
         self.port = port
+        # /api/health 中的附加信息 {名称: 返回可JSON序列化数据的函数}，例如管理后台资源代理的熔断器状态
+        self.health_sections = dict(health_sections or {})
+        # 工作线程数和排队上限，超过后返回503
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        # 后台任务：每种操作类型独立的工作线程池和有界队列，队列满时返回503
+        self.jobs = JobManager(job_pool_sizes, max_queue=job_max_queue)
+        self.server = None
 
     def start_server(self):
         """启动简单的HTTP服务器"""
         document_manager = self.dm  # 为内部类提供引用
+        job_manager = self.jobs
+        health_sections = self.health_sections
         try:
-            from http.server import HTTPServer, BaseHTTPRequestHandler
+            from http.server import BaseHTTPRequestHandler
+            from pooled_server import PooledHTTPServer
             import urllib.parse
             import json
-            import tempfile
-            import os
 
             class APIHandler(BaseHTTPRequestHandler):
                 def log_message(self, format, *args):
@@ -587,7 +1107,7 @@ class WebAPI:
                     self.send_response(200)
                     self.send_header('Access-Control-Allow-Origin', '*')
                     self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-                    self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+                    self.send_header('Access-Control-Allow-Headers', 'Content-Type, Prefer, If-None-Match')
                     self.end_headers()
 
                 def do_GET(self):
@@ -602,8 +1122,38 @@ class WebAPI:
                                 self.handle_list_documents()
                         elif self.path.startswith('/api/documents'):
                             self.handle_list_documents()
+                        elif self.path.startswith('/api/jobs'):
+                            self.handle_get_job()
+                        elif self.path.startswith('/api/search'):
+                            self.handle_search()
+                        elif self.path.startswith('/api/posts'):
+                            posts = document_manager.list_posts()
+                            self.send_json_response(200, {
+                                "success": True,
+                                "data": posts,
+                                "message": f"找到 {len(posts)} 篇文章"
+                            })
+                        elif self.path.startswith('/api/hugo/logs'):
+                            self.handle_hugo_logs()
+                        elif self.path == '/api/rebuild':
+                            self.send_json_response(200, {
+                                "success": True,
+                                "data": document_manager.rebuild_scheduler.stats()
+                            })
                         elif self.path == '/api/health':
-                            self.send_json_response(200, {"status": "ok", "message": "API服务器正常运行"})
+                            health = {
+                                "status": "ok",
+                                "message": "API服务器正常运行",
+                                "workers": self.server.stats(),
+                                "jobs": job_manager.stats(),
+                                "writes": document_manager.write_stats()
+                            }
+                            for name, section in health_sections.items():
+                                try:
+                                    health[name] = section()
+                                except Exception as e:
+                                    health[name] = {"error": str(e)}
+                            self.send_json_response(200, health)
                         else:
                             self.send_json_response(404, {"error": "接口不存在"})
                     except Exception as e:
@@ -612,47 +1162,271 @@ class WebAPI:
 
                 def do_POST(self):
                     try:
-                        if self.path == '/api/documents/import':
+                        route = urllib.parse.urlparse(self.path).path
+                        if route == '/api/documents/import':
                             self.handle_import_document()
-                        elif self.path == '/api/documents/save':
+                        elif route == '/api/documents/import-bulk':
+                            self.handle_bulk_import()
+                        elif route == '/api/documents/save':
                             self.handle_save_document()
-                        elif self.path == '/api/documents/publish':
+                        elif route == '/api/documents/publish':
                             self.handle_publish_document()
-                        elif self.path == '/api/documents/process':
+                        elif route == '/api/documents/publish-batch':
+                            self.handle_publish_batch()
+                        elif route == '/api/documents/process':
                             self.handle_process_document()
+                        elif route == '/api/rebuild':
+                            document_manager.rebuild_site(wait=False)
+                            self.send_json_response(202, {
+                                "success": True,
+                                "data": document_manager.rebuild_scheduler.stats(),
+                                "message": "已安排网站重建"
+                            })
                         else:
                             self.send_json_response(404, {"error": "接口不存在"})
                     except Exception as e:
                         print(f"[API] POST请求处理错误: {e}")
                         self.send_json_response(500, {"error": str(e)})
 
-                def send_json_response(self, status_code, data):
+                def send_json_response(self, status_code, data, headers=None):
                     """发送JSON响应"""
                     try:
+                        response_data = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+                        # 按 Accept-Encoding 压缩，小响应不压缩
+                        body, encoding = negotiate(self.headers.get('Accept-Encoding'),
+                                                   response_data.encode('utf-8'))
                         self.send_response(status_code)
                         self.send_header('Content-Type', 'application/json; charset=utf-8')
                         self.send_header('Access-Control-Allow-Origin', '*')
+                        self.send_header('Vary', 'Accept-Encoding')
+                        if encoding:
+                            self.send_header('Content-Encoding', encoding)
+                        self.send_header('Content-Length', str(len(body)))
+                        self.send_extra_headers(headers, encoding)
                         self.end_headers()
-                        response_data = json.dumps(data, ensure_ascii=False, indent=2)
-                        self.wfile.write(response_data.encode('utf-8'))
+                        self.wfile.write(body)
                     except Exception as e:
                         print(f"[API] 发送响应失败: {e}")
 
+                def send_extra_headers(self, headers, encoding):
+                    for name, value in (headers or {}).items():
+                        if name == 'ETag' and encoding:
+                            # 不同编码的表示使用不同的强ETag
+                            value = f'{value[:-1]}-{encoding}"'
+                        self.send_header(name, value)
+
+                def send_json_stream(self, status_code, envelope, items, headers=None):
+                    """流式发送 {...envelope, "data": [...]}，列表元素逐个编码
+
+                    HTTP/1.1 客户端使用分块传输编码，HTTP/1.0 客户端以关闭连接结束响应。
+                    内存中最多保留一个分块和一个正在编码的文档。
+                    """
+                    chunked = self.request_version == 'HTTP/1.1'
+                    encoding = choose_encoding(self.headers.get('Accept-Encoding'))
+                    compressor = StreamCompressor(encoding) if encoding else None
+
+                    if chunked:
+                        # 仅本次响应使用HTTP/1.1，响应结束后关闭连接
+                        self.protocol_version = 'HTTP/1.1'
+                    self.close_connection = True
+                    self.send_response(status_code)
+                    self.send_header('Content-Type', 'application/json; charset=utf-8')
+                    self.send_header('Access-Control-Allow-Origin', '*')
+                    self.send_header('Vary', 'Accept-Encoding')
+                    if encoding:
+                        self.send_header('Content-Encoding', encoding)
+                    if chunked:
+                        self.send_header('Transfer-Encoding', 'chunked')
+                    self.send_header('Connection', 'close')
+                    self.send_extra_headers(headers, encoding)
+                    self.end_headers()
+
+                    def write_chunk(data):
+                        if not data:
+                            return
+                        if chunked:
+                            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+                        else:
+                            self.wfile.write(data)
+
+                    buffer = bytearray()
+
+                    def write(data):
+                        buffer.extend(data)
+                        if len(buffer) >= STREAM_CHUNK_SIZE:
+                            flush()
+
+                    def flush():
+                        data = bytes(buffer)
+                        buffer.clear()
+                        write_chunk(compressor.compress(data) if compressor else data)
+
+                    try:
+                        head = json.dumps(envelope, ensure_ascii=False, separators=(',', ':'))[:-1]
+                        write((head + (',' if envelope else '') + '"data":[').encode('utf-8'))
+                        for i, item in enumerate(items):
+                            if i:
+                                write(b',')
+                            write(json.dumps(item, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                        write(b']}')
+                        flush()
+                        if compressor:
+                            write_chunk(compressor.flush())
+                        if chunked:
+                            self.wfile.write(b"0\r\n\r\n")
+                    except Exception as e:
+                        print(f"[API] 流式发送响应失败: {e}")
+
+                def not_modified(self, etag):
+                    """If-None-Match 与 ETag 匹配时发送空的304响应并返回True"""
+                    header = self.headers.get('If-None-Match')
+                    if not header:
+                        return False
+
+                    for candidate in header.split(','):
+                        candidate = candidate.strip()
+                        # 去掉压缩编码后缀，与未压缩表示的ETag比较
+                        for encoding in ('gzip', 'br'):
+                            if candidate.endswith(f'-{encoding}"'):
+                                candidate = candidate[:-len(encoding) - 2] + '"'
+                        if candidate == etag or candidate == '*':
+                            self.send_response(304)
+                            self.send_header('ETag', etag)
+                            self.send_header('Access-Control-Allow-Origin', '*')
+                            self.send_header('Access-Control-Expose-Headers', 'ETag')
+                            self.send_header('Vary', 'Accept-Encoding')
+                            self.end_headers()
+                            return True
+                    return False
+
+                def wants_async(self):
+                    """请求是否要求异步执行（?async=1 或 Prefer: respond-async）"""
+                    query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                    if query.get('async', ['0'])[0] in ('1', 'true'):
+                        return True
+                    return 'respond-async' in self.headers.get('Prefer', '')
+
+                def run_operation(self, operation, func, message):
+                    """执行文档操作；异步请求提交到后台任务队列并返回202
+
+                    任务队列已满时返回503并返回False，调用方负责释放为任务准备的资源
+                    """
+                    if self.wants_async():
+                        try:
+                            job = job_manager.submit(operation, func)
+                        except JobQueueFull as e:
+                            self.send_json_response(503, {
+                                "success": False,
+                                "error": f"服务器繁忙，请稍后重试: {e}"
+                            }, headers={'Retry-After': '1'})
+                            return False
+                        self.send_json_response(202, {
+                            "success": True,
+                            "data": job.to_dict(),
+                            "message": "任务已提交"
+                        }, headers={'Location': f'/api/jobs/{job.id}'})
+                        return True
+
+                    result = func(lambda progress, message="": None)
+                    self.send_json_response(200, {
+                        "success": True,
+                        "data": result,
+                        "message": message
+                    })
+                    return True
+
+                def handle_get_job(self):
+                    """处理任务状态查询请求"""
+                    path_parts = urllib.parse.urlparse(self.path).path.rstrip('/').split('/')
+                    if len(path_parts) == 3:  # /api/jobs
+                        self.send_json_response(200, {
+                            "success": True,
+                            "data": job_manager.list_jobs()
+                        })
+                        return
+
+                    job = job_manager.get(path_parts[3]) if len(path_parts) == 4 else None
+                    if job is None:
+                        self.send_json_response(404, {
+                            "success": False,
+                            "error": "任务不存在"
+                        })
+                        return
+
+                    self.send_json_response(200, {
+                        "success": True,
+                        "data": job.to_dict()
+                    })
+
+                def handle_hugo_logs(self):
+                    """处理Hugo输出日志请求"""
+                    pump = get_pump("hugo")
+                    if pump is None:
+                        self.send_json_response(404, {
+                            "success": False,
+                            "error": "Hugo 日志不可用（Hugo 未由当前进程启动）"
+                        })
+                        return
+
+                    params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                    try:
+                        limit = int(params.get('lines', ['200'])[0])
+                    except ValueError:
+                        limit = 200
+                    stream = params.get('stream', [None])[0]
+
+                    self.send_json_response(200, {
+                        "success": True,
+                        "data": {
+                            "stats": pump.stats(),
+                            "build_times": pump.build_times(),
+                            "lines": pump.lines(limit, stream)
+                        }
+                    })
+
                 def handle_list_documents(self):
                     """处理文档列表请求"""
                     try:
                         query = urllib.parse.urlparse(self.path).query
                         params = urllib.parse.parse_qs(query)
                         status = params.get('status', [None])[0]
+                        fields = params.get('fields', [None])[0]
+                        cursor = params.get('cursor', [None])[0]
+                        try:
+                            limit = min(int(params.get('limit', [DEFAULT_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+                        except ValueError:
+                            self.send_json_response(400, {
+                                "success": False,
+                                "error": "limit 必须是整数"
+                            })
+                            return
 
-                        # 获取文档列表
-                        docs = document_manager.list_documents(status)
-                        
-                        self.send_json_response(200, {
+                        # 集合未变化时直接返回304，不读取文档
+                        etag = document_manager.list_etag(status, fields, limit, cursor)
+                        if self.not_modified(etag):
+                            return
+
+                        # 获取文档列表（默认只包含元数据）
+                        try:
+                            page = document_manager.list_documents_page(
+                                status,
+                                fields=[f.strip() for f in fields.split(',') if f.strip()] if fields else None,
+                                limit=limit,
+                                cursor=cursor
+                            )
+                        except ValueError as e:
+                            self.send_json_response(400, {
+                                "success": False,
+                                "error": str(e)
+                            })
+                            return
+
+                        # 逐个文档投影、编码并分块发送，不在内存中拼接整个响应
+                        self.send_json_stream(200, {
                             "success": True,
-                            "data": docs,
-                            "message": f"找到 {len(docs)} 个文档"
-                        })
+                            "next_cursor": page["next_cursor"],
+                            "message": f"找到 {page['count']} 个文档"
+                        }, page["documents"], headers={'ETag': etag, 'Access-Control-Expose-Headers': 'ETag'})
 
                     except Exception as e:
                         print(f"[API] 获取文档列表失败: {e}")
@@ -661,39 +1435,58 @@ class WebAPI:
                             "error": f"获取失败: {str(e)}"
                         })
 
+                def handle_search(self):
+                    """处理全文检索请求: GET /api/search?q=关键词&limit=20&status=processed"""
+                    params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                    query = params.get('q', [''])[0].strip()
+                    if not query:
+                        self.send_json_response(400, {
+                            "success": False,
+                            "error": "缺少查询参数 q"
+                        })
+                        return
+
+                    try:
+                        limit = min(int(params.get('limit', [SEARCH_DEFAULT_LIMIT])[0]), MAX_PAGE_SIZE)
+                    except ValueError:
+                        self.send_json_response(400, {
+                            "success": False,
+                            "error": "limit 必须是整数"
+                        })
+                        return
+
+                    result = document_manager.search(query, limit, params.get('status', [None])[0])
+                    self.send_json_response(200, {
+                        "success": True,
+                        "data": result,
+                        "message": f"找到 {result['total']} 个文档"
+                    })
+
                 def handle_get_document(self, doc_id):
                     """处理获取单个文档请求"""
                     try:
-                        # 先在processed目录中查找
-                        processed_file = document_manager.admin_dir / "processed" / f"{doc_id}.json"
-                        content_file = document_manager.admin_dir / "processed" / f"{doc_id}.md"
+                        # 集合版本未变时用缓存的ETag比较，不读取文档
+                        cached_etag = document_manager.cached_document_etag(doc_id)
+                        if cached_etag and self.not_modified(cached_etag):
+                            return
 
-                        # 如果在processed目录中不存在，在pending目录中查找
-                        if not processed_file.exists():
-                            processed_file = document_manager.admin_dir / "pending" / f"{doc_id}.json"
-                            content_file = document_manager.admin_dir / "pending" / f"{doc_id}.md"
+                        document, etag = document_manager.get_document_with_etag(doc_id)
 
-                        if not processed_file.exists():
+                        if document is None:
                             self.send_json_response(404, {
                                 "success": False,
                                 "error": "文档不存在"
                             })
                             return
 
-                        # 加载文档元数据
-                        with open(processed_file, 'r', encoding='utf-8') as f:
-                            document = json.load(f)
-
-                        # 加载文档内容
-                        if content_file.exists():
-                            with open(content_file, 'r', encoding='utf-8') as f:
-                                document['content'] = f.read()
+                        if self.not_modified(etag):
+                            return
 
                         self.send_json_response(200, {
                             "success": True,
                             "data": document,
                             "message": "文档获取成功"
-                        })
+                        }, headers={'ETag': etag, 'Access-Control-Expose-Headers': 'ETag'})
 
                     except Exception as e:
                         print(f"[API] 获取文档失败: {e}")
@@ -798,26 +1591,11 @@ class WebAPI:
                             })
                             return
                         
-                        # 创建临时文件并导入
-                        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False, encoding='utf-8') as temp_file:
-                            temp_file.write(content)
-                            temp_file_path = temp_file.name
-                        
-                        try:
-                            doc = document_manager.import_document(temp_file_path, "web_upload")
-                            doc['filename'] = filename  # 使用原始文件名
-                            
-                            self.send_json_response(200, {
-                                "success": True,
-                                "data": doc,
-                                "message": "文档导入成功"
-                            })
-                        finally:
-                            # 清理临时文件
-                            try:
-                                os.unlink(temp_file_path)
-                            except:
-                                pass
+                        self.run_operation(
+                            "import",
+                            lambda progress: document_manager.import_content(content, filename, "web_upload"),
+                            "文档导入成功"
+                        )
                                 
                     except Exception as e:
                         print(f"[API] 文档导入失败: {e}")
@@ -826,6 +1604,95 @@ class WebAPI:
                             "error": f"导入失败: {str(e)}"
                         })
 
+                def handle_bulk_import(self):
+                    """处理批量导入请求
+
+                    请求体为JSON {"path": "..."} 时导入服务器上导入根目录（config.BULK_IMPORT_ROOT）下的目录或归档文件；
+                    否则请求体为归档文件本身，格式由 ?format=zip|tar 或 Content-Type 决定。
+                    """
+                    try:
+                        content_length = int(self.headers.get('Content-Length', 0))
+                        if content_length == 0:
+                            self.send_json_response(400, {
+                                "success": False,
+                                "error": "请求内容为空"
+                            })
+                            return
+
+                        params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                        source_label = params.get('source', ['bulk_upload'])[0]
+                        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+
+                        if content_type == 'application/json':
+                            try:
+                                data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+                                source = data['path']
+                            except (ValueError, KeyError, TypeError):
+                                self.send_json_response(400, {
+                                    "success": False,
+                                    "error": "请求需要包含 path 字段"
+                                })
+                                return
+                            try:
+                                source = document_manager.resolve_import_path(source)
+                            except PermissionError as e:
+                                self.send_json_response(403, {
+                                    "success": False,
+                                    "error": str(e)
+                                })
+                                return
+                            if not source.exists():
+                                self.send_json_response(400, {
+                                    "success": False,
+                                    "error": f"导入来源不存在: {source}"
+                                })
+                                return
+                            archive_format = None
+                        else:
+                            archive_format = params.get('format', [None])[0] or {
+                                'application/zip': 'zip',
+                                'application/x-zip-compressed': 'zip',
+                                'application/gzip': 'tar',
+                                'application/x-gzip': 'tar',
+                                'application/x-tar': 'tar'
+                            }.get(content_type)
+                            if archive_format not in ('zip', 'tar'):
+                                self.send_json_response(400, {
+                                    "success": False,
+                                    "error": "无法识别归档格式，请使用 ?format=zip 或 ?format=tar"
+                                })
+                                return
+                            if content_length > BULK_IMPORT_MAX_UPLOAD:
+                                # 不读取请求体，响应后关闭连接
+                                self.close_connection = True
+                                self.send_json_response(413, {
+                                    "success": False,
+                                    "error": f"归档过大（超过 {BULK_IMPORT_MAX_UPLOAD // 1024 // 1024}MB）"
+                                })
+                                return
+                            # 分块暂存请求体，较大的归档写入临时文件而不是整个读入内存
+                            source = spool(self.rfile, content_length)
+
+                        def run_import(progress):
+                            try:
+                                return document_manager.import_bulk(
+                                    source, source_label, archive_format, progress=progress
+                                )
+                            finally:
+                                if hasattr(source, 'close'):
+                                    source.close()
+
+                        if not self.run_operation("import", run_import, "批量导入完成"):
+                            if hasattr(source, 'close'):
+                                source.close()
+
+                    except Exception as e:
+                        print(f"[API] 批量导入失败: {e}")
+                        self.send_json_response(500, {
+                            "success": False,
+                            "error": f"批量导入失败: {str(e)}"
+                        })
+
                 def handle_process_document(self):
                     """处理文档处理请求"""
                     try:
@@ -855,13 +1722,11 @@ class WebAPI:
                             })
                             return
                         
-                        doc = document_manager.process_document(doc_id, data)
-                        
-                        self.send_json_response(200, {
-                            "success": True,
-                            "data": doc,
-                            "message": "文档处理成功"
-                        })
+                        self.run_operation(
+                            "process",
+                            lambda progress: document_manager.process_document(doc_id, data),
+                            "文档处理成功"
+                        )
                         
                     except Exception as e:
                         print(f"[API] 文档处理失败: {e}")
@@ -899,13 +1764,11 @@ class WebAPI:
                             })
                             return
                         
-                        doc = document_manager.publish_document(doc_id)
-                        
-                        self.send_json_response(200, {
-                            "success": True,
-                            "data": doc,
-                            "message": "文档发布成功"
-                        })
+                        self.run_operation(
+                            "publish",
+                            lambda progress: document_manager.publish_document(doc_id),
+                            "文档发布成功"
+                        )
 
                     except Exception as e:
                         print(f"[API] 文档发布失败: {e}")
@@ -914,9 +1777,56 @@ class WebAPI:
                             "error": f"发布失败: {str(e)}"
                         })
 
-            server = HTTPServer(('localhost', self.port), APIHandler)
+                def handle_publish_batch(self):
+                    """处理批量发布请求，请求体为 {"ids": [...]} 或 {"all_processed": true}"""
+                    try:
+                        content_length = int(self.headers.get('Content-Length', 0))
+                        if content_length == 0:
+                            self.send_json_response(400, {
+                                "success": False,
+                                "error": "请求内容为空"
+                            })
+                            return
 
-            print(f"✅ API服务器启动在 http://localhost:{self.port}")
+                        post_data = self.rfile.read(content_length)
+                        try:
+                            data = json.loads(post_data.decode('utf-8'))
+                        except json.JSONDecodeError as e:
+                            self.send_json_response(400, {
+                                "success": False,
+                                "error": f"无效的JSON数据: {str(e)}"
+                            })
+                            return
+
+                        doc_ids = data.get('ids') or []
+                        all_processed = bool(data.get('all_processed'))
+                        if not isinstance(doc_ids, list) or (not doc_ids and not all_processed):
+                            self.send_json_response(400, {
+                                "success": False,
+                                "error": "需要提供 ids 列表或 all_processed"
+                            })
+                            return
+
+                        self.run_operation(
+                            "publish",
+                            lambda progress: document_manager.publish_batch(
+                                doc_ids, all_processed=all_processed, progress=progress
+                            ),
+                            "批量发布完成"
+                        )
+
+                    except Exception as e:
+                        print(f"[API] 批量发布失败: {e}")
+                        self.send_json_response(500, {
+                            "success": False,
+                            "error": f"批量发布失败: {str(e)}"
+                        })
+
+            server = PooledHTTPServer(('localhost', self.port), APIHandler,
+                                      max_workers=self.max_workers, max_queue=self.max_queue)
+            self.server = server
+
+            print(f"✅ API服务器启动在 http://localhost:{self.port} (工作线程: {self.max_workers}, 队列: {self.max_queue})")
             print(f"🔍 健康检查: http://localhost:{self.port}/api/health")
             server.serve_forever()
 
@@ -925,6 +1835,14 @@ class WebAPI:
         except Exception as e:
             print(f"❌ 启动API服务器失败: {e}")
 
+    def stop_server(self):
+        """停止HTTP服务器（从其他线程调用）"""
+        server, self.server = self.server, None
+        if server:
+            server.shutdown()
+            server.server_close()
+        self.dm.search_index.save()
+
 
 if __name__ == "__main__":
     exit(main())
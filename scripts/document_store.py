@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档存储后端
+- FileDocumentStore: 默认后端，每个文档对应 admin/{pending,processed} 下的 .json 元数据文件，
+  正文按内容哈希存放在 admin/blobs 中
+- SQLiteDocumentStore: 单文件SQLite数据库（WAL模式），元数据与正文分表存储
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from document_index import DocumentIndex
+from blob_store import BlobStore
+from config import BLOB_DIR, BLOB_GC_GRACE, BLOB_GC_DELAY
+
+logger = logging.getLogger(__name__)
+
+# 文档所在位置，与 admin 目录下的子目录对应
+LOCATIONS = ("pending", "processed")
+
+# 文档字典中存放正文的字段，SQLite后端将其存入独立的内容表
+CONTENT_FIELDS = ("content", "processed_content")
+
+# 文件后端元数据中记录正文哈希的字段：{"body": ..., "content": ..., "processed_content": ...}
+BLOBS_FIELD = "blobs"
+
+
+class DocumentLoadError(Exception):
+    """文档存在但无法完整加载（元数据无法解析或引用的正文丢失）"""
+
+
+def _atomic_write(path: Path, text: str):
+    """先写临时文件再替换，并发读取时不会读到写了一半的文件"""
+    temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+class FileDocumentStore:
+    """基于 JSON 元数据文件和内容寻址正文的文档存储（默认）
+
+    正文和 content/processed_content 字段只以哈希形式记录在元数据中，相同内容只保存一份。
+    旧格式（正文在 .md 文件、字段内联在JSON中）的文档仍可读取，下次保存时转换为新格式。
+    """
+
+    backend = "file"
+
+    def __init__(self, admin_dir: Union[str, Path], gc_delay: Optional[float] = BLOB_GC_DELAY):
+        self.admin_dir = Path(admin_dir)
+        for location in LOCATIONS:
+            (self.admin_dir / location).mkdir(parents=True, exist_ok=True)
+        self.blobs = BlobStore(self.admin_dir / BLOB_DIR)
+
+        # 正文自动回收：保存或删除使旧正文失去引用后延迟 gc_delay 秒执行，期间的多次写入合并为一次
+        self.gc_delay = gc_delay
+        self._gc_timer: Optional[threading.Timer] = None
+        self._gc_lock = threading.Lock()
+
+        # 文档元数据索引，启动时加载一次，由写入路径保持最新
+        self._index = DocumentIndex({
+            location: self.admin_dir / location for location in LOCATIONS
+        })
+        self._index.load()
+
+        # 集合版本号，每次写入或发现外部修改时加一
+        self.version = 0
+        self._version_lock = threading.Lock()
+        # 内容与元数据都未变化、因而跳过的写入次数
+        self.skipped_writes = 0
+
+    def _bump_version(self):
+        with self._version_lock:
+            self.version += 1
+
+    def _paths(self, location: str, doc_id: str) -> Tuple[Path, Path]:
+        directory = self.admin_dir / location
+        return directory / f"{doc_id}.json", directory / f"{doc_id}.md"
+
+    def exists(self, location: str, doc_id: str) -> bool:
+        json_file, _ = self._paths(location, doc_id)
+        return json_file.exists()
+
+    def _read_legacy_body(self, md_file: Path) -> str:
+        if md_file.exists():
+            with open(md_file, 'r', encoding='utf-8') as f:
+                return f.read()
+        return ""
+
+    def _hydrate(self, sidecar: Dict, with_content: bool = True) -> Dict:
+        """把元数据中的正文哈希替换为正文字段"""
+        refs = sidecar.pop(BLOBS_FIELD, None) or {}
+        if with_content:
+            for field in CONTENT_FIELDS:
+                if field in refs:
+                    sidecar[field] = self._read_blob(sidecar.get("id"), field, refs[field])
+        return sidecar
+
+    def _read_blob(self, doc_id: Optional[str], field: str, digest: str) -> str:
+        """读取文档引用的正文，正文丢失时抛出 DocumentLoadError，不把丢失的正文当作空文本"""
+        text = self.blobs.get(digest)
+        if text is None:
+            raise DocumentLoadError(f"文档 {doc_id} 的 {field} 正文丢失: {digest}")
+        return text
+
+    def _dehydrate(self, document: Dict, body_ref: str) -> Dict:
+        """正文字段写入 blobs，返回只包含元数据和哈希的字典"""
+        sidecar = {k: v for k, v in document.items() if k not in CONTENT_FIELDS and k != BLOBS_FIELD}
+        refs = {"body": body_ref}
+        for field in CONTENT_FIELDS:
+            if document.get(field) is not None:
+                refs[field] = self.blobs.put(document[field])
+        sidecar[BLOBS_FIELD] = refs
+        return sidecar
+
+    def _write(self, location: str, doc_id: str, document: Dict, body_ref: str) -> bool:
+        """写入元数据文件，与索引中的当前内容相同时跳过，返回是否写入"""
+        json_file, md_file = self._paths(location, doc_id)
+        sidecar = self._dehydrate(document, body_ref)
+        previous = self._index.get(location, doc_id)
+        if previous == sidecar and json_file.exists():
+            with self._version_lock:
+                self.skipped_writes += 1
+            return False
+
+        _atomic_write(json_file, json.dumps(sidecar, ensure_ascii=False, indent=2))
+        # 转换为新格式后不再需要旧的 .md 文件
+        if md_file.exists():
+            md_file.unlink()
+        self._index.update(location, doc_id, sidecar)
+
+        old_refs = set(((previous or {}).get(BLOBS_FIELD) or {}).values())
+        if old_refs - set(sidecar[BLOBS_FIELD].values()):
+            self._schedule_gc()
+        return True
+
+    def load(self, location: str, doc_id: str) -> Optional[Tuple[Dict, str]]:
+        """加载文档元数据和正文，不存在时返回None"""
+        json_file, md_file = self._paths(location, doc_id)
+        if not json_file.exists():
+            return None
+
+        with open(json_file, 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+
+        refs = sidecar.get(BLOBS_FIELD)
+        if refs and "body" in refs:
+            body = self._read_blob(doc_id, "body", refs["body"])
+        else:
+            body = self._read_legacy_body(md_file)
+
+        return self._hydrate(sidecar), body
+
+    def save(self, location: str, doc_id: str, document: Dict, body: str) -> bool:
+        """保存文档元数据和正文，内容未变化时不写入，返回是否写入"""
+        written = self._write(location, doc_id, document, self.blobs.put(body))
+        if written:
+            self._bump_version()
+        return written
+
+    def save_many(self, location: str, items: List[Tuple[str, Dict, str]]):
+        """批量保存 (文档ID, 元数据, 正文)，整批只更新一次版本号"""
+        written = False
+        for doc_id, document, body in items:
+            written = self._write(location, doc_id, document, self.blobs.put(body)) or written
+        if written:
+            self._bump_version()
+
+    def save_metadata(self, location: str, doc_id: str, document: Dict) -> bool:
+        """只保存文档元数据，正文保持不变，返回是否写入"""
+        json_file, md_file = self._paths(location, doc_id)
+
+        body_ref = None
+        sidecar = self._index.get(location, doc_id)
+        if sidecar and sidecar.get(BLOBS_FIELD):
+            body_ref = sidecar[BLOBS_FIELD].get("body")
+        if body_ref is None:
+            body_ref = self.blobs.put(self._read_legacy_body(md_file))
+
+        written = self._write(location, doc_id, document, body_ref)
+        if written:
+            self._bump_version()
+        return written
+
+    def remove(self, location: str, doc_id: str) -> bool:
+        """删除文档，返回元数据文件是否存在；正文由延迟的自动回收或 gc_blobs 回收"""
+        json_file, md_file = self._paths(location, doc_id)
+        deleted = False
+
+        if json_file.exists():
+            json_file.unlink()
+            deleted = True
+        if md_file.exists():
+            md_file.unlink()
+
+        self._index.remove(location, doc_id)
+        if deleted:
+            self._bump_version()
+            self._schedule_gc()
+        return deleted
+
+    def convert_legacy(self) -> int:
+        """把旧格式（.md 正文、内联正文字段）的文档转换为内容寻址格式，返回转换数量"""
+        converted = 0
+        for location in LOCATIONS:
+            # 以文件名作为文档ID，与 load/save 的寻址方式一致
+            for json_file in sorted((self.admin_dir / location).glob("*.json")):
+                doc_id = json_file.stem
+                try:
+                    with open(json_file, 'r', encoding='utf-8') as f:
+                        if json.load(f).get(BLOBS_FIELD):
+                            continue
+                    document, body = self.load(location, doc_id)
+                except Exception as e:
+                    logger.warning(f"转换文档失败 {json_file}: {e}")
+                    continue
+                self._write(location, doc_id, document, self.blobs.put(body))
+                converted += 1
+        if converted:
+            self._bump_version()
+        return converted
+
+    def gc_blobs(self, grace: float = BLOB_GC_GRACE) -> Dict:
+        """回收没有任何文档引用的正文
+
+        回收前重新扫描元数据目录，其他进程写入的文档引用的正文也不会被删除；
+        存在无法解析的元数据文件时无法确定其引用，抛出 DocumentLoadError 且不删除任何正文。
+        """
+        self.refresh()
+        unreadable = self._index.unreadable()
+        if unreadable:
+            raise DocumentLoadError(
+                f"{len(unreadable)} 个元数据文件无法解析，跳过正文回收: {', '.join(map(str, unreadable[:5]))}")
+        referenced = set()
+        for location in LOCATIONS:
+            for sidecar in self._index.documents(location):
+                referenced.update((sidecar.get(BLOBS_FIELD) or {}).values())
+        return self.blobs.gc(referenced, grace)
+
+    def _schedule_gc(self, delay: Optional[float] = None):
+        """安排一次延迟的正文回收；已有待执行的回收时不重复安排"""
+        if self.gc_delay is None:
+            return
+        with self._gc_lock:
+            if self._gc_timer is None:
+                self._gc_timer = threading.Timer(
+                    self.gc_delay if delay is None else delay, self._gc_quietly)
+                self._gc_timer.daemon = True
+                self._gc_timer.start()
+
+    def _gc_quietly(self):
+        with self._gc_lock:
+            self._gc_timer = None
+        try:
+            stats = self.gc_blobs()
+        except (OSError, DocumentLoadError) as e:
+            logger.warning(f"正文垃圾回收失败: {e}")
+            return
+        # 仍在宽限期内的未引用正文，到期后再回收一次
+        if stats["next_expiry"] is not None:
+            self._schedule_gc(max(self.gc_delay, stats["next_expiry"]))
+
+    def refresh(self):
+        """通过mtime/size检查发现外部修改的文件"""
+        if self._index.refresh():
+            self._bump_version()
+
+    def list_documents(self, location: str, status: Optional[str] = None,
+                       with_content: bool = True) -> List[Dict]:
+        """列出指定位置的文档元数据"""
+        documents = self._index.documents(location)
+        if status:
+            documents = [doc for doc in documents if doc.get("status") == status]
+        for doc in documents:
+            self._hydrate(doc, with_content)
+            if not with_content:
+                for field in CONTENT_FIELDS:
+                    doc.pop(field, None)
+        return documents
+
+    def close(self):
+        with self._gc_lock:
+            if self._gc_timer:
+                self._gc_timer.cancel()
+                self._gc_timer = None
+
+
+class SQLiteDocumentStore:
+    """基于单文件SQLite数据库的文档存储
+
+    documents 表保存元数据，status/created_at/updated_at/title 均建有索引；
+    正文存放在 document_content 表中，元数据查询不会读取正文。
+    """
+
+    backend = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            location   TEXT NOT NULL,
+            id         TEXT NOT NULL,
+            title      TEXT,
+            status     TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            meta       TEXT NOT NULL,
+            PRIMARY KEY (location, id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_documents_status ON documents (status);
+        CREATE INDEX IF NOT EXISTS idx_documents_created_at ON documents (created_at);
+        CREATE INDEX IF NOT EXISTS idx_documents_updated_at ON documents (updated_at);
+        CREATE INDEX IF NOT EXISTS idx_documents_title ON documents (title);
+
+        CREATE TABLE IF NOT EXISTS document_content (
+            location          TEXT NOT NULL,
+            id                TEXT NOT NULL,
+            body              TEXT,
+            content           TEXT,
+            processed_content TEXT,
+            PRIMARY KEY (location, id)
+        );
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+        # 集合版本号，每次写入或发现其他连接提交时加一
+        self.version = 0
+        # 内容与元数据都未变化、因而跳过的写入次数
+        self.skipped_writes = 0
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    @staticmethod
+    def _split(document: Dict) -> Tuple[Dict, Dict]:
+        """拆分文档字典为元数据和正文字段"""
+        meta = {k: v for k, v in document.items() if k not in CONTENT_FIELDS}
+        content = {field: document.get(field) for field in CONTENT_FIELDS}
+        return meta, content
+
+    def exists(self, location: str, doc_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM documents WHERE location = ? AND id = ?",
+                (location, doc_id)
+            ).fetchone()
+        return row is not None
+
+    def load(self, location: str, doc_id: str) -> Optional[Tuple[Dict, str]]:
+        """加载文档元数据和正文，不存在时返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT d.meta, c.body, c.content, c.processed_content "
+                "FROM documents d LEFT JOIN document_content c "
+                "ON c.location = d.location AND c.id = d.id "
+                "WHERE d.location = ? AND d.id = ?",
+                (location, doc_id)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        meta, body, content, processed_content = row
+        document = json.loads(meta)
+        if content is not None:
+            document["content"] = content
+        if processed_content is not None:
+            document["processed_content"] = processed_content
+        return document, body or ""
+
+    def _upsert_metadata(self, location: str, doc_id: str, meta: Dict):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents "
+            "(location, id, title, status, created_at, updated_at, meta) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (location, doc_id, meta.get("title"), meta.get("status"),
+             meta.get("created_at"), meta.get("updated_at"),
+             json.dumps(meta, ensure_ascii=False))
+        )
+
+    def _unchanged(self, location: str, doc_id: str, meta: Dict,
+                   content: Optional[Tuple] = None) -> bool:
+        """与数据库中的当前内容比较；content 为 (body, content, processed_content)，None 表示只比较元数据"""
+        if content is None:
+            row = self._conn.execute(
+                "SELECT meta FROM documents WHERE location = ? AND id = ?", (location, doc_id)
+            ).fetchone()
+            return row is not None and json.loads(row[0]) == meta
+        row = self._conn.execute(
+            "SELECT d.meta, c.body, c.content, c.processed_content "
+            "FROM documents d JOIN document_content c ON c.location = d.location AND c.id = d.id "
+            "WHERE d.location = ? AND d.id = ?", (location, doc_id)
+        ).fetchone()
+        return row is not None and json.loads(row[0]) == meta and tuple(row[1:]) == content
+
+    def save(self, location: str, doc_id: str, document: Dict, body: str) -> bool:
+        """保存文档元数据和正文，内容未变化时不写入，返回是否写入"""
+        meta, content = self._split(document)
+        with self._lock, self._conn:
+            if self._unchanged(location, doc_id, meta,
+                               (body, content["content"], content["processed_content"])):
+                self.skipped_writes += 1
+                return False
+            self._upsert_metadata(location, doc_id, meta)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO document_content "
+                "(location, id, body, content, processed_content) VALUES (?, ?, ?, ?, ?)",
+                (location, doc_id, body, content["content"], content["processed_content"])
+            )
+            self.version += 1
+        return True
+
+    def save_many(self, location: str, items: List[Tuple[str, Dict, str]]):
+        """批量保存 (文档ID, 元数据, 正文)，整批在一个事务中写入"""
+        if not items:
+            return
+        rows, contents = [], []
+        for doc_id, document, body in items:
+            meta, content = self._split(document)
+            rows.append((location, doc_id, meta.get("title"), meta.get("status"),
+                         meta.get("created_at"), meta.get("updated_at"),
+                         json.dumps(meta, ensure_ascii=False)))
+            contents.append((location, doc_id, body, content["content"], content["processed_content"]))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents "
+                "(location, id, title, status, created_at, updated_at, meta) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO document_content "
+                "(location, id, body, content, processed_content) VALUES (?, ?, ?, ?, ?)", contents
+            )
+            self.version += 1
+
+    def save_metadata(self, location: str, doc_id: str, document: Dict) -> bool:
+        """只保存文档元数据，正文保持不变，返回是否写入"""
+        meta, _ = self._split(document)
+        with self._lock, self._conn:
+            if self._unchanged(location, doc_id, meta):
+                self.skipped_writes += 1
+                return False
+            self._upsert_metadata(location, doc_id, meta)
+            self.version += 1
+        return True
+
+    def remove(self, location: str, doc_id: str) -> bool:
+        """删除文档，返回文档是否存在"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM documents WHERE location = ? AND id = ?", (location, doc_id)
+            )
+            self._conn.execute(
+                "DELETE FROM document_content WHERE location = ? AND id = ?", (location, doc_id)
+            )
+            deleted = cursor.rowcount > 0
+            if deleted:
+                self.version += 1
+        return deleted
+
+    def refresh(self):
+        """数据库始终是最新的；其他连接（例如命令行）提交过修改时更新版本号"""
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._data_version = data_version
+                self.version += 1
+
+    def list_documents(self, location: str, status: Optional[str] = None,
+                       with_content: bool = True) -> List[Dict]:
+        """列出指定位置的文档元数据，状态过滤在SQL中完成"""
+        if with_content:
+            sql = ("SELECT d.meta, c.content, c.processed_content FROM documents d "
+                   "LEFT JOIN document_content c ON c.location = d.location AND c.id = d.id "
+                   "WHERE d.location = ?")
+        else:
+            sql = "SELECT d.meta, NULL, NULL FROM documents d WHERE d.location = ?"
+        params = [location]
+
+        if status:
+            sql += " AND d.status = ?"
+            params.append(status)
+        sql += " ORDER BY d.created_at DESC"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        documents = []
+        for meta, content, processed_content in rows:
+            document = json.loads(meta)
+            if content is not None:
+                document["content"] = content
+            if processed_content is not None:
+                document["processed_content"] = processed_content
+            documents.append(document)
+        return documents
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_document_store(backend: str, admin_dir: Union[str, Path],
+                          db_path: Optional[Union[str, Path]] = None):
+    """根据后端名称创建文档存储"""
+    admin_dir = Path(admin_dir)
+    if backend == "file":
+        return FileDocumentStore(admin_dir)
+    if backend == "sqlite":
+        return SQLiteDocumentStore(db_path or admin_dir / "documents.db")
+    raise ValueError(f"不支持的存储后端: {backend}")
+
+
+def migrate_to_sqlite(admin_dir: Union[str, Path],
+                      db_path: Optional[Union[str, Path]] = None) -> int:
+    """一次性将现有 admin/ 目录中的文件文档导入SQLite数据库，返回导入数量"""
+    admin_dir = Path(admin_dir)
+    source = FileDocumentStore(admin_dir)
+    target = SQLiteDocumentStore(db_path or admin_dir / "documents.db")
+
+    migrated = 0
+    try:
+        for location in LOCATIONS:
+            # 以文件名作为文档ID，与文件后端的寻址方式一致
+            for json_file in sorted((admin_dir / location).glob("*.json")):
+                doc_id = json_file.stem
+                try:
+                    loaded = source.load(location, doc_id)
+                except Exception as e:
+                    logger.warning(f"迁移文档失败 {json_file}: {e}")
+                    continue
+                if loaded is None:
+                    continue
+                target.save(location, doc_id, *loaded)
+                migrated += 1
+    finally:
+        target.close()
+
+    logger.info(f"已迁移 {migrated} 个文档到 {target.db_path}")
+    return migrated
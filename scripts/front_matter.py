@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Front Matter 解析与生成 - 支持 YAML（---）和 TOML（+++）
+- 只匹配文档开头的头部，不扫描正文；读取文件时读到结束分隔符即停止
+- 安装了 PyYAML 时用它解析 YAML，否则使用内置的子集解析器；TOML 使用 tomllib（或 tomli）
+- 生成时保留未知字段，字符串统一加引号转义，标题中的引号不会破坏格式
+- 按 (路径, 修改时间, 大小) 缓存文件头部的解析结果
+"""
+
+import re
+import json
+import threading
+import datetime
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from config import FRONT_MATTER_CACHE_SIZE
+
+YAML = "yaml"
+TOML = "toml"
+
+DELIMITERS = {"---": YAML, "+++": TOML}
+FORMAT_DELIMITERS = {YAML: "---", TOML: "+++"}
+
+_BLOCK_RE = re.compile(r'\ufeff?(---|\+\+\+)[^\S\n]*\n(?:(.*?)\n)?\1[^\S\n]*(?:\n|$)', re.DOTALL)
+_BARE_KEY_RE = re.compile(r'[A-Za-z0-9_-]+$')
+
+
+class FrontMatterError(ValueError):
+    """Front Matter 格式错误"""
+
+
+def split(text: str) -> Tuple[Optional[str], Optional[str], str]:
+    """拆分为 (格式, 头部文本, 正文)；没有 Front Matter 时返回 (None, None, 原文)"""
+    match = _BLOCK_RE.match(text)
+    if not match:
+        return None, None, text
+    return DELIMITERS[match.group(1)], match.group(2) or "", text[match.end():]
+
+
+def body_offset(text: str) -> int:
+    """正文在原文中的起始位置"""
+    match = _BLOCK_RE.match(text)
+    return match.end() if match else 0
+
+
+def parse_header(header: str, fmt: str = YAML) -> Dict[str, Any]:
+    """解析头部文本（不含分隔符），日期时间统一转换为 ISO 字符串"""
+    try:
+        if fmt == TOML:
+            data = tomllib.loads(header) if tomllib else _parse_toml_subset(header)
+        elif yaml is not None:
+            data = yaml.safe_load(header)
+        else:
+            data = _parse_yaml_subset(header)
+    except FrontMatterError:
+        raise
+    except Exception as e:
+        raise FrontMatterError(f"无法解析 {fmt} Front Matter: {e}")
+
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise FrontMatterError("Front Matter 必须是键值映射")
+    return _normalize(data)
+
+
+def parse(text: str) -> Tuple[Dict[str, Any], str, Optional[str]]:
+    """解析文本，返回 (元数据, 正文, 格式)"""
+    fmt, header, body = split(text)
+    if fmt is None:
+        return {}, text, None
+    return parse_header(header, fmt), body, fmt
+
+
+def dump(meta: Dict[str, Any], fmt: str = YAML) -> str:
+    """生成带分隔符的 Front Matter 块（不含结尾换行）"""
+    meta = _normalize(meta)
+    lines = _dump_toml(meta) if fmt == TOML else _dump_yaml(meta, 0)
+    delimiter = FORMAT_DELIMITERS[fmt]
+    return "\n".join([delimiter, *lines, delimiter])
+
+
+def update(text: str, changes: Dict[str, Any], fmt: Optional[str] = None) -> str:
+    """合并修改到文本的 Front Matter，保留其他字段和正文"""
+    meta, body, existing_fmt = parse(text)
+    meta.update(changes)
+    return dump(meta, fmt or existing_fmt or YAML) + "\n" + body
+
+
+# ---- 文件头部缓存 ----
+
+_header_cache: "OrderedDict[str, Tuple[int, int, Dict[str, Any]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def read_header(path: Union[str, Path]) -> Dict[str, Any]:
+    """读取文件的 Front Matter，只读取头部；文件未变化时返回缓存的结果（调用方不应修改）"""
+    path = Path(path)
+    stat = path.stat()
+    key = str(path)
+
+    with _cache_lock:
+        cached = _header_cache.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            _header_cache.move_to_end(key)
+            return cached[2]
+
+    meta = _read_header_uncached(path)
+    with _cache_lock:
+        _header_cache[key] = (stat.st_mtime_ns, stat.st_size, meta)
+        while len(_header_cache) > FRONT_MATTER_CACHE_SIZE:
+            _header_cache.popitem(last=False)
+    return meta
+
+
+def _read_header_uncached(path: Path) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        delimiter = f.readline().rstrip()
+        fmt = DELIMITERS.get(delimiter)
+        if fmt is None:
+            return {}
+        lines = []
+        for line in f:
+            if line.rstrip() == delimiter:
+                return parse_header("".join(lines), fmt)
+            lines.append(line)
+    # 没有结束分隔符，不是 Front Matter
+    return {}
+
+
+def clear_cache():
+    with _cache_lock:
+        _header_cache.clear()
+
+
+# ---- 值的规范化与生成 ----
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _key(key: str) -> str:
+    return key if _BARE_KEY_RE.match(key) else json.dumps(key, ensure_ascii=False)
+
+
+def _scalar(value: Any) -> str:
+    """JSON 字面量同时是合法的 YAML 流式值和 TOML 值（null 除外，由调用方处理）"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _dump_yaml(meta: Dict[str, Any], indent: int) -> list:
+    pad = "  " * indent
+    lines = []
+    for key, value in meta.items():
+        if isinstance(value, dict) and value:
+            lines.append(f"{pad}{_key(key)}:")
+            lines.extend(_dump_yaml(value, indent + 1))
+        else:
+            lines.append(f"{pad}{_key(key)}: {_scalar(value)}")
+    return lines
+
+
+def _toml_value(value: Any) -> str:
+    if isinstance(value, dict):
+        items = ", ".join(f"{_key(k)} = {_toml_value(v)}" for k, v in value.items() if v is not None)
+        return "{" + items + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(_toml_value(v) for v in value if v is not None) + "]"
+    return _scalar(value)
+
+
+def _dump_toml(meta: Dict[str, Any], prefix: str = "") -> list:
+    lines, tables = [], []
+    for key, value in meta.items():
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            tables.append((key, value))
+        else:
+            lines.append(f"{_key(key)} = {_toml_value(value)}")
+    for key, value in tables:
+        name = f"{prefix}.{_key(key)}" if prefix else _key(key)
+        lines.append("")
+        lines.append(f"[{name}]")
+        lines.extend(_dump_toml(value, name))
+    return lines
+
+
+# ---- 未安装 PyYAML / tomllib 时使用的子集解析器 ----
+
+def _strip_comment(text: str) -> str:
+    """去掉引号外的 # 注释"""
+    quote = None
+    escaped = False
+    for i, ch in enumerate(text):
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == '\\' and quote == '"':
+                escaped = True
+            elif ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch == '#' and (i == 0 or text[i - 1] in ' \t'):
+            return text[:i].rstrip()
+    return text.strip()
+
+
+def _split_flow(text: str) -> list:
+    """按顶层逗号拆分流式序列的内容"""
+    items, depth, quote, start = [], 0, None, 0
+    escaped = False
+    for i, ch in enumerate(text):
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == '\\' and quote == '"':
+                escaped = True
+            elif ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch in '[{':
+            depth += 1
+        elif ch in ']}':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            items.append(text[start:i])
+            start = i + 1
+    items.append(text[start:])
+    return [item.strip() for item in items if item.strip()]
+
+
+def _yaml_scalar(text: str) -> Any:
+    text = _strip_comment(text)
+    if not text:
+        return None
+    if text[0] == '"':
+        return json.loads(text)
+    if text[0] == "'":
+        return text[1:-1].replace("''", "'")
+    if text[0] == '[' and text.endswith(']'):
+        return [_yaml_scalar(item) for item in _split_flow(text[1:-1])]
+    if text[0] == '{' and text.endswith('}'):
+        result = {}
+        for item in _split_flow(text[1:-1]):
+            key, _, value = item.partition(':')
+            result[key.strip().strip('"\'')] = _yaml_scalar(value)
+        return result
+    lower = text.lower()
+    if lower in ('true', 'yes', 'on'):
+        return True
+    if lower in ('false', 'no', 'off'):
+        return False
+    if lower in ('null', '~'):
+        return None
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _parse_yaml_subset(text: str) -> Dict[str, Any]:
+    """解析常见的 Front Matter 写法：标量、流式列表/映射、块列表、嵌套映射、| 和 > 块文本"""
+    lines = [line for line in text.splitlines() if line.strip() and not line.lstrip().startswith('#')]
+    result, _ = _parse_yaml_block(lines, 0, 0)
+    return result
+
+
+def _indent_of(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+
+def _parse_yaml_block(lines: list, start: int, indent: int) -> Tuple[Any, int]:
+    result: Any = None
+    i = start
+    while i < len(lines):
+        line = lines[i]
+        current = _indent_of(line)
+        if current < indent:
+            break
+        stripped = line.strip()
+
+        if stripped.startswith('- ') or stripped == '-':
+            if result is None:
+                result = []
+            if not isinstance(result, list):
+                raise FrontMatterError(f"无法解析的行: {stripped}")
+            result.append(_yaml_scalar(stripped[1:]))
+            i += 1
+            continue
+
+        key, sep, value = stripped.partition(':')
+        if not sep:
+            raise FrontMatterError(f"无法解析的行: {stripped}")
+        if result is None:
+            result = {}
+        if not isinstance(result, dict):
+            raise FrontMatterError(f"无法解析的行: {stripped}")
+        key = key.strip().strip('"\'')
+        value = _strip_comment(value)
+        i += 1
+
+        if value in ('|', '>', '|-', '>-'):
+            block = []
+            while i < len(lines) and _indent_of(lines[i]) > current:
+                block.append(lines[i].strip())
+                i += 1
+            result[key] = ("\n" if value[0] == '|' else " ").join(block)
+        elif value:
+            result[key] = _yaml_scalar(value)
+        elif i < len(lines) and (_indent_of(lines[i]) > current or lines[i].strip().startswith('- ')):
+            result[key], i = _parse_yaml_block(lines, i, _indent_of(lines[i]))
+        else:
+            result[key] = None
+    return (result if result is not None else {}), i
+
+
+def _parse_toml_subset(text: str) -> Dict[str, Any]:
+    """解析 key = value 与 [table] 形式，值按 JSON 字面量解析"""
+    result: Dict[str, Any] = {}
+    table = result
+    for raw in text.splitlines():
+        line = _strip_comment(raw)
+        if not line:
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            table = result
+            for part in line[1:-1].split('.'):
+                table = table.setdefault(part.strip().strip('"'), {})
+            continue
+        key, sep, value = line.partition('=')
+        if not sep:
+            raise FrontMatterError(f"无法解析的行: {line}")
+        value = value.strip()
+        if value.startswith("'") and value.endswith("'"):
+            parsed = value[1:-1]
+        else:
+            try:
+                parsed = json.loads(value)
+            except ValueError:
+                parsed = value
+        table[key.strip().strip('"')] = parsed
+    return result
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务队列 - 将耗时的文档操作移出HTTP请求线程
+每种操作类型拥有独立的固定大小工作线程池
+"""
+
+import time
+import uuid
+import queue
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """操作的任务队列已满"""
+
+
+class Job:
+    """后台任务"""
+
+    def __init__(self, operation: str, func: Callable):
+        self.id = f"job_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        self.operation = operation
+        self.func = func
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def report(self, progress: Optional[float], message: str = ""):
+        """更新任务进度（0~1）；总量未知时传入None，只更新消息，进度显示为null"""
+        with self._lock:
+            self.progress = None if progress is None else max(0.0, min(1.0, float(progress)))
+            if message:
+                self.message = message
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "operation": self.operation,
+                "status": self.status,
+                "progress": self.progress,
+                "message": self.message,
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+
+
+class JobManager:
+    """按操作类型划分工作线程池的任务管理器
+
+    pool_sizes 指定每种操作的工作线程数，未配置的操作使用 default_workers。
+    每种操作最多排队 max_queue 个未开始的任务，队列满时 submit 抛出 JobQueueFull。
+    已结束的任务最多保留 max_finished 个，超出后丢弃最早的。
+    """
+
+    def __init__(self, pool_sizes: Optional[Dict[str, int]] = None,
+                 default_workers: int = 1, max_finished: int = 200,
+                 max_queue: int = 16):
+        self.pool_sizes = dict(pool_sizes or {})
+        self.default_workers = default_workers
+        self.max_finished = max_finished
+        self.max_queue = max(1, max_queue)
+
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queues: Dict[str, queue.Queue] = {}
+
+    def submit(self, operation: str, func: Callable) -> Job:
+        """提交任务；func 接收一个进度回调 progress(fraction, message)
+
+        该操作的队列已满时抛出 JobQueueFull，任务不会被记录
+        """
+        job = Job(operation, func)
+        with self._lock:
+            job_queue = self._queues.get(operation)
+            if job_queue is None:
+                job_queue = self._start_pool(operation)
+            try:
+                job_queue.put_nowait(job)
+            except queue.Full:
+                raise JobQueueFull(f"{operation} 任务队列已满（{self.max_queue}）")
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> list:
+        """最近的任务，新任务在前"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in reversed(jobs)]
+
+    def _start_pool(self, operation: str) -> queue.Queue:
+        job_queue = queue.Queue(maxsize=self.max_queue)
+        self._queues[operation] = job_queue
+        workers = max(1, self.pool_sizes.get(operation, self.default_workers))
+        for i in range(workers):
+            threading.Thread(
+                target=self._worker, args=(job_queue,),
+                name=f"job-{operation}-{i}", daemon=True
+            ).start()
+        logger.info(f"任务线程池已启动: {operation} ({workers} 个线程)")
+        return job_queue
+
+    def _worker(self, job_queue: queue.Queue):
+        while True:
+            job = job_queue.get()
+            with job._lock:
+                job.status = RUNNING
+                job.started_at = time.time()
+
+            try:
+                result = job.func(job.report)
+                with job._lock:
+                    job.result = result
+                    job.status = SUCCEEDED
+                    job.progress = 1.0
+            except Exception as e:
+                logger.error(f"任务执行失败 {job.id} ({job.operation}): {e}")
+                with job._lock:
+                    job.error = str(e)
+                    job.status = FAILED
+            finally:
+                with job._lock:
+                    job.finished_at = time.time()
+                self._prune()
+
+    def _prune(self):
+        """丢弃最早的已结束任务"""
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items()
+                        if job.status in (SUCCEEDED, FAILED)]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job_id]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                "pools": {op: max(1, self.pool_sizes.get(op, self.default_workers))
+                          for op in self._queues},
+                "queued": {op: job_queue.qsize() for op, job_queue in self._queues.items()},
+                "max_queue": self.max_queue,
+                "jobs": counts
+            }
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+子进程输出泵 - 持续读取 stdout/stderr，避免管道写满导致子进程阻塞
+最近的输出保存在有界环形缓冲区中，可选写入滚动日志文件
+"""
+
+import re
+import time
+import threading
+import logging
+import logging.handlers
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Hugo 每次构建结束时输出 "Total in 123 ms"
+BUILD_TIME_PATTERN = re.compile(r'Total in (\d+(?:\.\d+)?)\s*ms')
+
+# 进程内已注册的输出泵，按名称查找（例如 API 通过 "hugo" 获取 Hugo 日志）
+_pumps: Dict[str, "LogPump"] = {}
+_pumps_lock = threading.Lock()
+
+
+def get_pump(name: str) -> Optional["LogPump"]:
+    """获取已注册的输出泵"""
+    with _pumps_lock:
+        return _pumps.get(name)
+
+
+class LogPump:
+    """持续读取子进程输出的日志泵"""
+
+    def __init__(self, process, name: str = "hugo", max_lines: int = 1000,
+                 log_file: Optional[Union[str, Path]] = None,
+                 max_bytes: int = 1024 * 1024, backup_count: int = 3):
+        self.process = process
+        self.name = name
+
+        self._lines = deque(maxlen=max_lines)
+        self._build_times = deque(maxlen=100)
+        self._cond = threading.Condition()
+        self._line_count = 0
+        self._threads: List[threading.Thread] = []
+
+        # 可选的滚动日志文件
+        self._file_logger = None
+        if log_file:
+            log_path = Path(log_file)
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._file_logger = logging.getLogger(f"{__name__}.{name}")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.handlers = [handler]
+
+    def start(self) -> "LogPump":
+        """启动读取线程并注册到进程内"""
+        for stream_name in ("stdout", "stderr"):
+            stream = getattr(self.process, stream_name, None)
+            if stream is None:
+                continue
+            thread = threading.Thread(
+                target=self._drain, args=(stream_name, stream),
+                name=f"{self.name}-{stream_name}-pump", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        with _pumps_lock:
+            _pumps[self.name] = self
+        return self
+
+    def _drain(self, stream_name: str, stream):
+        try:
+            for line in iter(stream.readline, ''):
+                self._append(stream_name, line.rstrip('\r\n'))
+        except (OSError, ValueError) as e:
+            logger.debug(f"{self.name} {stream_name} 读取结束: {e}")
+
+    def _append(self, stream_name: str, line: str):
+        entry = {"time": time.time(), "stream": stream_name, "line": line}
+
+        with self._cond:
+            self._lines.append(entry)
+            self._line_count += 1
+            match = BUILD_TIME_PATTERN.search(line)
+            if match:
+                self._build_times.append({"time": entry["time"], "ms": float(match.group(1))})
+            self._cond.notify_all()
+
+        if self._file_logger:
+            self._file_logger.info(f"[{stream_name}] {line}")
+
+    def wait_for(self, pattern: Union[str, "re.Pattern"], timeout: float) -> Optional[str]:
+        """等待匹配指定正则的输出行，超时或进程退出时返回None"""
+        regex = re.compile(pattern) if isinstance(pattern, str) else pattern
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            # 行号为进程启动以来的绝对序号，缓冲区中最早的一行为 first
+            next_line = self._line_count - len(self._lines)
+            while True:
+                first = self._line_count - len(self._lines)
+                new_lines = list(self._lines)[max(next_line, first) - first:]
+                next_line = self._line_count
+                for entry in new_lines:
+                    if regex.search(entry["line"]):
+                        return entry["line"]
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.process.poll() is not None:
+                    return None
+                self._cond.wait(min(remaining, 0.5))
+
+    def join(self, timeout: float = 2.0):
+        """等待读取线程结束（进程退出后确保输出已全部读取）"""
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def lines(self, limit: int = 200, stream: Optional[str] = None) -> List[Dict]:
+        """最近的输出行"""
+        with self._cond:
+            entries = [e for e in self._lines if stream is None or e["stream"] == stream]
+        return entries[-limit:] if limit else entries
+
+    def text(self, stream: Optional[str] = None) -> str:
+        """缓冲区中的输出文本"""
+        return "\n".join(e["line"] for e in self.lines(0, stream))
+
+    def build_times(self) -> List[Dict]:
+        """解析出的Hugo构建耗时（毫秒）"""
+        with self._cond:
+            return list(self._build_times)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            times = [t["ms"] for t in self._build_times]
+            return {
+                "name": self.name,
+                "running": self.process.poll() is None,
+                "total_lines": self._line_count,
+                "buffered_lines": len(self._lines),
+                "builds": len(times),
+                "last_build_ms": times[-1] if times else None,
+                "avg_build_ms": sum(times) / len(times) if times else None
+            }
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown 文档分析 - 一次逐行扫描同时得到标题、字数、阅读时间、目录、摘要、图片/链接引用和 Front Matter
+分析结果按内容哈希缓存，内容未变的保存不再重复分析
+"""
+
+import re
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import front_matter
+from config import ANALYZER_CACHE_SIZE, READING_WORDS_PER_MINUTE, EXCERPT_LENGTH
+
+_HEADING_RE = re.compile(r'(#{1,6})\s+(.+?)\s*#*\s*$')
+_FENCE_RE = re.compile(r'\s{0,3}(```|~~~)')
+
+# 字数：一个汉字计一个字；拉丁单词之间只隔着 Markdown 符号（#*`_[]()）时视为同一个词
+_WORD_RE = re.compile(r'[\u4e00-\u9fa5]|[a-zA-Z]+(?:[#*`_\[\]()]+[a-zA-Z]+)*')
+
+# 图片 ![alt](src "title") 与链接 [text](href "title")
+_REFERENCE_RE = re.compile(r'(!?)\[([^\]]*)\]\(\s*<?([^)\s>]+)>?(?:\s+["\'][^)]*["\'])?\s*\)')
+
+# 摘要中去掉的行首块标记（引用、列表、表格）和行内强调符号
+_BLOCK_MARK_RE = re.compile(r'^\s*(?:>\s*)*(?:[-*+]\s+|\d+[.)]\s+|\|)?')
+_INLINE_MARK_RE = re.compile(r'[*_`~|]+')
+
+
+class MarkdownAnalysis:
+    """一次分析的结果，作为缓存值共享，调用方不应修改"""
+
+    __slots__ = ("title", "heading_title", "word_count", "reading_time", "outline", "excerpt",
+                 "images", "links", "front_matter", "front_matter_format", "body_offset")
+
+    def __init__(self):
+        self.title: Optional[str] = None          # Front Matter 中的 title，其次为第一个一级标题
+        self.heading_title: Optional[str] = None  # 第一个一级标题
+        self.word_count = 0
+        self.reading_time = 0                     # 分钟
+        self.outline: List[Dict] = []             # [{"level": 2, "text": "..."}]
+        self.excerpt = ""                         # 正文开头的纯文本，最多 EXCERPT_LENGTH 个字符
+        self.images: List[Dict] = []              # [{"alt": "...", "src": "..."}]
+        self.links: List[Dict] = []               # [{"text": "...", "href": "..."}]
+        self.front_matter: Dict = {}              # 解析后的 Front Matter，格式错误时为空
+        self.front_matter_format: Optional[str] = None  # "yaml" / "toml"
+        self.body_offset = 0                      # 正文（去掉 Front Matter 后）在原文中的起始位置
+
+    def body(self, content: str) -> str:
+        """去掉 Front Matter 后的正文"""
+        return content[self.body_offset:]
+
+    def to_dict(self) -> Dict:
+        return {
+            "title": self.title,
+            "word_count": self.word_count,
+            "reading_time": self.reading_time,
+            "outline": self.outline,
+            "excerpt": self.excerpt,
+            "images": self.images,
+            "links": self.links,
+            "front_matter": self.front_matter
+        }
+
+
+def analyze(content: str) -> MarkdownAnalysis:
+    """分析 Markdown 文本（不使用缓存）"""
+    result = MarkdownAnalysis()
+
+    fmt, header, body = front_matter.split(content)
+    if fmt is not None:
+        result.front_matter_format = fmt
+        result.body_offset = len(content) - len(body)
+        try:
+            result.front_matter = front_matter.parse_header(header, fmt)
+        except front_matter.FrontMatterError:
+            pass
+
+    words = 0
+    in_fence = None
+    excerpt = []
+    excerpt_length = 0
+    for line in content[result.body_offset:].splitlines():
+        words += len(_WORD_RE.findall(line))
+
+        fence = _FENCE_RE.match(line)
+        if fence:
+            marker = fence.group(1)
+            if in_fence is None:
+                in_fence = marker
+            elif in_fence == marker:
+                in_fence = None
+            continue
+        if in_fence:
+            continue
+
+        if line.startswith('#'):
+            heading = _HEADING_RE.match(line)
+            if heading:
+                level, text = len(heading.group(1)), heading.group(2).strip()
+                result.outline.append({"level": level, "text": text})
+                if level == 1 and result.heading_title is None:
+                    result.heading_title = text
+        elif excerpt_length <= EXCERPT_LENGTH:
+            # 图片去掉，链接只保留文字
+            text = _REFERENCE_RE.sub(lambda m: '' if m.group(1) else m.group(2), line)
+            text = _INLINE_MARK_RE.sub('', _BLOCK_MARK_RE.sub('', text)).strip()
+            if text:
+                excerpt.append(text)
+                excerpt_length += len(text) + 1
+
+        if '](' in line:
+            for is_image, text, target in _REFERENCE_RE.findall(line):
+                if is_image:
+                    result.images.append({"alt": text, "src": target})
+                else:
+                    result.links.append({"text": text, "href": target})
+
+    result.word_count = words
+    result.excerpt = ' '.join(excerpt)
+    if len(result.excerpt) > EXCERPT_LENGTH:
+        result.excerpt = result.excerpt[:EXCERPT_LENGTH] + '...'
+    result.reading_time = math.ceil(words / READING_WORDS_PER_MINUTE) if words else 0
+    title = result.front_matter.get("title")
+    result.title = str(title) if title else result.heading_title
+    return result
+
+
+class AnalysisCache:
+    """按内容哈希缓存分析结果的 LRU"""
+
+    def __init__(self, max_entries: int = ANALYZER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, MarkdownAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def analyze(self, content: str) -> MarkdownAnalysis:
+        key = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = analyze(content)
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+_cache = AnalysisCache()
+
+
+def analyze_cached(content: str) -> MarkdownAnalysis:
+    """分析 Markdown 文本，相同内容直接返回缓存的结果"""
+    return _cache.analyze(content)
+
+
+def cache_stats() -> Dict:
+    return _cache.stats()
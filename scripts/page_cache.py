@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+管理后台页面缓存 - 模板渲染后的UTF-8字节连同 Content-Length 和 ETag 一起缓存
+较大的页面同时保存预压缩的 gzip/br 版本
+模板文件的修改时间或大小变化时重新渲染，页面请求只需一次字典查找和一次写出
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from compression import SUPPORTED_ENCODINGS, choose_encoding, compress
+from config import COMPRESS_MIN_SIZE
+
+
+class CachedPage:
+    """可直接发送的页面"""
+
+    __slots__ = ("body", "etag", "content_length", "mtime_ns", "size", "variants")
+
+    def __init__(self, body: bytes, mtime_ns: int, size: int):
+        self.body = body
+        self.content_length = str(len(body))
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        self.mtime_ns = mtime_ns
+        self.size = size
+        # 编码 -> (压缩后的字节, Content-Length, ETag)
+        self.variants: Dict[str, Tuple[bytes, str, str]] = {}
+        if len(body) >= COMPRESS_MIN_SIZE:
+            for encoding in SUPPORTED_ENCODINGS:
+                compressed = compress(body, encoding)
+                self.variants[encoding] = (compressed, str(len(compressed)),
+                                           f'{self.etag[:-1]}-{encoding}"')
+
+
+class PageCache:
+    """按 (模板路径, 渲染变体) 缓存渲染结果
+
+    变体用于区分依赖外部参数的渲染结果，例如页面中引用的 Hugo 服务器地址。
+    """
+
+    def __init__(self):
+        self._pages: Dict[Tuple[str, str], CachedPage] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, render: Callable[[str], str], variant: str = "") -> Optional[CachedPage]:
+        """获取页面，模板不存在时返回None"""
+        key = (str(path), variant)
+        try:
+            stat = path.stat()
+        except OSError:
+            with self._lock:
+                self._pages.pop(key, None)
+            return None
+
+        page = self._pages.get(key)
+        if page and page.mtime_ns == stat.st_mtime_ns and page.size == stat.st_size:
+            return page
+
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        page = CachedPage(render(content).encode('utf-8'), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            self._pages[key] = page
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+
+def send_page(handler, page: CachedPage, cache_control: Optional[str] = 'no-cache'):
+    """发送缓存的页面，按 Accept-Encoding 选择预压缩版本；请求带有匹配的 If-None-Match 时返回304"""
+    encoding = choose_encoding(handler.headers.get('Accept-Encoding')) if page.variants else None
+    if encoding in page.variants:
+        body, content_length, etag = page.variants[encoding]
+    else:
+        encoding = None
+        body, content_length, etag = page.body, page.content_length, page.etag
+
+    if handler.headers.get('If-None-Match') == etag:
+        handler.send_response(304)
+        handler.send_header('ETag', etag)
+        handler.send_header('Vary', 'Accept-Encoding')
+        if cache_control:
+            handler.send_header('Cache-Control', cache_control)
+        handler.end_headers()
+        return
+
+    handler.send_response(200)
+    handler.send_header('Content-type', 'text/html; charset=utf-8')
+    handler.send_header('Content-Length', content_length)
+    handler.send_header('ETag', etag)
+    handler.send_header('Vary', 'Accept-Encoding')
+    if encoding:
+        handler.send_header('Content-Encoding', encoding)
+    if cache_control:
+        handler.send_header('Cache-Control', cache_control)
+    handler.end_headers()
+    handler.wfile.write(body)
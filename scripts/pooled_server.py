@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+固定大小工作线程池的HTTP服务器
+请求由工作线程并发处理，线程全忙时进入有界队列，队列满时直接返回503
+"""
+
+import json
+import queue
+import socket
+import threading
+import logging
+from http.server import HTTPServer
+
+logger = logging.getLogger(__name__)
+
+# 拒绝请求时最多读掉的已到达请求数据
+REJECT_DRAIN_BYTES = 256 * 1024
+
+
+class PooledHTTPServer(HTTPServer):
+    """带有界工作线程池的HTTP服务器"""
+
+    def __init__(self, server_address, handler_class, max_workers: int = 8, max_queue: int = 32,
+                 name: str = "api"):
+        super().__init__(server_address, handler_class)
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0   # 正在处理和排队中的请求数
+        self._busy = 0      # 正在处理的请求数
+        self._rejected = 0  # 因饱和被拒绝的请求数
+
+        self._workers = []
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._worker, name=f"{name}-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def process_request(self, request, client_address):
+        """将请求交给工作线程；线程池和队列都已满时返回503"""
+        with self._lock:
+            saturated = self._pending >= self.max_workers + self.max_queue
+            if saturated:
+                self._rejected += 1
+            else:
+                self._pending += 1
+
+        if saturated:
+            self._reject(request)
+            self.shutdown_request(request)
+            return
+
+        self._requests.put((request, client_address))
+
+    def _worker(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                break
+
+            request, client_address = item
+            with self._lock:
+                self._busy += 1
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                with self._lock:
+                    self._busy -= 1
+                    self._pending -= 1
+
+    @staticmethod
+    def _reject(request):
+        """直接在套接字上写出503响应"""
+        body = json.dumps({
+            "success": False,
+            "error": "服务器繁忙，请稍后重试"
+        }, ensure_ascii=False).encode('utf-8')
+        head = (
+            "HTTP/1.1 503 Service Unavailable\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            "Retry-After: 1\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode('ascii')
+        # 在接受连接的线程上执行，全程不阻塞：响应很小，新连接的发送缓冲区可以立即容纳
+        request.setblocking(False)
+        try:
+            request.sendall(head + body)
+            request.shutdown(socket.SHUT_WR)
+        except OSError as e:
+            logger.debug(f"发送503响应失败: {e}")
+            return
+        # 只读掉已到达的请求数据（最多 REJECT_DRAIN_BYTES 字节），避免关闭时连接被重置；不等待后续数据
+        drained = 0
+        try:
+            while drained < REJECT_DRAIN_BYTES:
+                data = request.recv(65536)
+                if not data:
+                    break
+                drained += len(data)
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        """线程池状态"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "busy": self._busy,
+                "queued": self._pending - self._busy,
+                "rejected": self._rejected
+            }
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._workers:
+            self._requests.put(None)
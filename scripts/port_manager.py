@@ -4,10 +4,18 @@
 端口管理工具 - 解决端口冲突问题
 """
 
+import errno
 import socket
 import subprocess
 import platform
-from typing import List, Tuple, Optional
+import random
+import threading
+from typing import Iterable, Iterator, List, Tuple, Optional
+
+import port_registry
+
+# bind 因端口被占用而失败时的错误码（含 Windows 的 WSAEADDRINUSE / WSAEACCES）
+_IN_USE_ERRNOS = {errno.EADDRINUSE, errno.EACCES, 10048, 10013}
 
 class PortManager:
     """端口管理器 - 自动检测和分配可用端口"""
@@ -16,40 +24,88 @@ class PortManager:
     DEFAULT_HUGO_PORTS = [8000, 8001, 8002, 3000, 8888, 9090]
     DEFAULT_API_PORTS = [8081, 8082, 8083, 9000, 9001]
     
+    # 检查并预留端口时持有，并行启动的多个服务不会选中同一端口
+    _reserve_lock = threading.Lock()
+    
     @staticmethod
-    def is_port_free(port: int, host: str = 'localhost') -> bool:
-        """检查端口是否可用"""
+    def _bind_error(port: int, host: str) -> Optional[OSError]:
+        """尝试绑定 host:port，成功返回None，失败返回异常"""
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(1)
-                result = sock.connect_ex((host, port))
-                return result != 0
-        except (socket.error, OSError):
+            with socket.socket(family, socket.SOCK_STREAM) as sock:
+                if family == socket.AF_INET6:
+                    sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+                sock.bind((host, port))
+        except OSError as e:
+            return e
+        return None
+    
+    @staticmethod
+    def is_port_free(port: int, host: str = '127.0.0.1') -> bool:
+        """检查端口是否可用 - 直接尝试绑定，不需要等待连接超时
+
+        host 为服务实际绑定的地址；另外检查 IPv4/IPv6 通配地址，
+        其他进程在 0.0.0.0 或 :: 上监听该端口时，部分系统上绑定 127.0.0.1 仍会成功。
+        """
+        if PortManager._bind_error(port, host) is not None:
             return False
+        for wildcard in ('0.0.0.0', '::'):
+            if wildcard == (host or '0.0.0.0'):
+                continue
+            error = PortManager._bind_error(port, wildcard)
+            # 系统未启用 IPv6 等与占用无关的错误忽略
+            if error is not None and error.errno in _IN_USE_ERRNOS:
+                return False
+        return True
     
     @staticmethod
-    def find_free_port(port_list: List[int], host: str = 'localhost') -> Optional[int]:
+    def find_free_port(port_list: List[int], host: str = '127.0.0.1') -> Optional[int]:
         """从端口列表中找到第一个可用端口"""
         for port in port_list:
             if PortManager.is_port_free(port, host):
                 return port
         return None
     
+    @classmethod
+    def reserve_port(cls, service: str, candidates: Iterable[int], host: str = '127.0.0.1') -> Optional[int]:
+        """从候选端口中选择第一个可用且未被其他服务预留的端口，并在端口注册表中预留
+
+        检查与预留在同一把锁内完成；预留写入 .ports.lock，其他启动器进程也会跳过该端口。
+        服务启动失败时调用 port_registry.unregister(service) 释放。
+        """
+        with cls._reserve_lock:
+            for port in candidates:
+                if port and cls.is_port_free(port, host) and port_registry.reserve(service, port):
+                    return port
+        return None
+    
     @staticmethod
-    def get_random_free_port(start: int = 8000, end: int = 9000) -> Optional[int]:
-        """在指定范围内获取随机可用端口"""
+    def get_ephemeral_port(host: str = '127.0.0.1') -> Optional[int]:
+        """绑定端口0，由系统分配一个空闲端口"""
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.bind(('', 0))
-                port = sock.getsockname()[1]
-                if start <= port <= end:
-                    return port
-                # 如果随机端口不在范围内，则在范围内查找
-                for port in range(start, end + 1):
-                    if PortManager.is_port_free(port):
-                        return port
+            family = socket.AF_INET6 if ':' in host else socket.AF_INET
+            with socket.socket(family, socket.SOCK_STREAM) as sock:
+                sock.bind((host, 0))
+                return sock.getsockname()[1]
         except (socket.error, OSError):
-            pass
+            return None
+    
+    @staticmethod
+    def _random_candidates(start: int, end: int, host: str) -> Iterator[int]:
+        """范围内的候选端口：先试系统分配的端口，再按随机顺序遍历范围，最后退回系统分配的端口"""
+        port = PortManager.get_ephemeral_port(host)
+        if port and start <= port <= end:
+            yield port
+        # 绑定检测，每个端口只需微秒级
+        yield from random.sample(range(start, end + 1), end - start + 1)
+        yield PortManager.get_ephemeral_port(host)
+    
+    @staticmethod
+    def get_random_free_port(start: int = 8000, end: int = 9000, host: str = '127.0.0.1') -> Optional[int]:
+        """在指定范围内获取随机可用端口"""
+        for port in PortManager._random_candidates(start, end, host):
+            if port and PortManager.is_port_free(port, host):
+                return port
         return None
     
     @staticmethod
@@ -88,19 +144,20 @@ class PortManager:
         return False
     
     @classmethod
-    def get_hugo_port(cls, preferred_port: int = 8000) -> Tuple[int, str]:
-        """获取Hugo服务器可用端口"""
+    def get_hugo_port(cls, preferred_port: int = 8000, host: str = '127.0.0.1',
+                      service: str = 'hugo') -> Tuple[int, str]:
+        """获取并预留Hugo服务器可用端口；host 为 Hugo 绑定的地址（hugo server 默认 127.0.0.1）"""
         # 先检查首选端口
-        if cls.is_port_free(preferred_port):
+        if cls.reserve_port(service, [preferred_port], host):
             return preferred_port, f"使用首选端口 {preferred_port}"
         
         # 从预设端口池中查找
-        free_port = cls.find_free_port(cls.DEFAULT_HUGO_PORTS)
+        free_port = cls.reserve_port(service, cls.DEFAULT_HUGO_PORTS, host)
         if free_port:
             return free_port, f"从预设端口池选择端口 {free_port}"
         
         # 获取随机端口
-        random_port = cls.get_random_free_port(8000, 8999)
+        random_port = cls.reserve_port(service, cls._random_candidates(8000, 8999, host), host)
         if random_port:
             return random_port, f"分配随机端口 {random_port}"
         
@@ -109,25 +166,26 @@ class PortManager:
         choice = input("是否尝试终止占用进程? (y/N): ").lower().strip()
         if choice == 'y':
             if cls.kill_process_on_port(preferred_port):
-                if cls.is_port_free(preferred_port):
+                if cls.reserve_port(service, [preferred_port], host):
                     return preferred_port, f"终止进程后使用端口 {preferred_port}"
         
         raise RuntimeError("无法找到可用的Hugo服务器端口")
     
     @classmethod
-    def get_api_port(cls, preferred_port: int = 8081) -> Tuple[int, str]:
-        """获取API服务器可用端口"""
+    def get_api_port(cls, preferred_port: int = 8081, host: str = 'localhost',
+                     service: str = 'api') -> Tuple[int, str]:
+        """获取并预留API服务器可用端口；host 为API服务器绑定的地址"""
         # 先检查首选端口
-        if cls.is_port_free(preferred_port):
+        if cls.reserve_port(service, [preferred_port], host):
             return preferred_port, f"使用首选端口 {preferred_port}"
         
         # 从预设端口池中查找
-        free_port = cls.find_free_port(cls.DEFAULT_API_PORTS)
+        free_port = cls.reserve_port(service, cls.DEFAULT_API_PORTS, host)
         if free_port:
             return free_port, f"从预设端口池选择端口 {free_port}"
         
         # 获取随机端口
-        random_port = cls.get_random_free_port(9000, 9999)
+        random_port = cls.reserve_port(service, cls._random_candidates(9000, 9999, host), host)
         if random_port:
             return random_port, f"分配随机端口 {random_port}"
         
@@ -178,18 +236,18 @@ def main():
         status_icon = "✅" if status == 'free' else "❌"
         print(f"  {status_icon} {port}: {status}")
     
-    # 获取推荐端口
-    try:
-        hugo_port, hugo_msg = pm.get_hugo_port()
-        print(f"\n🚀 推荐Hugo端口: {hugo_port} ({hugo_msg})")
-    except RuntimeError as e:
-        print(f"\n❌ Hugo端口分配失败: {e}")
-    
-    try:
-        api_port, api_msg = pm.get_api_port()
-        print(f"🔧 推荐API端口: {api_port} ({api_msg})")
-    except RuntimeError as e:
-        print(f"❌ API端口分配失败: {e}")
+    # 获取推荐端口（只检查，不在注册表中预留）
+    hugo_port = pm.find_free_port(pm.DEFAULT_HUGO_PORTS)
+    if hugo_port:
+        print(f"\n🚀 推荐Hugo端口: {hugo_port}")
+    else:
+        print("\n❌ 预设Hugo端口均被占用")
+    
+    api_port = pm.find_free_port(pm.DEFAULT_API_PORTS, 'localhost')
+    if api_port:
+        print(f"🔧 推荐API端口: {api_port}")
+    else:
+        print("❌ 预设API端口均被占用")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+服务端口注册表 - 项目根目录下的一个小文件，记录各服务实际绑定的端口和进程ID
+启动器在服务就绪后登记，检查脚本和管理后台代理从这里查找端口，而不是探测或假定固定端口
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import PORT_REGISTRY_FILE
+
+REGISTRY_PATH = Path(__file__).resolve().parent.parent / PORT_REGISTRY_FILE
+
+_lock = threading.Lock()
+# 按文件修改时间缓存的注册表内容，避免每次查找都读取文件
+_cache: Dict = {"mtime": None, "entries": {}}
+
+
+def _pid_alive(pid: int) -> bool:
+    """进程是否仍在运行；Windows 上无法廉价判断，视为存活"""
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read() -> Dict[str, Dict]:
+    try:
+        mtime = REGISTRY_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+
+    if _cache["mtime"] != mtime:
+        try:
+            entries = json.loads(REGISTRY_PATH.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            entries = {}
+        _cache["mtime"] = mtime
+        _cache["entries"] = entries if isinstance(entries, dict) else {}
+    return _cache["entries"]
+
+
+def _write(entries: Dict[str, Dict]):
+    tmp_path = REGISTRY_PATH.with_name(f"{REGISTRY_PATH.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(entries, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp_path, REGISTRY_PATH)
+    # 连续写入的修改时间可能相同（文件系统时间精度较粗时），直接更新缓存，避免读到旧内容
+    _cache["mtime"] = REGISTRY_PATH.stat().st_mtime_ns
+    _cache["entries"] = entries
+
+
+def register(service: str, port: int, pid: Optional[int] = None):
+    """登记服务端口；pid 默认为当前进程"""
+    with _lock:
+        entries = dict(_read())
+        entries[service] = {
+            "port": port,
+            "pid": pid or os.getpid(),
+            "started_at": time.time()
+        }
+        _write(entries)
+
+
+def reserve(service: str, port: int) -> bool:
+    """启动前预留端口：端口已被其他仍在运行的服务登记或预留时返回False
+
+    预留记录为当前进程所有，服务就绪后由 register 覆盖，启动失败时应调用 unregister 释放。
+    """
+    with _lock:
+        entries = dict(_read())
+        for name, entry in entries.items():
+            if name != service and entry.get("port") == port and (
+                    not entry.get("pid") or _pid_alive(entry["pid"])):
+                return False
+        entries[service] = {
+            "port": port,
+            "pid": os.getpid(),
+            "started_at": time.time(),
+            "reserved": True
+        }
+        _write(entries)
+        return True
+
+
+def unregister(service: str):
+    """移除服务登记"""
+    with _lock:
+        entries = dict(_read())
+        if entries.pop(service, None) is None:
+            return
+        if entries:
+            _write(entries)
+        else:
+            try:
+                REGISTRY_PATH.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def services() -> Dict[str, Dict]:
+    """当前登记且进程仍在运行的服务"""
+    with _lock:
+        entries = _read()
+        return {name: dict(entry) for name, entry in entries.items()
+                if not entry.get("pid") or _pid_alive(entry["pid"])}
+
+
+def lookup(service: str, default: Optional[int] = None) -> Optional[int]:
+    """查找服务端口，未登记或进程已退出时返回 default"""
+    entry = services().get(service)
+    return entry["port"] if entry else default
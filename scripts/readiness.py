@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+服务就绪检测 - 用探测代替固定时长的 sleep
+所有等待函数返回从开始等待到就绪所用的秒数，超时或失败时返回None
+"""
+
+import re
+import time
+import socket
+import urllib.request
+from typing import Callable, Optional
+
+# Hugo 服务器启动完成时输出的提示
+HUGO_READY_PATTERN = re.compile(r'Web Server is available')
+
+
+def wait_until(check: Callable[[], bool], timeout: float,
+               initial_delay: float = 0.05, max_delay: float = 0.5,
+               abort: Optional[Callable[[], bool]] = None) -> Optional[float]:
+    """按指数退避重复检查，直到 check() 为真；abort() 为真时提前放弃"""
+    started = time.monotonic()
+    deadline = started + timeout
+    delay = initial_delay
+
+    while True:
+        if check():
+            return time.monotonic() - started
+        if abort and abort():
+            return None
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+def is_port_open(port: int, host: str = 'localhost', timeout: float = 0.2) -> bool:
+    """端口是否已在监听"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def is_http_ok(url: str, timeout: float = 0.5) -> bool:
+    """URL 是否返回 2xx"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return 200 <= response.status < 300
+    except Exception:
+        return False
+
+
+def wait_for_port(port: int, timeout: float, host: str = 'localhost',
+                  abort: Optional[Callable[[], bool]] = None) -> Optional[float]:
+    """等待端口开始监听"""
+    return wait_until(lambda: is_port_open(port, host), timeout, abort=abort)
+
+
+def wait_for_http(url: str, timeout: float,
+                  abort: Optional[Callable[[], bool]] = None) -> Optional[float]:
+    """等待HTTP端点可用，例如 API 的 /api/health"""
+    return wait_until(lambda: is_http_ok(url), timeout, abort=abort)
+
+
+def wait_for_hugo(process, pump, port: int, timeout: float,
+                  abort: Optional[Callable[[], bool]] = None) -> Optional[float]:
+    """等待Hugo服务器就绪
+
+    有输出泵时观察 Hugo 输出中的 "Web Server is available"，并同时探测端口，
+    任意一个先满足即视为就绪；没有输出泵时只以退避方式探测端口。
+    Hugo 进程退出或 abort() 为真时立即返回None。
+    """
+    def exited() -> bool:
+        return process.poll() is not None or bool(abort and abort())
+
+    if pump is None:
+        return wait_until(lambda: is_port_open(port), timeout, abort=exited)
+
+    started = time.monotonic()
+    remaining = timeout
+    while remaining > 0 and not exited():
+        # 就绪行出现时输出泵会立即唤醒等待
+        if pump.wait_for(HUGO_READY_PATTERN, timeout=min(remaining, 0.5)) is not None:
+            return time.monotonic() - started
+        if is_port_open(port):
+            return time.monotonic() - started
+        remaining = timeout - (time.monotonic() - started)
+    return None
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hugo 重建调度器 - 合并短时间内的多次重建请求
+"""
+
+import time
+import threading
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RebuildScheduler:
+    """防抖、合并的网站重建调度器
+
+    request() 只登记一次重建请求；在 quiet_window 秒内没有新请求时才开始构建。
+    同一时间最多只有一次构建在运行，构建期间到达的请求只会触发一次后续构建。
+    """
+
+    def __init__(self, build: Callable[[], bool], quiet_window: float = 2.0):
+        self._build = build
+        self.quiet_window = quiet_window
+
+        self._cond = threading.Condition()
+        self._requested = 0          # 尚未开始构建的请求数
+        self._last_request = 0.0
+        self._building = False
+        self._generation = 0         # 已完成的构建轮次
+        self._thread: Optional[threading.Thread] = None
+
+        self.build_count = 0
+        self.last_duration: Optional[float] = None
+        self.last_result: Optional[bool] = None
+        self.last_finished_at: Optional[float] = None
+
+    def request(self) -> int:
+        """登记一次重建请求，返回该请求将由哪一轮构建完成"""
+        with self._cond:
+            self._requested += 1
+            self._last_request = time.monotonic()
+            # 构建中到达的请求由下一轮构建处理
+            target = self._generation + (2 if self._building else 1)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="hugo-rebuild", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+            return target
+
+    def run_now(self) -> bool:
+        """立即登记请求并等待构建完成，返回构建结果"""
+        target = self.request()
+        with self._cond:
+            # 跳过静默期，尽快开始构建
+            self._last_request = 0.0
+            self._cond.notify_all()
+        return self.wait(target)
+
+    def wait(self, generation: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """等待指定轮次（默认为当前所有请求）的构建完成"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if generation is None:
+                generation = self._generation + (1 if self._building else 0) + (1 if self._requested else 0)
+            while self._generation < generation:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return bool(self.last_result)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # 等待静默期结束
+                while True:
+                    if not self._requested:
+                        self._thread = None
+                        return
+                    remaining = self._last_request + self.quiet_window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                self._requested = 0
+                self._building = True
+
+            started = time.monotonic()
+            try:
+                result = bool(self._build())
+            except Exception as e:
+                logger.error(f"网站重建出错: {e}")
+                result = False
+            duration = time.monotonic() - started
+
+            with self._cond:
+                self._building = False
+                self._generation += 1
+                self.build_count += 1
+                self.last_duration = duration
+                self.last_result = result
+                self.last_finished_at = time.time()
+                self._cond.notify_all()
+
+            logger.info(f"网站重建完成: {'成功' if result else '失败'}, 耗时 {duration:.2f}s")
+
+    def stats(self) -> dict:
+        """调度器状态"""
+        with self._cond:
+            return {
+                "building": self._building,
+                "queue_depth": self._requested,
+                "build_count": self.build_count,
+                "last_duration": self.last_duration,
+                "last_result": self.last_result,
+                "last_finished_at": self.last_finished_at,
+                "quiet_window": self.quiet_window
+            }
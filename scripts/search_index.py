@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+管理后台全文检索 - 常驻内存的倒排索引
+- 中日韩文字按相邻两字切分（bigram），拉丁文字按单词切分
+- 按 BM25 排序，标题中的词权重更高
+- 增量更新，索引持久化到磁盘，重启后只需重新索引有变化的文档
+"""
+
+import os
+import re
+import json
+import html
+import math
+import threading
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import front_matter
+
+logger = logging.getLogger(__name__)
+
+# 持久化格式版本，切分规则变化时递增，旧索引将被丢弃并重建
+INDEX_FORMAT = 1
+
+# 标题中的词计入的次数
+TITLE_WEIGHT = 3
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_CJK = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"([{_CJK}]+)|([0-9a-z\u00c0-\u024f]+)")
+
+
+def _segments(text: str) -> Iterable[tuple]:
+    """产生 (是否中日韩文字, 片段)，片段已转为小写"""
+    for match in _TOKEN_RE.finditer(text.lower()):
+        cjk, word = match.groups()
+        yield (True, cjk) if cjk else (False, word)
+
+
+def tokenize(text: str) -> List[str]:
+    """切分文本：中日韩文字取相邻两字，单独一个字时取该字；拉丁文字取整个单词"""
+    tokens = []
+    for is_cjk, segment in _segments(text):
+        if is_cjk and len(segment) > 1:
+            tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+        else:
+            tokens.append(segment)
+    return tokens
+
+
+def strip_front_matter(text: str) -> str:
+    return front_matter.split(text)[2]
+
+
+class SearchIndex:
+    """文档倒排索引，所有方法都是线程安全的
+
+    每个文档保存词频表和一个签名（由调用方根据元数据生成），
+    sync() 比较签名，只重新索引有变化的文档。
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, save_delay: float = 5.0):
+        self.path = Path(path) if path else None
+        self.save_delay = save_delay
+
+        self._lock = threading.RLock()
+        # 文档ID -> {"title", "status", "signature", "length", "terms": {词: 次数}}
+        self._docs: Dict[str, Dict] = {}
+        # 词 -> {文档ID: 次数}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._docs)
+
+    def signature(self, doc_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._docs.get(doc_id)
+            return entry["signature"] if entry else None
+
+    def doc_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._docs)
+
+    # ---- 增量更新 ----
+
+    def update(self, doc_id: str, title: str, text: str, status: Optional[str] = None,
+               signature: Optional[str] = None):
+        """索引（或重新索引）一个文档"""
+        terms = Counter(tokenize(strip_front_matter(text)))
+        for token in tokenize(title or ""):
+            terms[token] += TITLE_WEIGHT
+
+        with self._lock:
+            self._remove(doc_id)
+            length = sum(terms.values())
+            self._docs[doc_id] = {
+                "title": title,
+                "status": status,
+                "signature": signature,
+                "length": length,
+                "terms": dict(terms)
+            }
+            for token, count in terms.items():
+                self._postings.setdefault(token, {})[doc_id] = count
+            self._total_length += length
+            self._mark_dirty()
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            if self._remove(doc_id):
+                self._mark_dirty()
+
+    def _remove(self, doc_id: str) -> bool:
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return False
+        for token in entry["terms"]:
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[token]
+        self._total_length -= entry["length"]
+        return True
+
+    def sync(self, signatures: Dict[str, str], fetch: Callable[[str], Optional[Dict]]) -> int:
+        """按签名与文档集合对齐：删除已不存在的文档，重新索引签名变化的文档
+
+        fetch(文档ID) 返回包含 title、content、status 的文档字典，返回重新索引的数量。
+        """
+        with self._lock:
+            removed = [doc_id for doc_id in self._docs if doc_id not in signatures]
+            changed = [doc_id for doc_id, signature in signatures.items()
+                       if self.signature(doc_id) != signature]
+        for doc_id in removed:
+            self.remove(doc_id)
+
+        for doc_id in changed:
+            document = fetch(doc_id)
+            if document is None:
+                self.remove(doc_id)
+                continue
+            self.update(doc_id, document.get("title", ""), document.get("content") or "",
+                        document.get("status"), signatures[doc_id])
+
+        if removed or changed:
+            logger.info(f"搜索索引已同步: 重新索引 {len(changed)} 个，删除 {len(removed)} 个")
+        return len(changed)
+
+    # ---- 查询 ----
+
+    def _expand(self, token: str) -> List[str]:
+        """单个中日韩字符在索引中只以双字词出现，展开为包含它的所有词"""
+        if len(token) == 1 and _TOKEN_RE.match(token) and _TOKEN_RE.match(token).group(1):
+            return [t for t in self._postings if token in t]
+        return [token]
+
+    def search(self, query: str, limit: int = 20, status: Optional[str] = None) -> List[Dict]:
+        """返回按相关度排序的 [{"id", "title", "status", "score"}]
+
+        优先返回包含所有查询词的文档，没有这样的文档时退化为包含任一查询词。
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            total_docs = len(self._docs)
+            if not total_docs:
+                return []
+            average_length = self._total_length / total_docs
+
+            groups = [self._expand(token) for token in tokens]
+            matched = [set().union(*(self._postings.get(t, {}) for t in group)) for group in groups]
+            candidates = set.intersection(*matched) if matched else set()
+            if not candidates:
+                candidates = set().union(*matched)
+            if status:
+                candidates = {d for d in candidates if self._docs[d]["status"] == status}
+
+            scores = dict.fromkeys(candidates, 0.0)
+            for group in groups:
+                for token in group:
+                    posting = self._postings.get(token)
+                    if not posting:
+                        continue
+                    idf = math.log(1 + (total_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for doc_id in candidates.intersection(posting):
+                        tf = posting[doc_id]
+                        length = self._docs[doc_id]["length"]
+                        norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                        scores[doc_id] += idf * tf * (BM25_K1 + 1) / norm
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            return [{
+                "id": doc_id,
+                "title": self._docs[doc_id]["title"],
+                "status": self._docs[doc_id]["status"],
+                "score": round(score, 4)
+            } for doc_id, score in ranked]
+
+    # ---- 持久化 ----
+
+    def load(self) -> bool:
+        """从磁盘加载索引，文件不存在或格式不符时返回False"""
+        if not self.path or not self.path.exists():
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"加载搜索索引失败 {self.path}: {e}")
+            return False
+        if data.get("format") != INDEX_FORMAT:
+            return False
+
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._total_length = 0
+            for doc_id, entry in data.get("documents", {}).items():
+                self._docs[doc_id] = entry
+                for token, count in entry["terms"].items():
+                    self._postings.setdefault(token, {})[doc_id] = count
+                self._total_length += entry["length"]
+        logger.info(f"搜索索引已加载: {len(self._docs)} 个文档")
+        return True
+
+    def save(self):
+        """立即写入磁盘"""
+        if not self.path:
+            return
+        with self._lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            data = json.dumps({"format": INDEX_FORMAT, "documents": self._docs},
+                              ensure_ascii=False, separators=(',', ':'))
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.{threading.get_ident()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+
+    def _mark_dirty(self):
+        """合并 save_delay 秒内的多次修改，只写一次磁盘"""
+        self._dirty = True
+        if self.path and self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self._save_quietly)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save_quietly(self):
+        with self._lock:
+            self._save_timer = None
+        try:
+            self.save()
+        except OSError as e:
+            logger.warning(f"保存搜索索引失败 {self.path}: {e}")
+
+
+def highlight(text: str, query: str, length: int = 120) -> str:
+    """截取文本中第一个命中位置附近的片段，命中词用 <mark> 标出，其余内容经过HTML转义"""
+    text = re.sub(r'\s+', ' ', strip_front_matter(text)).strip()
+
+    terms = set()
+    for is_cjk, segment in _segments(query):
+        terms.add(segment)
+        if is_cjk and len(segment) > 2:
+            terms.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    if not terms:
+        return html.escape(text[:length])
+
+    pattern = re.compile('|'.join(re.escape(t) for t in sorted(terms, key=len, reverse=True)),
+                         re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, first.start() - length // 3) if first else 0
+    end = min(len(text), start + length)
+    window = text[start:end]
+
+    parts = []
+    position = 0
+    for match in pattern.finditer(window):
+        parts.append(html.escape(window[position:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        position = match.end()
+    parts.append(html.escape(window[position:]))
+
+    return ("…" if start > 0 else "") + "".join(parts) + ("…" if end < len(text) else "")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+公开站点搜索分片 - Hugo 构建完成后把 public/index.json 转换为分片倒排索引
+搜索页只下载查询词所在的分片，不再一次性加载全部文章内容
+
+输出目录 public/search-index/:
+- manifest.json  分片数、文档数、平均长度和构建版本
+- docs.json      [[标题, 链接, 词数], ...]，下标即文档编号
+- s{n}.json      {词: [文档编号增量, 词频, 文档编号增量, 词频, ...]}
+
+分片键: 中日韩双字词取第一个字，拉丁单词取前两个字母；
+分片号 = 分片键的31进制滚动哈希（32位）对分片数取模，fastsearch.js 使用相同的算法。
+"""
+
+import os
+import json
+import math
+import hashlib
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Union
+
+from search_index import tokenize, TITLE_WEIGHT
+from config import SEARCH_SHARD_DIR, SEARCH_SHARD_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# 分片格式版本，修改切分或编码方式时递增
+SHARD_FORMAT = 1
+
+
+def shard_key(token: str) -> str:
+    """词所属分片的键，前缀相同的词位于同一分片，便于按前缀查找"""
+    if ord(token[0]) >= 0x3040:
+        return token[0]
+    return token[:2]
+
+
+def shard_of(token: str, shards: int) -> int:
+    h = 0
+    for ch in shard_key(token):
+        h = (h * 31 + ord(ch)) & 0xFFFFFFFF
+    return h % shards
+
+
+def _write_if_changed(path: Path, text: str) -> bool:
+    """内容未变时不写入，保持文件的修改时间以便增量同步"""
+    data = text.encode('utf-8')
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    temp_path = path.with_name(f"{path.name}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+    return True
+
+
+def build_shards(public_dir: Union[str, Path], tokens_per_shard: int = SEARCH_SHARD_TOKENS) -> Dict:
+    """根据 public/index.json 生成分片索引，返回统计信息"""
+    public_dir = Path(public_dir)
+    with open(public_dir / "index.json", 'r', encoding='utf-8') as f:
+        pages = json.load(f)
+
+    docs: List[list] = []
+    postings: Dict[str, List[tuple]] = {}
+    for doc_id, page in enumerate(pages):
+        terms = Counter(tokenize(page.get("content") or ""))
+        for token in tokenize(page.get("title") or ""):
+            terms[token] += TITLE_WEIGHT
+        docs.append([page.get("title", ""), page.get("permalink", ""), sum(terms.values())])
+        for token, count in terms.items():
+            postings.setdefault(token, []).append((doc_id, count))
+
+    shard_count = max(1, math.ceil(len(postings) / max(1, tokens_per_shard)))
+    shards: List[Dict[str, List[int]]] = [{} for _ in range(shard_count)]
+    for token in sorted(postings):
+        encoded = []
+        previous = 0
+        for doc_id, count in postings[token]:
+            encoded.extend((doc_id - previous, count))
+            previous = doc_id
+        shards[shard_of(token, shard_count)][token] = encoded
+
+    output_dir = public_dir / SEARCH_SHARD_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    compact = dict(ensure_ascii=False, separators=(',', ':'))
+    files = {"docs.json": json.dumps(docs, **compact)}
+    for n, shard in enumerate(shards):
+        files[f"s{n}.json"] = json.dumps(shard, **compact)
+
+    # 构建版本用于浏览器缓存失效，只在内容变化时改变
+    digest = hashlib.sha1()
+    for name in sorted(files):
+        digest.update(name.encode('utf-8'))
+        digest.update(files[name].encode('utf-8'))
+    files["manifest.json"] = json.dumps({
+        "format": SHARD_FORMAT,
+        "version": digest.hexdigest()[:12],
+        "shards": shard_count,
+        "docs": len(docs),
+        "avg_length": round(sum(d[2] for d in docs) / len(docs), 2) if docs else 0
+    }, **compact)
+
+    written = sum(_write_if_changed(output_dir / name, text) for name, text in files.items())
+
+    # 删除分片数减少后遗留的旧分片
+    for path in output_dir.glob("s*.json"):
+        if path.name not in files:
+            path.unlink()
+
+    sizes = [len(text.encode('utf-8')) for name, text in files.items() if name.startswith("s")]
+    stats = {
+        "docs": len(docs),
+        "tokens": len(postings),
+        "shards": shard_count,
+        "written": written,
+        "largest_shard": max(sizes) if sizes else 0,
+        "total_bytes": sum(len(text.encode('utf-8')) for text in files.values())
+    }
+    logger.info(f"搜索分片已生成: {stats['docs']} 篇文章，{stats['tokens']} 个词，"
+                f"{shard_count} 个分片，更新 {written} 个文件")
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="生成公开站点搜索分片")
+    parser.add_argument("--public-dir", default="public", help="Hugo 输出目录")
+    args = parser.parse_args()
+    print(json.dumps(build_shards(args.public_dir), ensure_ascii=False, indent=2))
@@ -11,10 +11,8 @@ import threading
 import time
 from pathlib import Path
 import http.server
-import socketserver
-import urllib.request
-import urllib.error
 import re
+import json
 
 # 添加脚本目录到Python路径
 script_dir = Path(__file__).parent
@@ -22,11 +20,35 @@ sys.path.insert(0, str(script_dir))
 
 from document_manager import DocumentManager, WebAPI
 from port_manager import PortManager
-
-# 全局变量存储端口信息
-_hugo_port = None
-_api_port = None
-_admin_port = None
+from log_pump import LogPump
+from readiness import wait_for_hugo, wait_for_http, wait_for_port
+from pooled_server import PooledHTTPServer
+from startup import Service, start_all, stop_all, release_on_failure, cancelled
+import port_registry
+from page_cache import PageCache, send_page
+from asset_proxy import AssetProxy, AssetProxyError, send_asset
+from circuit_breaker import CircuitOpenError
+from config import (DOCUMENT_STORE, API_MAX_WORKERS, API_MAX_QUEUE,
+                    REBUILD_QUIET_WINDOW, JOB_POOL_SIZES, JOB_MAX_QUEUE,
+                    HUGO_LOG_LINES, HUGO_LOG_FILE, STARTUP_TIMEOUT,
+                    DEFAULT_HUGO_PORT, DEFAULT_ADMIN_PORT, DEFAULT_API_PORT,
+                    ASSET_CACHE_MAX_BYTES, ASSET_CACHE_FRESH, ASSET_NEGATIVE_TTL,
+                    ASSET_POOL_SIZE, ASSET_BREAKER_FAILURES, ASSET_BREAKER_COOLDOWN,
+                    ADMIN_MAX_WORKERS, ADMIN_MAX_QUEUE)
+
+# 各服务从启动到就绪的耗时（秒）
+_ready_times = {}
+
+# 渲染后的管理后台页面
+_page_cache = PageCache()
+
+# Hugo 静态资源代理
+_asset_proxy = AssetProxy(
+    lambda: port_registry.lookup('hugo', DEFAULT_HUGO_PORT),
+    max_bytes=ASSET_CACHE_MAX_BYTES, fresh_for=ASSET_CACHE_FRESH,
+    negative_ttl=ASSET_NEGATIVE_TTL, pool_size=ASSET_POOL_SIZE,
+    failure_threshold=ASSET_BREAKER_FAILURES, cooldown=ASSET_BREAKER_COOLDOWN
+)
 
 class AdminRequestHandler(http.server.BaseHTTPRequestHandler):
     """管理后台请求处理器"""
@@ -69,18 +91,16 @@ class AdminRequestHandler(http.server.BaseHTTPRequestHandler):
             # 统一使用layouts/admin目录
             admin_page_path = self.admin_root / 'layouts' / 'admin' / page_name
             
-            if admin_page_path.exists():
-                with open(admin_page_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # 处理Hugo模板语法
-                content = self.process_hugo_template(content)
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html; charset=utf-8')
-                self.send_header('Cache-Control', 'no-cache')
-                self.end_headers()
-                self.wfile.write(content.encode('utf-8'))
+            # 处理Hugo模板语法；渲染结果依赖Hugo服务器地址
+            hugo_base_url = f"http://localhost:{port_registry.lookup('hugo', DEFAULT_HUGO_PORT)}"
+            page = _page_cache.get(
+                admin_page_path,
+                lambda content: self.process_hugo_template(content, hugo_base_url),
+                hugo_base_url
+            )
+            
+            if page:
+                send_page(self, page)
             else:
                 self.send_error(404, f"Admin page not found: {page_name}")
         except Exception as e:
@@ -92,24 +112,16 @@ class AdminRequestHandler(http.server.BaseHTTPRequestHandler):
         try:
             admin_page_path = Path(__file__).parent.parent / 'layouts' / 'admin' / 'login.html'
             print(f"[调试] 登录页面路径: {admin_page_path}")
-            print(f"[调试] 文件是否存在: {admin_page_path.exists()}")
-
-            if admin_page_path.exists():
-                with open(admin_page_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                print(f"[调试] 读取的内容长度: {len(content)}")
-                print(f"[调试] 内容前100字符: {content[:100]}")
 
-                # 登录页面只做最基本的模板替换，不添加任何CSS链接
-                content = content.replace('{{ .Site.Title }}', 'Hugo-Self 管理后台')
-                content = content.replace('{{ .Title }}', '登录页面')
+            # 登录页面只做最基本的模板替换，不添加任何CSS链接
+            page = _page_cache.get(
+                admin_page_path,
+                lambda content: content.replace('{{ .Site.Title }}', 'Hugo-Self 管理后台')
+                                       .replace('{{ .Title }}', '登录页面')
+            )
 
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html; charset=utf-8')
-                self.send_header('Cache-Control', 'no-cache')
-                self.end_headers()
-                self.wfile.write(content.encode('utf-8'))
+            if page:
+                send_page(self, page)
                 print(f"[调试] 登录页面发送成功")
             else:
                 print(f"[调试] 登录页面文件不存在")
@@ -118,10 +130,8 @@ class AdminRequestHandler(http.server.BaseHTTPRequestHandler):
             print(f"[管理后台] 登录页面错误: {e}")
             self.send_error(500, f"Server error: {e}")
 
-    def process_hugo_template(self, content):
+    def process_hugo_template(self, content, hugo_base_url):
         """处理Hugo模板语法，替换为静态链接"""
-        global _hugo_port
-        hugo_base_url = f"http://localhost:{_hugo_port or 8000}"
 
         # 检查是否是登录页面（已经有内联样式，不需要外部CSS）
         if '<style>' in content and 'login-container' in content:
@@ -161,22 +171,18 @@ class AdminRequestHandler(http.server.BaseHTTPRequestHandler):
     
     def proxy_hugo_asset(self, asset_path):
         """代理Hugo服务器的静态资源"""
-        global _hugo_port
         try:
-            hugo_url = f"http://localhost:{_hugo_port or 8000}{asset_path}"
-            
-            with urllib.request.urlopen(hugo_url, timeout=5) as response:
-                content = response.read()
-                content_type = response.headers.get('Content-Type', 'application/octet-stream')
-                
-                self.send_response(200)
-                self.send_header('Content-Type', content_type)
-                self.send_header('Cache-Control', 'public, max-age=3600')
-                self.end_headers()
-                self.wfile.write(content)
+            asset = _asset_proxy.get(asset_path)
+            if asset is None:
+                self.send_error(404, "Not Found")
+                return
+            send_asset(self, asset, cache_control='public, max-age=3600')
                 
-        except urllib.error.HTTPError as e:
-            self.send_error(e.code, str(e))
+        except AssetProxyError as e:
+            self.send_error(e.status, str(e))
+        except CircuitOpenError as e:
+            # Hugo 不可用时快速失败，不再等待连接超时
+            self.send_error(503, str(e))
         except Exception as e:
             print(f"[管理后台] 代理资源错误: {e}")
             self.send_error(500, str(e))
@@ -185,6 +191,11 @@ class AdminRequestHandler(http.server.BaseHTTPRequestHandler):
         """静默日志输出"""
         pass
 
+def start_hugo_log_pump(process):
+    """启动Hugo输出泵，持续读取stdout/stderr"""
+    log_file = script_dir.parent / HUGO_LOG_FILE if HUGO_LOG_FILE else None
+    return LogPump(process, "hugo", max_lines=HUGO_LOG_LINES, log_file=log_file).start()
+
 def start_hugo_with_port(port):
     """使用指定端口启动Hugo服务器"""
     try:
@@ -197,17 +208,24 @@ def start_hugo_with_port(port):
             encoding='utf-8',
             errors='ignore'
         )
+        # 持续读取Hugo输出，避免管道写满后Hugo阻塞
+        pump = start_hugo_log_pump(process)
         
-        # 等待启动
-        time.sleep(5)
+        # 等待Hugo输出就绪信息或端口可连接
+        ready_time = wait_for_hugo(process, pump, port, STARTUP_TIMEOUT)
         
-        if process.poll() is None:
-            print(f"✅ Hugo 服务器已启动: http://localhost:{port}")
-            global _hugo_port
-            _hugo_port = port
+        if ready_time is not None:
+            print(f"✅ Hugo 服务器已启动: http://localhost:{port} (就绪耗时 {ready_time:.2f}s)")
+            port_registry.register("hugo", port, process.pid)
+            _ready_times['hugo'] = ready_time
             return process
         else:
-            stdout, stderr = process.communicate(timeout=2)
+            if process.poll() is None:
+                print(f"端口 {port} 上的 Hugo 在 {STARTUP_TIMEOUT} 秒内未就绪")
+                process.terminate()
+                process.wait(timeout=5)
+            pump.join()
+            stderr = pump.text("stderr")
             if stderr:
                 print(f"端口 {port} 启动失败: {stderr.strip()}")
             return None
@@ -254,20 +272,27 @@ def start_hugo_server():
             encoding='utf-8',
             errors='ignore'  # 忽略编码错误
         )
+        # 持续读取Hugo输出，避免管道写满后Hugo阻塞
+        pump = start_hugo_log_pump(process)
 
-        # 等待服务器启动
-        time.sleep(5)  # 增加等待时间
+        # 等待Hugo输出就绪信息或端口可连接
+        ready_time = wait_for_hugo(process, pump, hugo_port, STARTUP_TIMEOUT, abort=cancelled.is_set)
 
-        if process.poll() is None:
-            print(f"✅ Hugo 服务器已启动: http://localhost:{hugo_port}")
-            # 将端口信息存储在全局变量中，供其他函数使用
-            global _hugo_port
-            _hugo_port = hugo_port
+        if ready_time is not None:
+            print(f"✅ Hugo 服务器已启动: http://localhost:{hugo_port} (就绪耗时 {ready_time:.2f}s)")
+            # 登记端口，供管理后台代理和检查脚本查找
+            port_registry.register("hugo", hugo_port, process.pid)
+            _ready_times['hugo'] = ready_time
             return process
         else:
+            if process.poll() is None:
+                print(f"❌ Hugo 服务器在 {STARTUP_TIMEOUT} 秒内未就绪")
+                process.terminate()
             # 读取错误输出
             try:
-                stdout, stderr = process.communicate(timeout=2)
+                process.wait(timeout=2)
+                pump.join()
+                stdout, stderr = pump.text("stdout"), pump.text("stderr")
                 print(f"❌ Hugo 服务器启动失败")
                 if stderr:
                     print(f"错误信息: {stderr.strip()}")
@@ -276,7 +301,8 @@ def start_hugo_server():
                         print(f"⚠️  端口 {hugo_port} 被占用，尝试其他端口...")
                         # 尝试下一个可用端口
                         try:
-                            next_port = PortManager.find_free_port([p for p in PortManager.DEFAULT_HUGO_PORTS if p > hugo_port])
+                            next_port = PortManager.reserve_port(
+                                "hugo", [p for p in PortManager.DEFAULT_HUGO_PORTS if p > hugo_port])
                             if next_port:
                                 print(f"🔄 重试端口 {next_port}...")
                                 return start_hugo_with_port(next_port)
@@ -309,19 +335,30 @@ def start_api_server():
             print(f"❌ API端口分配失败: {e}")
             return None
         
-        dm = DocumentManager(str(script_dir.parent))
-        api = WebAPI(dm, port=api_port)
+        dm = DocumentManager(str(script_dir.parent), store=DOCUMENT_STORE,
+                             rebuild_quiet_window=REBUILD_QUIET_WINDOW)
+        # 资源代理的缓存与熔断器状态通过 /api/health 报告
+        api = WebAPI(dm, port=api_port, max_workers=API_MAX_WORKERS, max_queue=API_MAX_QUEUE,
+                     job_pool_sizes=JOB_POOL_SIZES, job_max_queue=JOB_MAX_QUEUE,
+                     health_sections={
+                         "hugo_port": lambda: port_registry.lookup('hugo', DEFAULT_HUGO_PORT),
+                         "asset_proxy": _asset_proxy.stats
+                     })
         
         # 在新线程中启动API服务器
         api_thread = threading.Thread(target=api.start_server, daemon=True)
         api_thread.start()
         
-        time.sleep(1)
-        print(f"✅ API 服务器已启动: http://localhost:{api_port}")
-        # 将端口信息存储在全局变量中
-        global _api_port
-        _api_port = api_port
-        return api_thread
+        # 探测健康检查接口
+        ready_time = wait_for_http(f"http://localhost:{api_port}/api/health", STARTUP_TIMEOUT, abort=cancelled.is_set)
+        if ready_time is None:
+            print(f"❌ API 服务器在 {STARTUP_TIMEOUT} 秒内未就绪")
+            return None
+        
+        print(f"✅ API 服务器已启动: http://localhost:{api_port} (就绪耗时 {ready_time:.2f}s)")
+        port_registry.register("api", api_port)
+        _ready_times['api'] = ready_time
+        return api
         
     except Exception as e:
         print(f"❌ 启动 API 服务器时出错: {e}")
@@ -332,9 +369,10 @@ def start_admin_server():
     try:
         print("🔧 启动管理后台服务器...")
         
-        # 获取可用端口
+        # 获取并预留可用端口（管理后台绑定所有IPv4地址）
         try:
-            admin_port = PortManager.find_free_port([8080, 8888, 9000, 9080, 3000])
+            admin_port = PortManager.reserve_port(
+                "admin", [8080, 8888, 9000, 9080, 3000, PortManager.get_ephemeral_port('')], '')
             if not admin_port:
                 raise RuntimeError("无法找到可用的管理后台端口")
             print(f"🔧 使用管理后台端口 {admin_port}")
@@ -343,24 +381,51 @@ def start_admin_server():
             return None
         
         # 启动管理后台服务器
-        def run_admin_server():
-            with socketserver.TCPServer(("", admin_port), AdminRequestHandler) as httpd:
-                httpd.serve_forever()
-        
-        admin_thread = threading.Thread(target=run_admin_server, daemon=True)
+        # 工作线程池并发处理请求，资源代理的多个到Hugo的连接才能同时使用
+        httpd = PooledHTTPServer(("", admin_port), AdminRequestHandler,
+                                 max_workers=ADMIN_MAX_WORKERS, max_queue=ADMIN_MAX_QUEUE, name="admin")
+        admin_thread = threading.Thread(target=httpd.serve_forever, daemon=True)
         admin_thread.start()
         
-        time.sleep(1)
-        print(f"✅ 管理后台服务器已启动: http://localhost:{admin_port}")
+        # 探测端口
+        ready_time = wait_for_port(admin_port, STARTUP_TIMEOUT, abort=cancelled.is_set)
+        if ready_time is None:
+            print(f"❌ 管理后台服务器在 {STARTUP_TIMEOUT} 秒内未就绪")
+            httpd.shutdown()
+            httpd.server_close()
+            return None
         
-        global _admin_port
-        _admin_port = admin_port
-        return admin_thread
+        print(f"✅ 管理后台服务器已启动: http://localhost:{admin_port} (就绪耗时 {ready_time:.2f}s)")
+        port_registry.register("admin", admin_port)
+        _ready_times['admin'] = ready_time
+        return httpd
         
     except Exception as e:
         print(f"❌ 启动管理后台服务器时出错: {e}")
         return None
 
+def stop_hugo_process(process):
+    """停止Hugo服务器，超时后强制结束"""
+    port_registry.unregister("hugo")
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+        print("✅ Hugo 服务器已停止")
+    except subprocess.TimeoutExpired:
+        process.kill()
+        print("🔪 强制停止 Hugo 服务器")
+
+def stop_api_server(api):
+    """停止API服务器"""
+    port_registry.unregister("api")
+    api.stop_server()
+
+def stop_server(httpd):
+    """停止管理后台服务器"""
+    port_registry.unregister("admin")
+    httpd.shutdown()
+    httpd.server_close()
+
 def check_dependencies():
     """检查依赖"""
     print("检查依赖...")
@@ -407,7 +472,6 @@ def check_dependencies():
 def open_browser(admin_port):
     """打开浏览器 - 使用管理后台端口"""
     import webbrowser
-    time.sleep(2)  # 等待服务器完全启动
     
     try:
         print("🌐 打开管理后台...")
@@ -431,29 +495,21 @@ def main():
     print("启动服务...")
     print("=" * 50)
     
-    # 启动Hugo服务器
-    hugo_process = start_hugo_server()
-    if not hugo_process:
-        return 1
-    
-    # 启动API服务器
-    api_thread = start_api_server()
-    if not api_thread:
-        if hugo_process:
-            hugo_process.terminate()
-        return 1
-    
-    # 启动管理后台服务器
-    admin_thread = start_admin_server()
-    if not admin_thread:
-        if hugo_process:
-            hugo_process.terminate()
+    # 并行启动Hugo、API和管理后台服务器，任一失败则全部停止
+    services = [
+        Service("hugo", release_on_failure("hugo", start_hugo_server), stop_hugo_process),
+        Service("api", release_on_failure("api", start_api_server), stop_api_server),
+        Service("admin", release_on_failure("admin", start_admin_server), stop_server),
+    ]
+    handles = start_all(services)
+    if not handles:
         return 1
+    hugo_process = handles["hugo"]
     
-    # 获取端口信息
-    hugo_port = _hugo_port if _hugo_port else 8000
-    api_port = _api_port if _api_port else 8081
-    admin_port = _admin_port if _admin_port else 8080
+    # 从注册表获取端口信息
+    hugo_port = port_registry.lookup("hugo", DEFAULT_HUGO_PORT)
+    api_port = port_registry.lookup("api", DEFAULT_API_PORT)
+    admin_port = port_registry.lookup("admin", DEFAULT_ADMIN_PORT)
     
     print("\n" + "=" * 50)
     print("🎉 所有服务已启动!")
@@ -471,6 +527,10 @@ def main():
     print(f"   管理后台: {admin_port}")
     print(f"   API服务器: {api_port}")
     print("=" * 50)
+    print("⏱️  就绪耗时:")
+    for service, ready_time in _ready_times.items():
+        print(f"   {service}: {ready_time:.2f}s")
+    print("=" * 50)
     print("按 Ctrl+C 停止所有服务")
     
     # 自动打开浏览器
@@ -489,20 +549,11 @@ def main():
                 
     except KeyboardInterrupt:
         print("\n\n🛑 正在停止服务...")
-        
-        # 停止Hugo服务器
-        if hugo_process:
-            hugo_process.terminate()
-            try:
-                hugo_process.wait(timeout=5)
-                print("✅ Hugo 服务器已停止")
-            except subprocess.TimeoutExpired:
-                hugo_process.kill()
-                print("🔪 强制停止 Hugo 服务器")
-        
+        stop_all(services, handles)
         print("✅ 所有服务已停止")
         return 0
     
+    stop_all(services, handles)
     return 1
 
 if __name__ == "__main__":
@@ -15,6 +15,7 @@ import socket
 from pathlib import Path
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 import urllib.parse
+import json
 
 # 固定端口配置
 FIXED_PORTS = {
@@ -23,29 +24,62 @@ FIXED_PORTS = {
     'api': 8081
 }
 
+# 各服务实际绑定的地址，检查端口时绑定相同的地址
+BIND_HOSTS = {
+    'hugo': '0.0.0.0',
+    'admin': 'localhost',
+    'api': 'localhost'
+}
+
 # 添加脚本目录到Python路径
 script_dir = Path(__file__).parent
 sys.path.insert(0, str(script_dir))
 
 try:
     from document_manager import DocumentManager, WebAPI
+    from config import (DOCUMENT_STORE, API_MAX_WORKERS, API_MAX_QUEUE,
+                        REBUILD_QUIET_WINDOW, JOB_POOL_SIZES, JOB_MAX_QUEUE,
+                        HUGO_LOG_LINES, HUGO_LOG_FILE, STARTUP_TIMEOUT,
+                        ASSET_CACHE_MAX_BYTES, ASSET_CACHE_FRESH, ASSET_NEGATIVE_TTL,
+                        ASSET_POOL_SIZE, ASSET_BREAKER_FAILURES, ASSET_BREAKER_COOLDOWN,
+                        ADMIN_MAX_WORKERS, ADMIN_MAX_QUEUE)
+    from log_pump import LogPump
+    from readiness import wait_for_hugo, wait_for_http, wait_for_port
+    from pooled_server import PooledHTTPServer
+    from startup import Service, start_all, stop_all, release_on_failure, cancelled
+    from port_manager import PortManager
+    import port_registry
+    from page_cache import PageCache, send_page
+    from asset_proxy import AssetProxy, AssetProxyError, send_asset
+    from circuit_breaker import CircuitOpenError
 except ImportError as e:
     print(f"❌ 导入依赖失败: {e}")
     print("请确保所需的Python模块都存在")
     sys.exit(1)
 
+# 各服务从启动到就绪的耗时（秒）
+_ready_times = {}
+
+# 渲染后的管理后台页面
+_page_cache = PageCache()
+
+# Hugo 静态资源代理
+_asset_proxy = AssetProxy(
+    lambda: port_registry.lookup('hugo', FIXED_PORTS['hugo']),
+    max_bytes=ASSET_CACHE_MAX_BYTES, fresh_for=ASSET_CACHE_FRESH,
+    negative_ttl=ASSET_NEGATIVE_TTL, pool_size=ASSET_POOL_SIZE,
+    failure_threshold=ASSET_BREAKER_FAILURES, cooldown=ASSET_BREAKER_COOLDOWN
+)
+
 def check_port_available(port, service_name):
     """
-    检查端口是否可用
+    检查端口是否可用（只检查，不预留）
+    绑定服务实际使用的地址，并检查 0.0.0.0 / :: 上是否已有监听
     返回: (是否可用, 错误信息)
     """
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            result = sock.bind(('localhost', port))
-            return True, None
-    except OSError as e:
+    if not PortManager.is_port_free(port, BIND_HOSTS.get(service_name, '127.0.0.1')):
         return False, f"{service_name} 端口 {port} 被占用"
+    return True, None
 
 def check_all_ports():
     """
@@ -61,6 +95,24 @@ def check_all_ports():
     
     return len(occupied_ports) == 0, occupied_ports
 
+def reserve_all_ports():
+    """
+    在端口注册表中为所有服务预留固定端口，其他启动器进程会跳过已预留的端口
+    任一端口预留失败时释放已预留的端口
+    返回: (是否全部预留成功, 预留失败的服务列表)
+    """
+    reserved, failed = [], []
+    for service, port in FIXED_PORTS.items():
+        if PortManager.reserve_port(service, [port], BIND_HOSTS.get(service, '127.0.0.1')):
+            reserved.append(service)
+        else:
+            failed.append((service, port, f"{service} 端口 {port} 被占用或已被其他启动器预留"))
+
+    if failed:
+        for service in reserved:
+            port_registry.unregister(service)
+    return not failed, failed
+
 def show_port_conflict_message(occupied_ports):
     """
     显示端口冲突错误信息和解决方案
@@ -180,17 +232,10 @@ class AdminRequestHandler(SimpleHTTPRequestHandler):
         """服务管理后台页面"""
         try:
             admin_page_path = self.admin_root / 'layouts' / 'admin' / page_name
-            if admin_page_path.exists():
-                with open(admin_page_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # 处理Hugo模板语法，替换为静态资源链接
-                content = self.process_hugo_template(content)
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html; charset=utf-8')
-                self.end_headers()
-                self.wfile.write(content.encode('utf-8'))
+            # 处理Hugo模板语法，替换为静态资源链接
+            page = _page_cache.get(admin_page_path, self.process_hugo_template)
+            if page:
+                send_page(self, page)
             else:
                 self.send_error(404, f"Admin page not found: {page_name}")
         except Exception as e:
@@ -257,35 +302,28 @@ class AdminRequestHandler(SimpleHTTPRequestHandler):
     def proxy_hugo_asset(self, asset_path):
         """代理Hugo服务器的静态资源"""
         try:
-            import urllib.request
-            import urllib.error
-            
-            # 构建 Hugo 服务器的 URL
-            hugo_url = f"http://localhost:8000{asset_path}"
-            
-            # 从 Hugo 服务器获取资源
+            # 从 Hugo 服务器获取资源（经连接池和缓存）
             try:
-                with urllib.request.urlopen(hugo_url) as response:
-                    content = response.read()
-                    content_type = response.headers.get('Content-Type', 'application/octet-stream')
-                    
-                    self.send_response(200)
-                    self.send_header('Content-type', content_type)
-                    self.end_headers()
-                    self.wfile.write(content)
-            except urllib.error.HTTPError as e:
-                if e.code == 404:
+                asset = _asset_proxy.get(asset_path)
+                if asset is None:
                     # 如果Hugo服务器上没有，尝试本地文件
                     self.serve_static_asset(asset_path)
                 else:
-                    self.send_error(e.code, f"Hugo server error: {e.reason}")
+                    send_asset(self, asset)
+            except AssetProxyError as e:
+                self.send_error(e.status, f"Hugo server error: {e.reason}")
             except Exception as e:
-                # 如果无法连接Hugo服务器，尝试本地文件
+                # 如果无法连接Hugo服务器或代理已熔断，尝试本地文件
                 self.serve_static_asset(asset_path)
                 
         except Exception as e:
             self.send_error(500, f"Error proxying asset: {e}")
 
+def start_hugo_log_pump(process):
+    """启动Hugo输出泵，持续读取stdout/stderr"""
+    log_file = script_dir.parent / HUGO_LOG_FILE if HUGO_LOG_FILE else None
+    return LogPump(process, "hugo", max_lines=HUGO_LOG_LINES, log_file=log_file).start()
+
 def start_hugo_blog():
     """启动Hugo博客服务器"""
     try:
@@ -304,43 +342,39 @@ def start_hugo_blog():
             encoding='utf-8',
             errors='ignore'
         )
+        # 持续读取Hugo输出，避免管道写满后Hugo阻塞
+        pump = start_hugo_log_pump(process)
+        
+        # 等待Hugo输出就绪信息或端口可连接
+        ready_time = wait_for_hugo(process, pump, hugo_port, STARTUP_TIMEOUT, abort=cancelled.is_set)
         
-        # 等待启动
-        time.sleep(3)
+        if ready_time is not None:
+            print(f"✅ Hugo 博客服务器已启动: http://localhost:{hugo_port} (就绪耗时 {ready_time:.2f}s)")
+            _ready_times['hugo'] = ready_time
+            port_registry.register("hugo", hugo_port, process.pid)
+            return process, hugo_port
         
         # 检查进程状态
         if process.poll() is None:
-            # 进程仍在运行，进一步验证服务器是否真正启动
-            # 尝试连接验证
-            for attempt in range(10):  # 最多尝试10次
-                try:
-                    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                        sock.settimeout(1)
-                        result = sock.connect_ex(('localhost', hugo_port))
-                        if result == 0:
-                            print(f"✅ Hugo 博客服务器已启动: http://localhost:{hugo_port}")
-                            return process, hugo_port
-                except:
-                    pass
-                time.sleep(0.5)
-            
-            # 如果连接失败，检查进程是否还在运行
-            if process.poll() is None:
-                print(f"⚠️ Hugo 进程运行中但端口 {hugo_port} 无法连接")
-                # 读取输出看看有什么错误
-                try:
-                    process.terminate()
-                    stdout, stderr = process.communicate(timeout=5)
-                    if stderr:
-                        print(f"Hugo 错误输出: {stderr.strip()}")
-                    if stdout:
-                        print(f"Hugo 标准输出: {stdout.strip()}")
-                except:
-                    pass
+            # 进程仍在运行，但在超时内未就绪
+            print(f"⚠️ Hugo 进程运行中但端口 {hugo_port} 在 {STARTUP_TIMEOUT} 秒内无法连接")
+            # 读取输出看看有什么错误
+            try:
+                process.terminate()
+                process.wait(timeout=5)
+                pump.join()
+                stdout, stderr = pump.text("stdout"), pump.text("stderr")
+                if stderr:
+                    print(f"Hugo 错误输出: {stderr.strip()}")
+                if stdout:
+                    print(f"Hugo 标准输出: {stdout.strip()}")
+            except:
+                pass
             
             return None, None
         else:
-            stdout, stderr = process.communicate()
+            pump.join()
+            stdout, stderr = pump.text("stdout"), pump.text("stderr")
             print(f"❌ Hugo 博客服务器启动失败")
             if stderr:
                 print(f"错误信息: {stderr.strip()}")
@@ -366,7 +400,9 @@ def start_admin_server():
             return AdminRequestHandler(*args, admin_root=script_dir.parent, hugo_port=FIXED_PORTS['hugo'], **kwargs)
         
         # 创建HTTP服务器
-        server = HTTPServer(('localhost', admin_port), handler_factory)
+        # 工作线程池并发处理请求，资源代理的多个到Hugo的连接才能同时使用
+        server = PooledHTTPServer(('localhost', admin_port), handler_factory,
+                                  max_workers=ADMIN_MAX_WORKERS, max_queue=ADMIN_MAX_QUEUE, name="admin")
         
         # 在新线程中运行服务器
         server_thread = threading.Thread(
@@ -375,7 +411,15 @@ def start_admin_server():
         )
         server_thread.start()
         
-        print(f"✅ 管理后台服务器已启动: http://localhost:{admin_port}")
+        ready_time = wait_for_port(admin_port, STARTUP_TIMEOUT, abort=cancelled.is_set)
+        if ready_time is None:
+            print(f"❌ 管理后台服务器在 {STARTUP_TIMEOUT} 秒内未就绪")
+            server.shutdown()
+            return None, None
+        
+        print(f"✅ 管理后台服务器已启动: http://localhost:{admin_port} (就绪耗时 {ready_time:.2f}s)")
+        _ready_times['admin'] = ready_time
+        port_registry.register("admin", admin_port)
         return server, admin_port
         
     except Exception as e:
@@ -391,29 +435,53 @@ def start_api_server():
         api_port = FIXED_PORTS['api']
         print(f"🔧 使用固定端口 {api_port}")
         
-        dm = DocumentManager(str(script_dir.parent))
-        api = WebAPI(dm, port=api_port)
+        dm = DocumentManager(str(script_dir.parent), store=DOCUMENT_STORE,
+                             rebuild_quiet_window=REBUILD_QUIET_WINDOW)
+        # 资源代理的缓存与熔断器状态通过 /api/health 报告
+        api = WebAPI(dm, port=api_port, max_workers=API_MAX_WORKERS, max_queue=API_MAX_QUEUE,
+                     job_pool_sizes=JOB_POOL_SIZES, job_max_queue=JOB_MAX_QUEUE,
+                     health_sections={
+                         "hugo_port": lambda: port_registry.lookup('hugo', FIXED_PORTS['hugo']),
+                         "asset_proxy": _asset_proxy.stats
+                     })
         
         # 在新线程中启动API服务器
         api_thread = threading.Thread(target=api.start_server, daemon=True)
         api_thread.start()
         
-        time.sleep(1)
-        
-        # 验证API服务器是否正常启动
-        try:
-            import urllib.request
-            urllib.request.urlopen(f"http://localhost:{api_port}/api/health", timeout=3)
-            print(f"✅ API 服务器已启动: http://localhost:{api_port}")
-        except Exception:
-            print(f"⚠️ API 服务器启动中，但健康检查失败")
+        # 探测健康检查接口，验证API服务器是否正常启动
+        ready_time = wait_for_http(f"http://localhost:{api_port}/api/health", STARTUP_TIMEOUT, abort=cancelled.is_set)
+        if ready_time is not None:
+            print(f"✅ API 服务器已启动: http://localhost:{api_port} (就绪耗时 {ready_time:.2f}s)")
+            _ready_times['api'] = ready_time
+            port_registry.register("api", api_port)
+        else:
+            print(f"❌ API 服务器健康检查在 {STARTUP_TIMEOUT} 秒内未通过")
+            api.stop_server()
+            return None, None
         
-        return api_thread, api_port
+        return api, api_port
         
     except Exception as e:
         print(f"❌ 启动 API 服务器时出错: {e}")
         return None, None
 
+def stop_hugo_process(process):
+    """停止Hugo博客服务器"""
+    port_registry.unregister("hugo")
+    process.terminate()
+    process.wait()
+
+def stop_admin_server(server):
+    """停止管理后台服务器"""
+    port_registry.unregister("admin")
+    server.shutdown()
+
+def stop_api_server(api):
+    """停止API服务器"""
+    port_registry.unregister("api")
+    api.stop_server()
+
 def check_dependencies():
     """检查依赖"""
     print("🔍 检查依赖...")
@@ -517,30 +585,29 @@ def main():
     else:
         print("✅ 所有端口都可用")
     
+    # 检查通过后在端口注册表中预留端口，服务启动失败时由 release_on_failure 释放
+    all_reserved, occupied_ports = reserve_all_ports()
+    if not all_reserved:
+        show_port_conflict_message(occupied_ports)
+        return 1
+    
     print("\n" + "=" * 50)
     print("启动服务...")
     print("=" * 50)
     
-    # 启动Hugo博客服务器
-    hugo_process, hugo_port = start_hugo_blog()
-    if not hugo_process:
-        return 1
-    
-    # 启动独立管理后台服务器
-    admin_server, admin_port = start_admin_server()
-    if not admin_server:
-        if hugo_process:
-            hugo_process.terminate()
+    # 并行启动Hugo博客、管理后台和API服务器，任一失败则全部停止
+    services = [
+        Service("hugo", release_on_failure("hugo", lambda: start_hugo_blog()[0]), stop_hugo_process),
+        Service("admin", release_on_failure("admin", lambda: start_admin_server()[0]), stop_admin_server),
+        Service("api", release_on_failure("api", lambda: start_api_server()[0]), stop_api_server),
+    ]
+    handles = start_all(services)
+    if not handles:
         return 1
     
-    # 启动API服务器
-    api_thread, api_port = start_api_server()
-    if not api_thread:
-        if hugo_process:
-            hugo_process.terminate()
-        if admin_server:
-            admin_server.shutdown()
-        return 1
+    hugo_port = FIXED_PORTS['hugo']
+    admin_port = FIXED_PORTS['admin']
+    api_port = FIXED_PORTS['api']
     
     print("\n" + "=" * 50)
     print("🎉 所有服务已成功启动!")
@@ -549,6 +616,10 @@ def main():
     print(f"🔧 管理后台: http://localhost:{admin_port}/")
     print(f"🔌 API 服务: http://localhost:{api_port}/")
     print("=" * 50)
+    print("⏱️  就绪耗时:")
+    for service, ready_time in _ready_times.items():
+        print(f"   {service}: {ready_time:.2f}s")
+    print("=" * 50)
     print("💡 管理后台登录信息:")
     print("   用户名: admin")
     print("   密码: CHENpengfei186")
@@ -557,7 +628,6 @@ def main():
     # 打开浏览器
     try:
         print("🌐 打开浏览器...")
-        time.sleep(2)
         webbrowser.open(f"http://localhost:{admin_port}/")
         webbrowser.open(f"http://localhost:{hugo_port}/")
     except Exception as e:
@@ -571,14 +641,7 @@ def main():
             time.sleep(1)
     except KeyboardInterrupt:
         print("\n\n⏹️ 正在停止所有服务...")
-        
-        if hugo_process:
-            hugo_process.terminate()
-            hugo_process.wait()
-        
-        if admin_server:
-            admin_server.shutdown()
-        
+        stop_all(services, handles)
         print("✅ 所有服务已停止")
         return 0
 
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并行启动编排 - 同时启动多个服务并一起等待它们就绪
+任一服务启动失败时，立即通知其余仍在等待就绪的服务放弃，并停止已经启动的服务
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import port_registry
+
+# 本轮启动已有服务失败；启动函数把 cancelled.is_set 作为就绪等待的 abort 条件传入
+cancelled = threading.Event()
+
+
+class Service:
+    """一个待启动的服务
+
+    start() 阻塞到服务就绪，成功时返回服务句柄，失败时返回None；
+    等待就绪时应检查 cancelled，其他服务失败后尽快返回None。
+    stop(handle) 用于在其他服务失败或退出时停止该服务。
+    """
+
+    def __init__(self, name: str, start: Callable[[], Any],
+                 stop: Optional[Callable[[Any], None]] = None):
+        self.name = name
+        self.start = start
+        self.stop = stop
+
+
+def start_all(services: List[Service]) -> Optional[Dict[str, Any]]:
+    """并行启动所有服务，全部就绪时返回 {名称: 句柄}，否则停止已启动的服务并返回None"""
+    handles: Dict[str, Any] = {}
+    finished = threading.Condition()
+    cancelled.clear()
+
+    def run(service: Service):
+        try:
+            handle = service.start()
+        except Exception as e:
+            print(f"❌ 启动 {service.name} 时出错: {e}")
+            handle = None
+        with finished:
+            handles[service.name] = handle
+            if not handle:
+                cancelled.set()
+            finished.notify_all()
+
+    started = time.monotonic()
+    threads = [
+        threading.Thread(target=run, args=(service,), name=f"start-{service.name}", daemon=True)
+        for service in services
+    ]
+    for thread in threads:
+        thread.start()
+    # 等到全部就绪或第一个失败，不等待其余服务的就绪超时
+    with finished:
+        finished.wait_for(lambda: cancelled.is_set() or len(handles) == len(services))
+        failed = [name for name, handle in handles.items() if not handle]
+    elapsed = time.monotonic() - started
+
+    if failed:
+        print(f"❌ 服务启动失败: {', '.join(failed)}，正在停止其他服务...")
+        # 其余服务的就绪等待检查 cancelled 后立即返回，等它们清理完再停止已就绪的服务
+        for thread in threads:
+            thread.join()
+        stop_all(services, handles)
+        return None
+
+    print(f"⏱️  并行启动总耗时 {elapsed:.2f}s")
+    return handles
+
+
+def stop_all(services: List[Service], handles: Dict[str, Any]):
+    """按启动顺序的逆序停止已启动的服务"""
+    for service in reversed(services):
+        handle = handles.get(service.name)
+        if not handle or not service.stop:
+            continue
+        try:
+            service.stop(handle)
+        except Exception as e:
+            print(f"⚠️ 停止 {service.name} 时出错: {e}")
+
+
+def release_on_failure(service_name: str, start: Callable[[], Any]) -> Callable[[], Any]:
+    """包装启动函数：启动失败时释放该服务在端口注册表中预留的端口"""
+    def run():
+        handle = None
+        try:
+            handle = start()
+            return handle
+        finally:
+            if not handle:
+                port_registry.unregister(service_name)
+    return run
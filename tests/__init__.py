@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - scripts 下的模块互相以顶层模块名导入，测试前把 scripts 目录加入 sys.path
+
+运行: python -m pytest tests  或  python -m unittest discover tests
+"""
+
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""熔断器状态转换"""
+
+import unittest
+from unittest import mock
+
+from tests import SCRIPTS_DIR  # noqa: F401  确保 scripts 在 sys.path 中
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch.object(circuit_breaker.time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("test", failure_threshold=2, cooldown=10.0)
+
+    def trip(self):
+        for _ in range(self.breaker.failure_threshold):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure(OSError("down"))
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.record_failure(OSError("down"))
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+
+        stats = self.breaker.stats()
+        self.assertEqual(stats["trips"], 1)
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["last_error"], "down")
+        self.assertEqual(stats["retry_in"], 10.0)
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_allows_single_probe(self):
+        self.trip()
+        self.now += 10.0
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+    def test_successful_probe_closes(self):
+        self.trip()
+        self.now += 10.0
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_reopens_for_another_cooldown(self):
+        self.trip()
+        self.now += 10.0
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.stats()["trips"], 1)
+
+        self.now += 9.9
+        self.assertFalse(self.breaker.allow())
+        self.now += 0.1
+        self.assertTrue(self.breaker.allow())
+
+    def test_release_frees_probe_without_recording(self):
+        self.trip()
+        self.now += 10.0
+        self.assertTrue(self.breaker.allow())
+        self.breaker.release()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+
+    def test_reset_closes(self):
+        self.trip()
+        self.breaker.reset()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
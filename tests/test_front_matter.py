@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Front Matter 解析与生成的往返一致性，包括未安装 PyYAML / tomllib 时使用的子集解析器"""
+
+import unittest
+from unittest import mock
+
+from tests import SCRIPTS_DIR  # noqa: F401  确保 scripts 在 sys.path 中
+import front_matter
+from front_matter import YAML, TOML, FrontMatterError
+
+META = {
+    "title": 'He said "hi": a # not-comment',
+    "date": "2024-05-01T10:00:00",
+    "draft": False,
+    "weight": 3,
+    "tags": ["hugo", "中文", "a, b"],
+    "params": {"author": "someone", "toc": True},
+}
+
+BODY = "# 标题\n\n正文 --- 不是分隔符\n+++\n"
+
+
+class FrontMatterTest(unittest.TestCase):
+
+    def assertRoundTrip(self, fmt):
+        text = front_matter.dump(META, fmt) + "\n" + BODY
+        meta, body, parsed_fmt = front_matter.parse(text)
+        self.assertEqual(parsed_fmt, fmt)
+        self.assertEqual(meta, META)
+        self.assertEqual(body, BODY)
+
+    def test_yaml_round_trip(self):
+        self.assertRoundTrip(YAML)
+
+    def test_toml_round_trip(self):
+        if front_matter.tomllib is None:
+            self.skipTest("需要 tomllib 或 tomli")
+        self.assertRoundTrip(TOML)
+
+    def test_yaml_subset_round_trip(self):
+        with mock.patch.object(front_matter, "yaml", None):
+            self.assertRoundTrip(YAML)
+
+    def test_toml_subset_round_trip(self):
+        with mock.patch.object(front_matter, "tomllib", None):
+            self.assertRoundTrip(TOML)
+
+    def test_no_front_matter(self):
+        self.assertEqual(front_matter.split(BODY), (None, None, BODY))
+        self.assertEqual(front_matter.parse(BODY), ({}, BODY, None))
+
+    def test_update_keeps_other_fields_and_body(self):
+        text = front_matter.dump(META, TOML) + "\n" + BODY
+        updated = front_matter.update(text, {"title": "新标题", "draft": True})
+        meta, body, fmt = front_matter.parse(updated)
+        self.assertEqual(fmt, TOML)
+        self.assertEqual(meta, dict(META, title="新标题", draft=True))
+        self.assertEqual(body, BODY)
+
+    def test_empty_header(self):
+        self.assertEqual(front_matter.parse("---\n---\nbody"), ({}, "body", YAML))
+
+    def test_invalid_header_raises(self):
+        with self.assertRaises(FrontMatterError):
+            front_matter.parse("---\n- just\n- a list\n---\nbody")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""搜索分词与分片：Python 端与 assets/js/fastsearch.js 必须得到相同的词和分片号"""
+
+import json
+import re
+import shutil
+import subprocess
+import unittest
+
+from tests import SCRIPTS_DIR
+from search_index import tokenize
+from search_shards import shard_key, shard_of
+
+FASTSEARCH_JS = SCRIPTS_DIR.parent / "assets" / "js" / "fastsearch.js"
+
+SAMPLES = [
+    "Hugo 静态网站生成器",
+    "中文分词测试：双字词，单字「我」",
+    "Café Déjà-Vu naïve résumé",
+    "ひらがなカタカナ 漢字 한국어 텍스트",
+    "HTTP/1.1 503 Retry-After: 1, limit=100",
+    "",
+    "###  **Markdown** `code` [link](http://example.com)",
+]
+
+
+def _js_source(source: str, start: str) -> str:
+    """截取 fastsearch.js 中从 start 开始的一条常量声明或一个顶层函数"""
+    index = source.index(start)
+    if start.startswith("const"):
+        return source[index:source.index(";\n", index) + 1]
+    return source[index:source.index("\n}\n", index) + 2]
+
+
+class TokenizeTest(unittest.TestCase):
+
+    def test_cjk_bigrams(self):
+        self.assertEqual(tokenize("静态网站"), ["静态", "态网", "网站"])
+
+    def test_single_cjk_character(self):
+        self.assertEqual(tokenize("我"), ["我"])
+
+    def test_latin_words_lowercased(self):
+        self.assertEqual(tokenize("Hello, World 2024"), ["hello", "world", "2024"])
+
+    def test_mixed_text(self):
+        self.assertEqual(tokenize("Hugo博客"), ["hugo", "博客"])
+
+    def test_shard_key(self):
+        self.assertEqual(shard_key("网站"), "网")
+        self.assertEqual(shard_key("hugo"), "hu")
+        self.assertEqual(shard_key("a"), "a")
+
+    def test_shard_of_in_range_and_stable(self):
+        for token in tokenize(" ".join(SAMPLES)):
+            self.assertIn(shard_of(token, 7), range(7))
+        # 前缀相同的词位于同一分片
+        self.assertEqual(shard_of("hugo", 13), shard_of("hub", 13))
+
+
+@unittest.skipUnless(shutil.which("node"), "需要 node 运行 fastsearch.js")
+class FastsearchParityTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        source = FASTSEARCH_JS.read_text(encoding="utf-8")
+        cls.js = "\n".join(_js_source(source, start) for start in (
+            "const CJK", "const TOKEN_RE", "function tokenize(", "function shardOf("
+        ))
+
+    def run_js(self, texts, tokens, shards):
+        script = self.js + """
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+process.stdout.write(JSON.stringify({
+    tokens: input.texts.map(tokenize),
+    shards: input.shards.map(n => input.tokens.map(t => shardOf(t, n)))
+}));
+"""
+        result = subprocess.run(
+            ["node", "-e", script],
+            input=json.dumps({"texts": texts, "tokens": tokens, "shards": shards}),
+            capture_output=True, text=True, encoding="utf-8", timeout=30
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout)
+
+    def test_tokenize_and_shards_match(self):
+        tokens = sorted({token for text in SAMPLES for token in tokenize(text)})
+        shard_counts = [1, 2, 7, 64, 1000]
+        js = self.run_js(SAMPLES, tokens, shard_counts)
+
+        self.assertEqual(js["tokens"], [tokenize(text) for text in SAMPLES])
+        for n, js_shards in zip(shard_counts, js["shards"]):
+            self.assertEqual(js_shards, [shard_of(token, n) for token in tokens], f"分片数 {n}")
+
+    def test_character_class_boundaries(self):
+        # 分词正则各个区间的首尾字符：Python 用码点判断中日韩文字，JS 用正则，两者必须一致
+        boundaries = [
+            "\u00c0\u024f", "\u3040\u30ff", "\u3400\u4dbf", "\u4e00\u9fff",
+            "\uac00\ud7af", "\uf900\ufaff", "0z", "\u00c0a\u3040"
+        ]
+        tokens = sorted({token for text in boundaries for token in tokenize(text)})
+        js = self.run_js(boundaries, tokens, [31])
+        self.assertEqual(js["tokens"], [tokenize(text) for text in boundaries])
+        self.assertEqual(js["shards"][0], [shard_of(token, 31) for token in tokens])
+
+
+if __name__ == "__main__":
+    unittest.main()